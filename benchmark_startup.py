@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Startup-Time Benchmark
+Wall time of fresh interpreter launches for each entry point, plus which
+controller modules an entry point imports before doing any work.
+
+Run: python benchmark_startup.py
+     python benchmark_startup.py --repeats 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# (label, interpreter arguments)
+COMMANDS = [
+    ('python (floor)', ['-c', 'pass']),
+    ('import numpy (floor)', ['-c', 'import numpy']),
+    ('import utils', ['-c', 'import utils']),
+    ('ultimate_tsc.py --help', ['ultimate_tsc.py', '--help']),
+    ('visualize_results.py --help', ['visualize_results.py', '--help']),
+    ('controller_service.py --help', ['controller_service.py', '--help']),
+    ('tuning.py --help', ['tuning.py', '--help']),
+]
+
+CONTROLLERS_LOADED = ("import sys, {module}; "
+                      "print(sum(m.startswith('controllers.') for m in sys.modules))")
+
+
+def time_command(args, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), min(times)
+
+
+def controllers_loaded(module):
+    out = subprocess.run([sys.executable, '-c', CONTROLLERS_LOADED.format(module=module)], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return int(out.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure CLI startup time')
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"\n{'='*60}\nSTARTUP TIME ({args.repeats} launches each)\n{'='*60}")
+    print(f"{'Command':<32} {'Median':>10} {'Min':>10}")
+    print("-"*54)
+    for label, command in COMMANDS:
+        median, best = time_command(command, args.repeats)
+        print(f"{label:<32} {median:>8.1f}ms {best:>8.1f}ms")
+
+    print(f"\nController modules imported at startup:")
+    for module in ('utils', 'ultimate_tsc', 'controller_service'):
+        print(f"  {module:<20} {controllers_loaded(module)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Online Controller Service
+Long-lived asyncio server that returns phases for detector states, micro-batching
+requests that arrive within a short window into one get_actions call
+
+Protocol: newline-delimited JSON over TCP
+  request:  {"id": 7, "intersections": [3, 12], "states": [[8 lane queues], [8 lane queues]]}
+  response: {"id": 7, "actions": [1, 0], "latency_ms": 0.42, "batch": 37}
+
+Each request is one control tick for the intersections it names.
+
+Run: python controller_service.py serve --mode maxpressure --intersections 1024
+     python controller_service.py load --connections 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from collections import deque
+from utils import MODE_MAP
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+LANES = 8
+
+
+class BatchingControllerService:
+    """Wraps one controller instance for a fixed set of intersection slots"""
+
+    def __init__(self, controller_class, num_intersections, window_ms=2.0, max_batch=4096):
+        self.controller = controller_class(num_intersections)
+        self.num_intersections = num_intersections
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.queue = None
+        self.latencies = deque(maxlen=100000)  # seconds, most recent requests
+        self.batch_sizes = deque(maxlen=10000)
+        self.requests = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------- batching
+
+    async def submit(self, intersections, states):
+        """Queue one request and wait for (actions, rows in its batch)"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((intersections, states, future))
+        return await future
+
+    async def _collect(self):
+        """Block for the first request, then gather more until the window closes"""
+        batch = [await self.queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _decide(self, batch):
+        """
+        One get_actions call per round. A round holds each intersection at most
+        once, so a second request for the same intersection waits for the next tick.
+        """
+        results = [[None] * len(ids) for ids, _, _ in batch]
+        pending = [(r, k) for r, (ids, _, _) in enumerate(batch) for k in range(len(ids))]
+        while pending:
+            seen, this_round, later = set(), [], []
+            for r, k in pending:
+                i = batch[r][0][k]
+                (later if i in seen else this_round).append((r, k))
+                seen.add(i)
+            indices = [batch[r][0][k] for r, k in this_round]
+            states = np.array([batch[r][1][k] for r, k in this_round], dtype=np.float32)
+            actions = self.controller.get_actions(states, indices)
+            for (r, k), action in zip(this_round, actions):
+                results[r][k] = int(action)
+            pending = later
+        return results
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            rows = sum(len(ids) for ids, _, _ in batch)
+            self.batch_sizes.append(rows)
+            try:
+                # Off the event loop so new requests keep arriving into the next batch
+                results = await loop.run_in_executor(None, self._decide, batch)
+            except Exception as exc:  # reply with the error rather than hanging clients
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, _, future), actions in zip(batch, results):
+                if not future.done():
+                    future.set_result((actions, rows))
+
+    # --------------------------------------------------------------- server
+
+    def _validate(self, request):
+        ids = [int(i) for i in request['intersections']]
+        states = request['states']
+        if len(ids) != len(states):
+            raise ValueError('intersections and states differ in length')
+        for i in ids:
+            if not 0 <= i < self.num_intersections:
+                raise ValueError(f'intersection {i} out of range 0..{self.num_intersections - 1}')
+        for s in states:
+            if len(s) != LANES:
+                raise ValueError(f'each state needs {LANES} lane queues')
+        return ids, states
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                request = {}
+                try:
+                    request = json.loads(line)
+                    ids, states = self._validate(request)
+                    actions, rows = await self.submit(ids, states)
+                    latency = time.perf_counter() - start
+                    self.latencies.append(latency)
+                    self.requests += 1
+                    response = {'id': request.get('id'), 'actions': actions,
+                                'latency_ms': latency * 1000, 'batch': rows}
+                except (ValueError, KeyError, TypeError) as exc:
+                    self.errors += 1
+                    response = {'id': request.get('id') if isinstance(request, dict) else None,
+                                'error': str(exc)}
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def report(self, interval):
+        last = 0
+        while True:
+            await asyncio.sleep(interval)
+            done = self.requests - last
+            last = self.requests
+            if not done:
+                continue
+            lat = np.array(self.latencies) * 1000
+            print(f"📡 {done / interval:8.0f} req/s | latency p50 {np.percentile(lat, 50):.2f}ms "
+                  f"p99 {np.percentile(lat, 99):.2f}ms | avg batch {np.mean(self.batch_sizes):.1f} rows | "
+                  f"errors {self.errors}")
+
+    async def serve(self, host, port, report_interval=5.0):
+        self.queue = asyncio.Queue()
+        server = await asyncio.start_server(self.handle, host, port, limit=1 << 22)
+        print(f"🚦 Serving {type(self.controller).__name__} for {self.num_intersections} intersections "
+              f"on {host}:{port} (window {self.window * 1000:.1f}ms)")
+        tasks = [asyncio.create_task(self.batcher())]
+        if report_interval:
+            tasks.append(asyncio.create_task(self.report(report_interval)))
+        async with server:
+            await server.serve_forever()
+
+
+# ============================================================================
+# LOAD GENERATOR
+# ============================================================================
+
+async def _client(host, port, num_intersections, per_request, deadline, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 22)
+    request_id = 0
+    while time.perf_counter() < deadline:
+        ids = rng.choice(num_intersections, size=per_request, replace=False).tolist()
+        states = rng.integers(0, 40, size=(per_request, LANES)).tolist()
+        request_id += 1
+        start = time.perf_counter()
+        writer.write((json.dumps({'id': request_id, 'intersections': ids, 'states': states}) + '\n').encode())
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run_load(host, port, connections, duration, num_intersections, per_request, seed=0):
+    """Closed-loop load: each connection sends its next request when the last one returns"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, num_intersections, per_request, deadline, latencies,
+                np.random.default_rng(seed + c))
+        for c in range(connections)])
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1000
+    print(f"\n{'='*60}\nLOAD TEST - {connections} connections, {per_request} intersections/request\n{'='*60}")
+    print(f"Requests:     {len(lat)} in {elapsed:.1f}s")
+    print(f"Throughput:   {len(lat) / elapsed:.0f} req/s ({len(lat) * per_request / elapsed:.0f} decisions/s)")
+    print(f"Latency p50:  {np.percentile(lat, 50):.2f}ms")
+    print(f"Latency p99:  {np.percentile(lat, 99):.2f}ms")
+    print(f"Latency max:  {lat.max():.2f}ms")
+    return {'requests': len(lat), 'rps': len(lat) / elapsed,
+            'p50_ms': float(np.percentile(lat, 50)), 'p99_ms': float(np.percentile(lat, 99))}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Online TSC controller service and load generator')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help='Run the controller service')
+    serve.add_argument('--mode', '-m', choices=sorted(MODE_MAP), default='maxpressure')
+    serve.add_argument('--intersections', type=int, default=1024, help='Intersection slots')
+    serve.add_argument('--window-ms', type=float, default=2.0, help='Micro-batching window')
+    serve.add_argument('--max-batch', type=int, default=4096, help='Max rows per batch')
+    serve.add_argument('--report-interval', type=float, default=5.0, help='Stats print interval (s)')
+
+    load = sub.add_parser('load', help='Generate load against a running service')
+    load.add_argument('--connections', type=int, default=32)
+    load.add_argument('--duration', type=float, default=10.0, help='Seconds')
+    load.add_argument('--intersections', type=int, default=1024, help='Must match the server')
+    load.add_argument('--per-request', type=int, default=1, help='Intersections per request')
+
+    for p in (serve, load):
+        p.add_argument('--host', default=DEFAULT_HOST)
+        p.add_argument('--port', type=int, default=DEFAULT_PORT)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == 'serve':
+        service = BatchingControllerService(MODE_MAP[args.mode][1], args.intersections,
+                                            args.window_ms, args.max_batch)
+        try:
+            asyncio.run(service.serve(args.host, args.port, args.report_interval))
+        except KeyboardInterrupt:
+            print("\nService stopped")
+    else:
+        asyncio.run(run_load(args.host, args.port, args.connections, args.duration,
+                             args.intersections, args.per_request))
+
+
+if __name__ == '__main__':
+    main()
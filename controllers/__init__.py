@@ -0,0 +1,52 @@
+# ============================================================================
+# CONTROLLER REGISTRY (mode name -> controller, imported on first use)
+# ============================================================================
+from collections.abc import Mapping
+from importlib import import_module
+
+# --mode name -> (display name, module in this package, class name)
+CONTROLLERS = {
+    'fixed': ('Fixed-Time', 'fixed_time_controller', 'FixedTimeController'),
+    'webster': ('Webster-Fixed-Time', 'fixed_time_controller', 'WebsterFixedTimeController'),
+    'maxpressure': ('Max-Pressure', 'max_pressure_controller', 'MaxPressureController'),
+    'supermaxpressure': ('Super-Max-Pressure', 'super_max_pressure_controller', 'SuperMaxPressureController'),
+    'longestqueue': ('Longest-Queue-First', 'longest_queue_first_controller', 'LongestQueueFirstController'),
+    'fuzzy': ('Fuzzy-Webster', 'fuzzy_webster_controller', 'FuzzyWebsterController'),
+    'ga': ('GA-Fuzzy-Webster', 'ga_fuzzy_webster_controller', 'GAFuzzyWebsterController'),
+    'pso': ('PSO-Fuzzy-Webster', 'pso_fuzzy_webster_controller', 'PSOFuzzyWebsterController'),
+    'ultimate': ('ULTIMATE-HYBRID', 'ultimate_hybrid_controller', 'UltimateHybridController'),
+    'mpc': ('Model-Predictive', 'model_predictive_controller', 'ModelPredictiveController'),
+    'rl': ('Q-Learning', 'q_learning_controller', 'QLearningController')
+}
+
+# Modes evaluated by --mode comparison, in reporting order (baseline first)
+COMPARISON_MODES = ['fixed', 'webster', 'maxpressure', 'supermaxpressure', 'longestqueue',
+                    'fuzzy', 'ga', 'pso', 'ultimate']
+BASELINE_MODE = 'fixed'
+
+
+def display_name(mode):
+    return CONTROLLERS[mode][0]
+
+
+def load_controller(mode):
+    """Controller class for a mode; its module is imported on the first call only"""
+    _, module, class_name = CONTROLLERS[mode]
+    return getattr(import_module(f'{__name__}.{module}'), class_name)
+
+
+class ControllerRegistry(Mapping):
+    """
+    Read-only mapping mode -> (display name, controller class). Listing modes
+    or names imports nothing; a controller module is imported when its entry
+    is first looked up, so a single-method run never loads the other controllers.
+    """
+
+    def __getitem__(self, mode):
+        return display_name(mode), load_controller(mode)
+
+    def __iter__(self):
+        return iter(CONTROLLERS)
+
+    def __len__(self):
+        return len(CONTROLLERS)
@@ -0,0 +1,90 @@
+# ============================================================================
+# FITNESS CACHE + SURROGATE (shared by the GA / PSO parameter optimizers)
+# ============================================================================
+import numpy as np
+
+# Quantization step per parameter family: candidates within one step share an evaluation
+QUANTUM = {'green': 0.5, 'queue': 0.5, 'ext': 0.05, 'weight': 0.02}
+DEFAULT_QUANTUM = 0.05
+
+
+def quantum(key):
+    for family, step in QUANTUM.items():
+        if family in key:
+            return step
+    return DEFAULT_QUANTUM
+
+
+class FitnessCache:
+    """
+    Window fitness memoized on quantized parameter vectors. With surrogate=True, a
+    quadratic ridge regression over every evaluated vector pre-screens candidates:
+    once min_samples evaluations exist, a candidate predicted worse than the
+    keep_quantile of the measured fitnesses gets no simulation window.
+    """
+
+    def __init__(self, keys, surrogate=False, min_samples=None, keep_quantile=0.5, ridge=1e-2):
+        self.keys = list(keys)
+        self.steps = np.array([quantum(k) for k in self.keys])
+        self.table = {}
+        self.surrogate = surrogate
+        self.min_samples = min_samples or 2 * len(self.keys) + 1
+        self.keep_quantile = keep_quantile
+        self.ridge = ridge
+        self.samples = []  # (vector, fitness) of every real evaluation
+        self.model = None
+        self.hits = self.evaluations = self.screened = 0
+
+    def vector(self, params):
+        return np.array([params[k] for k in self.keys], dtype=np.float64)
+
+    def key(self, params):
+        return tuple(np.rint(self.vector(params) / self.steps).astype(np.int64).tolist())
+
+    def get(self, params, default=None):
+        """Cached fitness of a parameter set"""
+        return self.table.get(self.key(params), default)
+
+    def put(self, params, fitness):
+        """Record a real evaluation"""
+        self.table[self.key(params)] = fitness
+        self.samples.append((self.vector(params), fitness))
+        self.evaluations += 1
+        self.model = None
+
+    def _features(self, X):
+        z = (X - self.model['mean']) / self.model['scale']
+        return np.hstack([np.ones((len(z), 1)), z, z ** 2])
+
+    def predict(self, candidates):
+        """Surrogate fitness for a list of parameter sets (None until there is enough data)"""
+        if len(self.samples) < self.min_samples:
+            return None
+        if self.model is None:
+            X = np.array([x for x, _ in self.samples])
+            y = np.array([f for _, f in self.samples])
+            self.model = {'mean': X.mean(axis=0), 'scale': X.std(axis=0) + 1e-9}
+            F = self._features(X)
+            A = F.T @ F + self.ridge * len(F) * np.eye(F.shape[1])
+            self.model['coef'] = np.linalg.solve(A, F.T @ y)
+            self.model['threshold'] = np.quantile(y, self.keep_quantile)
+        return self._features(np.array([self.vector(c) for c in candidates])) @ self.model['coef']
+
+    def lookup(self, params):
+        """
+        Fitness usable without a window: the cached one, or the surrogate's prediction
+        for a candidate it screens out. None means the candidate needs a real evaluation.
+        """
+        fitness = self.get(params)
+        if fitness is not None:
+            self.hits += 1
+            return fitness
+        if self.surrogate:
+            predicted = self.predict([params])
+            if predicted is not None and predicted[0] > self.model['threshold']:
+                self.screened += 1
+                return float(predicted[0])
+        return None
+
+    def stats(self):
+        return {'evaluations': self.evaluations, 'cache_hits': self.hits, 'screened': self.screened}
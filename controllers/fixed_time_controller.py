@@ -1,25 +1,77 @@
 # ============================================================================
 # FIXED-TIME CONTROLLER (Baseline)
 # ============================================================================
+import numpy as np
+from controllers.phase_hold import PhaseHoldMixin
+from controllers.webster_plans import TimingPlans
 
-class FixedTimeController:
-    """Traditional fixed-time controller"""
-    
-    def __init__(self, num_intersections):
+# Lane flow (vehicles/step) assumed when no measured flows are given: mean of the simulator's rates
+DEFAULT_FLOW = 1.25
+
+
+class FixedTimeController(PhaseHoldMixin):
+    """
+    Traditional fixed-time controller. plans (TimingPlans) gives per-intersection,
+    time-of-day green times; the default is one 2-phase 42/42 plan everywhere.
+    Phases with zero green are skipped.
+    """
+
+    def __init__(self, num_intersections, plans=None):
         self.num_intersections = num_intersections
-        self.cycle_length = 90
-        self.phase_times = [42, 42, 0, 0]  # 2-phase system
+        self.plans = plans if plans is not None else TimingPlans.constant([42, 42, 0, 0], num_intersections)
+        self.phase_times = self.plans.greens[0].tolist()  # greens in effect, per intersection
+        self.clock = [0] * num_intersections  # ticks per intersection, for the plan period
         self.current_phases = [0] * num_intersections
         self.phase_timers = [0] * num_intersections
-        
-        print(f"Fixed-Time: Cycle={self.cycle_length}s, 2-phase")
-    
-    def get_actions(self, states):
+
+        if plans is None:
+            self.cycle_length = 90
+            print(f"Fixed-Time: Cycle={self.cycle_length}s, 2-phase")
+        else:
+            cycles = self.plans.cycle_lengths()
+            print(f"Fixed-Time: {self.plans.periods} plan period(s), cycles {cycles.min()}-{cycles.max()}s")
+
+    def get_actions(self, states, indices=None):
+        """One decision per row of states; indices maps rows to intersections (default: all)"""
+        if indices is None:
+            indices = range(len(states))
         actions = []
-        for i in range(self.num_intersections):
+        for i in indices:
+            self.clock[i] += 1
             self.phase_timers[i] += 1
-            if self.phase_timers[i] >= self.phase_times[self.current_phases[i]]:
-                self.current_phases[i] = (self.current_phases[i] + 1) % 2
-                self.phase_timers[i] = 0
+            if self.phase_timers[i] >= self.phase_times[i][self.current_phases[i]]:
+                self.next_phase(i)
             actions.append(self.current_phases[i])
-        return actions
\ No newline at end of file
+        return actions
+
+    def next_phase(self, i):
+        """Switch to the next phase with green time, picking up the current period's plan"""
+        greens = self.phase_times[i] = self.plans.greens[self.plans.period(self.clock[i]), i].tolist()
+        phase = (self.current_phases[i] + 1) % 4
+        while not greens[phase]:
+            phase = (phase + 1) % 4
+        self.current_phases[i] = phase
+        self.phase_timers[i] = 0
+
+    def decision_holds(self, indices):
+        """Upcoming calls guaranteed to keep the current phase, per intersection"""
+        return [max(0, self.phase_times[i][self.current_phases[i]] - 1 - self.phase_timers[i]) for i in indices]
+
+    def advance(self, indices, ticks):
+        """Phase timers, and the plan clock, move on through skipped calls"""
+        super().advance(indices, ticks)
+        for i, k in zip(indices, ticks):
+            self.clock[i] += int(k)
+
+
+class WebsterFixedTimeController(FixedTimeController):
+    """
+    Fixed-time with Webster-optimal cycles and splits computed per intersection from
+    lane flows: (N, 8) for an all-day plan, or (periods, N, 8) with period_steps for
+    a time-of-day table. The runner hands over the simulator's profiled flows.
+    """
+
+    def __init__(self, num_intersections, flows=None, period_steps=None):
+        if flows is None:
+            flows = np.full((num_intersections, 8), DEFAULT_FLOW)
+        super().__init__(num_intersections, TimingPlans.from_flows(flows, period_steps))
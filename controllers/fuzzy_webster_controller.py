@@ -2,51 +2,87 @@
 # FUZZY WEBSTER CONTROLLER
 # ============================================================================
 import numpy as np
+from .param_table import param_table
+from .phase_hold import PhaseHoldMixin
 
-class FuzzyWebsterController:
-    """Fuzzy Logic + Webster's Method"""
+# Search space of the GA/PSO/CMA-ES tuned variants: bounds, and the range initial candidates are drawn from
+PARAM_BOUNDS = {
+    'min_green': (5, 80), 'max_green': (5, 80), 'base_green': (5, 80),
+    'queue_low': (5, 30), 'queue_high': (5, 30),
+    'ext_high': (0.2, 3.0), 'ext_medium': (0.2, 3.0), 'ext_low': (0.2, 3.0)
+}
+PARAM_INIT = {
+    'min_green': (8, 15), 'max_green': (45, 70), 'base_green': (20, 35),
+    'queue_low': (8, 15), 'queue_high': (12, 20),
+    'ext_high': (1.5, 2.5), 'ext_medium': (0.8, 1.5), 'ext_low': (0.3, 0.8)
+}
+PARAM_KEYS = list(PARAM_BOUNDS)
+P = {key: j for j, key in enumerate(PARAM_KEYS)}  # Column of each parameter in a parameter table
+
+class FuzzyWebsterController(PhaseHoldMixin):
+    """
+    Fuzzy Logic + Webster's Method
+    params holds one row of parameters per intersection (columns: PARAM_KEYS);
+    a dict sets a parameter for every intersection.
+    """
     
     def __init__(self, num_intersections, params=None):
         self.num_intersections = num_intersections
-        self.params = params if params else {
+        self.params = param_table({
             'min_green': 10, 'max_green': 60, 'base_green': 25,
             'queue_low': 10, 'queue_high': 15,
             'ext_high': 2.0, 'ext_medium': 1.0, 'ext_low': 0.5
-        }
+        }, PARAM_KEYS, num_intersections)
+        self.set_params(params)
         self.current_phases = [0] * num_intersections
         self.phase_timers = [0] * num_intersections
         
-        print(f"Fuzzy Webster: base_green={self.params['base_green']:.0f}s")
+        print(f"Fuzzy Webster: base_green={self.params[:, P['base_green']].mean():.0f}s")
+    
+    def set_params(self, params):
+        """Dict (one value, or one per intersection, per key) or (N, dim) array"""
+        self.params = param_table(params, PARAM_KEYS, self.num_intersections, self.params)
     
-    def fuzzify_queue(self, q):
-        low = max(0, 1 - q / self.params['queue_low'])
-        medium = max(0, min((q - 5) / 10, (25 - q) / 10))
-        high = max(0, (q - self.params['queue_high']) / 20)
+    def fuzzify_queue(self, q, p):
+        """Memberships of queues q, one parameter row of p per row of q"""
+        low = np.maximum(0, 1 - q / p[:, P['queue_low']])
+        medium = np.maximum(0, np.minimum((q - 5) / 10, (25 - q) / 10))
+        high = np.maximum(0, (q - p[:, P['queue_high']]) / 20)
         return {'low': low, 'medium': medium, 'high': high}
     
-    def calculate_green_time(self, state, phase):
-        lanes = [phase * 2, phase * 2 + 1]
-        queues = [state[i] if i < len(state) else 0 for i in lanes]
-        avg_queue = np.mean(queues)
+    def calculate_green_time(self, states, phases, indices):
+        """Green time of each row's phase, with that intersection's parameters"""
+        p = self.params[indices]
+        lanes = 2 * np.asarray(phases)[:, None] + np.arange(2)
+        avg_queue = np.take_along_axis(np.asarray(states, dtype=np.float64), lanes, axis=1).mean(axis=1)
         
-        qf = self.fuzzify_queue(avg_queue)
-        extension = qf['high'] * self.params['ext_high'] + qf['medium'] * self.params['ext_medium'] + qf['low'] * self.params['ext_low']
+        qf = self.fuzzify_queue(avg_queue, p)
+        extension = qf['high'] * p[:, P['ext_high']] + qf['medium'] * p[:, P['ext_medium']] + qf['low'] * p[:, P['ext_low']]
         
-        green = self.params['base_green'] * (1 + extension * 0.8)
-        return np.clip(green, self.params['min_green'], self.params['max_green'])
+        green = p[:, P['base_green']] * (1 + extension * 0.8)
+        return np.clip(green, p[:, P['min_green']], p[:, P['max_green']])
     
-    def get_actions(self, states):
+    def get_actions(self, states, indices=None):
+        """One decision per row of states; indices maps rows to intersections (default: all)"""
+        if indices is None:
+            indices = range(len(states))
+        base_green = self.params[:, P['base_green']].tolist()
         actions = []
-        for i, state in enumerate(states):
+        for i, state in zip(indices, states):
             self.phase_timers[i] += 1
             if self.phase_timers[i] == 0:
-                green_time = self.calculate_green_time(state, self.current_phases[i])
+                green_time = self.calculate_green_time([state], [self.current_phases[i]], [i])[0]
             else:
-                green_time = self.params['base_green']
+                green_time = base_green[i]
             
             if self.phase_timers[i] >= green_time:
                 self.current_phases[i] = (self.current_phases[i] + 1) % 4
                 self.phase_timers[i] = 0
             
             actions.append(self.current_phases[i])
-        return actions
\ No newline at end of file
+        return actions
+
+    def decision_holds(self, indices):
+        """Upcoming calls guaranteed to keep the current phase (base green still running)"""
+        green = np.ceil(self.params[:, P['base_green']]).astype(int).tolist()
+        return [max(0, green[i] - 1 - self.phase_timers[i]) for i in indices]
\ No newline at end of file
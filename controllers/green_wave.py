@@ -0,0 +1,162 @@
+# ============================================================================
+# GREEN-WAVE OFFSET OPTIMIZER (arterial coordination)
+# ============================================================================
+import json
+import numpy as np
+from pathlib import Path
+
+DEFAULT_STORE = Path('models') / 'green_wave.json'
+# Steps a platoon needs between neighbouring signals
+DEFAULT_TRAVEL_TIME = 10
+# Share of the cycle given to the coordinated (through) phase
+DEFAULT_GREEN_SHARE = 0.25
+CYCLE_CANDIDATES = list(range(60, 121, 10))
+# Common cycle of the fallback plan used when no corridor plan is stored
+DEFAULT_CYCLE = 90
+# Signal-generations of mutation search per refined cycle; long corridors get fewer generations
+SEARCH_BUDGET = 9000
+
+
+class GreenWavePlan:
+    """Common cycle and per-signal offsets (green start of the coordinated phase) for one corridor"""
+
+    def __init__(self, cycle, offsets, delay=None, stops=None):
+        self.cycle = int(cycle)
+        self.offsets = np.asarray(offsets, dtype=np.int64) % self.cycle
+        self.delay = delay  # mean wait of a platoon crossing the corridor, both directions
+        self.stops = stops
+
+    def to_dict(self):
+        return {'cycle': self.cycle, 'offsets': self.offsets.tolist(), 'delay': self.delay, 'stops': self.stops}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['cycle'], d['offsets'], d.get('delay'), d.get('stops'))
+
+
+def platoon_delays(offsets, cycle, greens, travel_times):
+    """
+    Bandwidth model for a batch of offset vectors (B, n): one platoon departs at every
+    step of the cycle from each end of the corridor, waits at every red until the
+    coordinated green starts, and moves on. Returns (mean wait, mean stops) per
+    candidate, averaged over departure times and both directions. greens (n,) and
+    travel_times (n - 1,) may carry a leading batch axis to differ per candidate.
+    """
+    offsets = np.atleast_2d(offsets)
+    batch, n = offsets.shape
+    greens = np.broadcast_to(greens, (batch, n))
+    travel_times = np.broadcast_to(travel_times, (batch, n - 1))
+    # Both directions advance together: row 0 runs signals 0..n-1, row 1 runs n-1..0
+    offsets = np.stack([offsets, offsets[:, ::-1]])
+    greens = np.stack([greens, greens[:, ::-1]])
+    links = np.stack([travel_times, travel_times[:, ::-1]])
+    departures = np.tile(np.arange(cycle, dtype=np.int64), (2, batch, 1))
+    t = departures.copy()
+    stops = np.zeros(t.shape, dtype=np.int64)
+    for k in range(n):
+        if k:
+            t += links[:, :, k - 1, None]
+        into_cycle = (t - offsets[:, :, k, None]) % cycle
+        red = into_cycle >= greens[:, :, k, None]
+        t += (cycle - into_cycle) * red
+        stops += red
+    waits = t - departures - travel_times.sum(axis=1)[:, None]
+    return waits.mean(axis=(0, 2)), stops.mean(axis=(0, 2))
+
+
+def _pairwise_offsets(cycle, greens, travel_times):
+    """Offsets chaining, link by link, the relative offset that is best for that pair of signals alone"""
+    # A link's best relative offset depends only on its two greens and travel time mod cycle
+    links, inverse = np.unique(np.column_stack([greens[:-1], greens[1:], travel_times % cycle]),
+                               axis=0, return_inverse=True)
+    # Every (distinct link, relative offset) pair is a two-signal corridor in one batch
+    relative = np.column_stack([np.zeros(len(links) * cycle, dtype=np.int64), np.tile(np.arange(cycle), len(links))])
+    pairs = np.repeat(links, cycle, axis=0)
+    waits, _ = platoon_delays(relative, cycle, pairs[:, :2], pairs[:, 2:])
+    steps = waits.reshape(len(links), cycle).argmin(axis=1)[inverse.ravel()]
+    return np.concatenate([[0], np.cumsum(steps)])
+
+
+def _start_offsets(cycle, greens, travel_times):
+    """Best of the structured starting points for one cycle: (offsets, delay, stops)"""
+    n = len(greens)
+    arrival = np.concatenate([[0], np.cumsum(travel_times)])
+    starts = np.stack([
+        arrival,                                      # outbound progression
+        -arrival,                                     # inbound progression
+        np.rint(arrival / (cycle / 2)) * (cycle // 2),  # simultaneous / alternate signals
+        _pairwise_offsets(cycle, greens, travel_times),
+        np.zeros(n),
+    ]).astype(np.int64) % cycle
+    delays, stops = platoon_delays(starts, cycle, greens, travel_times)
+    best = int(np.argmin(delays))
+    return starts[best], delays[best], stops[best]
+
+
+def _search_offsets(cycle, greens, offsets, delay, stop, travel_times, generations, batch, rng):
+    """Improve one cycle's offsets with batched block-shift mutations"""
+    n = len(greens)
+    for _ in range(generations):
+        # Shifting every offset from signal j onward keeps the progression upstream of j intact
+        candidates = np.tile(offsets, (batch, 1))
+        first = rng.integers(0, n, size=batch)
+        last = np.where(rng.random(batch) < 0.5, n, rng.integers(0, n, size=batch) + 1)
+        shift = rng.integers(1, cycle, size=batch)
+        cols = np.arange(n)
+        mask = (cols >= np.minimum(first, last - 1)[:, None]) & (cols < np.maximum(first + 1, last)[:, None])
+        candidates = (candidates + mask * shift[:, None]) % cycle
+        delays, stops = platoon_delays(candidates, cycle, greens, travel_times)
+        best = int(np.argmin(delays))
+        if delays[best] < delay:
+            offsets, delay, stop = candidates[best], delays[best], stops[best]
+    return offsets, delay, stop
+
+
+def optimize_offsets(num_signals, travel_times=DEFAULT_TRAVEL_TIME, green_share=DEFAULT_GREEN_SHARE,
+                     cycles=CYCLE_CANDIDATES, generations=None, batch=32, refine=2, seed=0):
+    """
+    Search the common cycle and offsets minimizing two-way platoon delay on a corridor.
+    Every cycle is screened on its structured starts; the `refine` best are searched further.
+    travel_times: scalar or (num_signals - 1,) link times; green_share: scalar or per signal.
+    """
+    rng = np.random.default_rng(seed)
+    if generations is None:
+        generations = min(30, SEARCH_BUDGET // max(num_signals, 1))
+    travel_times = np.broadcast_to(np.asarray(travel_times, dtype=np.int64), (max(num_signals - 1, 0),))
+    screened = []
+    for cycle in cycles:
+        greens = np.maximum(1, np.rint(np.broadcast_to(green_share, (num_signals,)) * cycle)).astype(np.int64)
+        screened.append((cycle, greens, *_start_offsets(cycle, greens, travel_times)))
+    screened.sort(key=lambda c: c[3])
+
+    best = None
+    for cycle, greens, offsets, delay, stops in screened[:refine]:
+        offsets, delay, stops = _search_offsets(cycle, greens, offsets, delay, stops, travel_times,
+                                                generations, batch, rng)
+        if best is None or delay < best.delay:
+            best = GreenWavePlan(cycle, offsets, float(delay), float(stops))
+    return best
+
+
+def progression_plan(num_signals, travel_times=DEFAULT_TRAVEL_TIME, cycle=DEFAULT_CYCLE):
+    """One-way (outbound) progression: each green starts as the platoon arrives. No search"""
+    travel_times = np.broadcast_to(np.asarray(travel_times, dtype=np.int64), (max(num_signals - 1, 0),))
+    return GreenWavePlan(cycle, np.concatenate([[0], np.cumsum(travel_times)]))
+
+
+def save_plan(corridor, plan, path=DEFAULT_STORE):
+    """Store a corridor's plan in the JSON plan store (one entry per corridor)"""
+    path = Path(path)
+    store = json.loads(path.read_text()) if path.exists() else {}
+    store[corridor] = plan.to_dict()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(store, indent=2))
+
+
+def load_plan(corridor, path=DEFAULT_STORE):
+    """The stored plan for a corridor, or None"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    entry = json.loads(path.read_text()).get(corridor)
+    return GreenWavePlan.from_dict(entry) if entry else None
@@ -2,8 +2,9 @@
 # LONGEST-QUEUE-FIRST CONTROLLER (Simple Adaptive)
 # ============================================================================
 import numpy as np
+from .phase_hold import PhaseHoldMixin
 
-class LongestQueueFirstController:
+class LongestQueueFirstController(PhaseHoldMixin):
     """Select phase serving the longest queue"""
     
     def __init__(self, num_intersections):
@@ -14,9 +15,12 @@ class LongestQueueFirstController:
         
         print("Longest-Queue-First: Greedy queue-based selection")
     
-    def get_actions(self, states):
+    def get_actions(self, states, indices=None):
+        """One decision per row of states; indices maps rows to intersections (default: all)"""
+        if indices is None:
+            indices = range(len(states))
         actions = []
-        for i, state in enumerate(states):
+        for i, state in zip(indices, states):
             self.phase_timers[i] += 1
             
             if self.phase_timers[i] < self.min_green:
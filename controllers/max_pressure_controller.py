@@ -3,17 +3,18 @@
 # MAX-PRESSURE CONTROLLER (Proven Heuristic)
 # ============================================================================
 import numpy as np
+from .phase_hold import PhaseHoldMixin
 
-class MaxPressureController:
+class MaxPressureController(PhaseHoldMixin):
     """
     Max-Pressure: Proven to be optimal in many scenarios
     Selects phase that maximizes pressure (incoming - outgoing queue)
     """
     
-    def __init__(self, num_intersections):
+    def __init__(self, num_intersections, min_green=10, max_green=60):
         self.num_intersections = num_intersections
-        self.min_green = 10
-        self.max_green = 60
+        self.min_green = min_green
+        self.max_green = max_green
         self.current_phases = [0] * num_intersections
         self.phase_timers = [0] * num_intersections
         
@@ -30,9 +31,12 @@ class MaxPressureController:
         
         return incoming - outgoing * 0.5
     
-    def get_actions(self, states):
+    def get_actions(self, states, indices=None):
+        """One decision per row of states; indices maps rows to intersections (default: all)"""
+        if indices is None:
+            indices = range(len(states))
         actions = []
-        for i, state in enumerate(states):
+        for i, state in zip(indices, states):
             self.phase_timers[i] += 1
             
             # Minimum green time check
@@ -44,6 +48,11 @@ class MaxPressureController:
             pressures = [self.calculate_pressure(state, p) for p in range(4)]
             best_phase = np.argmax(pressures)
             
+            # Max green: force the best competing phase once the current one has run out
+            if best_phase == self.current_phases[i] and self.phase_timers[i] >= self.max_green:
+                pressures[best_phase] = -np.inf
+                best_phase = np.argmax(pressures)
+            
             # Switch if better phase and not recently switched
             if best_phase != self.current_phases[i] and self.phase_timers[i] >= self.min_green:
                 self.current_phases[i] = best_phase
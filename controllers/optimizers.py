@@ -0,0 +1,376 @@
+# ============================================================================
+# PARAMETER OPTIMIZERS (pluggable ask/tell backends: GA, PSO, CMA-ES)
+# ============================================================================
+import numpy as np
+from .fitness_cache import FitnessCache
+
+# Generations bred in one ask() without a candidate worth a window before the best is rerun
+MAX_IDLE_GENERATIONS = 10
+
+
+class ParameterOptimizer:
+    """
+    Ask/tell interface for controller parameter search. A backend keeps a population
+    (one parameter vector per row) and breeds the next one from its scores.
+    Online: ask() gives the parameters to run for the next window, tell() its fitness;
+    candidates already evaluated, or screened out by the surrogate, are scored
+    without a window. Offline: record() real evaluations, then breed(scores).
+    space / init: {name: (low, high)} bounds / initial sampling range.
+    groups: run that many independent searches (e.g. one per intersection) as one
+    (size, groups, dim) population; ask() then gives a (groups, dim) array and
+    tell() takes one fitness per group.
+    """
+
+    def __init__(self, space, rng, init=None, surrogate=False, groups=None):
+        init = init or space
+        self.keys = list(space)
+        self.low = np.array([space[k][0] for k in self.keys], dtype=np.float64)
+        self.high = np.array([space[k][1] for k in self.keys], dtype=np.float64)
+        self.init_low = np.clip([init[k][0] for k in self.keys], self.low, self.high)
+        self.init_high = np.clip([init[k][1] for k in self.keys], self.low, self.high)
+        self.rng = rng
+        self.groups = groups
+        self.fitness_caches = [FitnessCache(self.keys, surrogate) for _ in range(groups or 1)]
+        self.fitness_cache = self.fitness_caches[0]
+        self.best_vectors = np.zeros((groups or 1, len(self.keys)))
+        self.best_scores = np.full(groups or 1, np.inf)
+        self.generation = 0
+        self.population = self.initial_population().reshape(self.shape(-1))
+        self.scores = np.full(self.population.shape[:-1], np.nan)
+        self.cursor = 0
+        self.pending = None  # population row awaiting its fitness (-1: the best, rerun)
+        self.rerun_best = False  # Next ask() reruns the best (a resumed search)
+
+    def initial_population(self):
+        raise NotImplementedError
+
+    def next_population(self, scores):
+        """Next (size, groups, dim) population from (size, groups) scores"""
+        raise NotImplementedError
+
+    def shape(self, size):
+        """Population shape: (size, dim), or (size, groups, dim)"""
+        return (size, self.groups, len(self.keys)) if self.groups else (size, len(self.keys))
+
+    def grouped(self):
+        """The population as (size, groups, dim), groups = 1 without groups (a view)"""
+        return self.population.reshape(len(self.population), -1, len(self.keys))
+
+    def to_params(self, x):
+        return {k: float(v) for k, v in zip(self.keys, np.clip(x, self.low, self.high))}
+
+    def to_vector(self, params):
+        return np.array([params[k] for k in self.keys], dtype=np.float64)
+
+    def candidate(self, x):
+        """What ask() hands out for a population row"""
+        return np.clip(x, self.low, self.high) if self.groups else self.to_params(x)
+
+    def rows(self, params):
+        """(groups, dim) vectors of a parameter dict (shared by every group) or a per-group array"""
+        x = self.to_vector(params) if isinstance(params, dict) else np.asarray(params, dtype=np.float64)
+        return np.broadcast_to(x, (len(self.best_scores), len(self.keys)))
+
+    def seed(self, params):
+        """Evaluate known-good parameters first"""
+        self.population[0] = self.rows(params).reshape(self.population.shape[1:])
+
+    @property
+    def best_fitness(self):
+        return self.best_scores.copy() if self.groups else float(self.best_scores[0])
+
+    def best(self):
+        found = np.isfinite(self.best_scores)[:, None]
+        best = np.where(found, self.best_vectors, self.grouped()[0])
+        return self.candidate(best if self.groups else best[0])
+
+    def state(self):
+        """
+        JSON-ready search state: parameter keys, best vector(s) and their fitness,
+        the population with its scores so far (None: not scored yet) and the cursor
+        """
+        found = np.isfinite(self.best_scores)[:, None]
+        best = np.where(found, self.best_vectors, self.grouped()[0])
+        return {'keys': self.keys, 'best': (best if self.groups else best[0]).tolist(),
+                'best_scores': _json_scores(self.best_scores), 'population': self.population.tolist(),
+                'scores': _json_scores(self.scores), 'cursor': self.cursor, 'generation': self.generation}
+
+    def restore(self, state):
+        """
+        Resume a search from state(): the stored best runs first, then the search
+        carries on where it stopped. Without a population (learned parameters only),
+        a fresh search starts with the stored best as its first candidate.
+        """
+        best = np.asarray(state['best'], dtype=np.float64)
+        if state['keys'] != self.keys or best.shape != self.population.shape[1:]:
+            raise ValueError(f"Stored search state does not match this optimizer ({best.shape} vs "
+                             f"{self.population.shape[1:]})")
+        if 'population' not in state:
+            self.seed(best)
+            return
+        population = np.asarray(state['population'], dtype=np.float64)
+        if population.shape != self.population.shape:
+            raise ValueError(f"Stored population {population.shape} does not match {self.population.shape}")
+        self.population = population
+        self.scores = np.asarray(state['scores'], dtype=np.float64)  # None -> nan: not scored yet
+        self.cursor = state['cursor']
+        self.generation = state['generation']
+        self.best_vectors = self.rows(best).copy()
+        best_scores = np.asarray(state['best_scores'], dtype=np.float64).reshape(self.best_scores.shape)
+        self.best_scores = np.where(np.isnan(best_scores), np.inf, best_scores)
+        self.rerun_best = True
+
+    def record(self, params, fitness):
+        """A real evaluation (one fitness per group); True if it is the best so far (in any group)"""
+        rows = self.rows(params)
+        fitness = np.broadcast_to(np.asarray(fitness, dtype=np.float64), self.best_scores.shape)
+        for cache, x, f in zip(self.fitness_caches, rows, fitness):
+            cache.put(self.to_params(x), float(f))
+        improved = fitness < self.best_scores
+        self.best_scores[improved] = fitness[improved]
+        self.best_vectors[improved] = rows[improved]
+        return bool(improved.any())
+
+    def lookup(self, x):
+        """Fitness of population row x per group without a window, or None if any group needs one"""
+        known = []
+        for cache, row in zip(self.fitness_caches, x.reshape(-1, len(self.keys))):
+            fitness = cache.lookup(self.to_params(row))
+            if fitness is None:
+                return None
+            known.append(fitness)
+        return np.array(known).reshape(x.shape[:-1])
+
+    def breed(self, scores):
+        scores = np.asarray(scores, dtype=np.float64).reshape(len(self.population), -1)
+        self.population = self.next_population(scores).reshape(self.population.shape)
+        self.scores = np.full(self.population.shape[:-1], np.nan)
+        self.cursor = 0
+        self.generation += 1
+
+    def ask(self):
+        """Parameters for the next evaluation window"""
+        if self.rerun_best:
+            self.rerun_best = False
+            if np.isfinite(self.best_scores).all():
+                self.pending = -1
+                return self.best()
+        bred = 0
+        while True:
+            if self.cursor == len(self.population):
+                self.breed(self.scores)
+                bred += 1
+                if bred > MAX_IDLE_GENERATIONS and np.isfinite(self.best_scores).all():
+                    self.pending = -1
+                    return self.best()
+            fitness = self.lookup(self.population[self.cursor])
+            if fitness is None:
+                self.pending = self.cursor
+                return self.candidate(self.population[self.cursor])
+            self.scores[self.cursor] = fitness
+            self.cursor += 1
+
+    def tell(self, fitness):
+        """Fitness of the parameters from the last ask(); True if they are the best so far"""
+        if self.pending is None:
+            return False
+        if self.pending < 0:
+            params = self.best()
+        else:
+            params = self.candidate(self.population[self.pending])
+            self.scores[self.pending] = fitness
+            self.cursor += 1
+        self.pending = None
+        return self.record(params, fitness)
+
+    def _uniform(self, size):
+        return self.rng.uniform(self.init_low, self.init_high, size=self.shape(size))
+
+    def _pairs(self, rows, n, k):
+        """k distinct indices < n for each of rows draws (per group)"""
+        return self.rng.random((rows, len(self.best_scores), n)).argsort(axis=2)[..., :k]
+
+
+class GeneticOptimizer(ParameterOptimizer):
+    """Tournament selection, single-point crossover, Gaussian mutation, elitism"""
+
+    def __init__(self, space, rng, init=None, surrogate=False, groups=None, size=15, mutation_rate=0.15,
+                 crossover_rate=0.7, mutation_scale=2.0, tournament=3):
+        self.size = size
+        self.mutation_rate = mutation_rate
+        self.crossover_rate = crossover_rate
+        self.mutation_scale = mutation_scale
+        self.tournament = tournament
+        super().__init__(space, rng, init, surrogate, groups)
+
+    def initial_population(self):
+        return self._uniform(self.size)
+
+    def next_population(self, scores):
+        population = self.grouped()
+        n, g, dim = population.shape
+        group = np.arange(g)
+        contenders = self._pairs(n, n, self.tournament)
+        winners = np.take_along_axis(contenders, np.argmin(scores[contenders, group[:, None]], axis=2)[..., None],
+                                     axis=2)[..., 0]
+        selected = population[winners, group]
+
+        parents = self._pairs(n - 1, n, 2)
+        points = self.rng.integers(1, dim, size=(n - 1, g))
+        crossed = (self.rng.random((n - 1, g)) < self.crossover_rate)[..., None] & (np.arange(dim) >= points[..., None])
+        children = np.where(crossed, selected[parents[..., 1], group], selected[parents[..., 0], group])
+        mutated = self.rng.random(children.shape) < self.mutation_rate
+        children = children + mutated * self.rng.standard_normal(children.shape) * self.mutation_scale
+        found = np.isfinite(self.best_scores)[:, None]
+        elite = np.where(found, self.best_vectors, population[np.argmin(scores, axis=0), group])
+        return np.concatenate([elite[None], np.clip(children, self.low, self.high)])
+
+
+class ParticleSwarmOptimizer(ParameterOptimizer):
+    """Synchronous PSO: the swarm moves once every particle has a score"""
+
+    def __init__(self, space, rng, init=None, surrogate=False, groups=None, size=10, w=0.5, c1=2.0, c2=2.0,
+                 w_decay=1.0, w_min=0.0, velocity_scale=0.1):
+        self.size = size
+        self.w, self.c1, self.c2 = w, c1, c2
+        self.w_decay, self.w_min = w_decay, w_min
+        self.velocity_scale = velocity_scale
+        super().__init__(space, rng, init, surrogate, groups)
+
+    def initial_population(self):
+        particles = self._uniform(self.size).reshape(self.size, -1, len(self.keys))
+        self.velocities = self.rng.standard_normal(particles.shape) * self.velocity_scale
+        self.personal_best = particles.copy()
+        self.personal_best_scores = np.full(particles.shape[:2], np.inf)
+        return particles
+
+    def next_population(self, scores):
+        population = self.grouped()
+        improved = scores < self.personal_best_scores
+        self.personal_best[improved] = population[improved]
+        self.personal_best_scores[improved] = scores[improved]
+        global_best = self.personal_best[np.argmin(self.personal_best_scores, axis=0), np.arange(population.shape[1])]
+
+        self.w = max(self.w_min, self.w * self.w_decay)
+        r1, r2 = self.rng.random((2, *population.shape))
+        self.velocities = (self.w * self.velocities + self.c1 * r1 * (self.personal_best - population)
+                           + self.c2 * r2 * (global_best - population))
+        return np.clip(population + self.velocities, self.low, self.high)
+
+    def state(self):
+        return {**super().state(), 'velocities': self.velocities.tolist(), 'personal_best': self.personal_best.tolist(),
+                'personal_best_scores': _json_scores(self.personal_best_scores), 'w': self.w}
+
+    def restore(self, state):
+        super().restore(state)
+        if 'velocities' in state:
+            self.velocities = np.asarray(state['velocities'], dtype=np.float64).reshape(self.velocities.shape)
+            self.personal_best = np.asarray(state['personal_best'], dtype=np.float64).reshape(self.personal_best.shape)
+            scores = np.asarray(state['personal_best_scores'], dtype=np.float64).reshape(self.personal_best_scores.shape)
+            self.personal_best_scores = np.where(np.isnan(scores), np.inf, scores)
+            self.w = state['w']
+
+
+class CMAESOptimizer(ParameterOptimizer):
+    """
+    (mu/mu_w, lambda)-CMA-ES in bound-normalized [0, 1] coordinates. Each generation's
+    lambda candidates are sampled as one array; mean, step size and covariance
+    (rank-one + rank-mu) are updated with NumPy, one batched eigendecomposition per
+    generation (one distribution per group).
+    """
+
+    def __init__(self, space, rng, init=None, surrogate=False, groups=None, size=None, sigma=0.3):
+        self.size = size
+        self.sigma0 = sigma
+        super().__init__(space, rng, init, surrogate, groups)
+
+    def initial_population(self):
+        n, g = len(self.keys), len(self.best_scores)
+        self.size = self.size or 4 + int(3 * np.log(n))
+        self.mu = self.size // 2
+        weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mueff = 1 / np.sum(self.weights ** 2)
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0, np.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.mean = np.tile(self._normalize((self.init_low + self.init_high) / 2), (g, 1))
+        self.sigma = np.full(g, self.sigma0)
+        self.C = np.tile(np.eye(n), (g, 1, 1))
+        self.B = self.C.copy()
+        self.D = np.ones((g, n))
+        self.pc = np.zeros((g, n))
+        self.ps = np.zeros((g, n))
+        return self._sample()
+
+    def _normalize(self, x):
+        return (x - self.low) / (self.high - self.low)
+
+    def _sample(self):
+        """(size, groups, dim) candidates: mean + sigma * B D z per group"""
+        z = self.rng.standard_normal((self.size, len(self.mean), len(self.keys)))
+        steps = np.matmul((z * self.D).transpose(1, 0, 2), self.B.transpose(0, 2, 1)).transpose(1, 0, 2)
+        u = np.clip(self.mean + self.sigma[:, None] * steps, 0, 1)
+        return self.low + u * (self.high - self.low)
+
+    def seed(self, params):
+        """Centre the search distribution on known-good parameters and evaluate them first"""
+        self.mean = self._normalize(self.rows(params)).copy()
+        self.population = self._sample().reshape(self.population.shape)
+        super().seed(params)
+
+    def state(self):
+        return {**super().state(), 'mean': self.mean.tolist(), 'sigma': self.sigma.tolist(), 'C': self.C.tolist(),
+                'pc': self.pc.tolist(), 'ps': self.ps.tolist()}
+
+    def restore(self, state):
+        if 'mean' in state:
+            self.mean, self.sigma, self.C, self.pc, self.ps = (
+                np.asarray(state[k], dtype=np.float64).reshape(getattr(self, k).shape)
+                for k in ('mean', 'sigma', 'C', 'pc', 'ps'))
+            eigenvalues, self.B = np.linalg.eigh(self.C)
+            self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        super().restore(state)
+
+    def next_population(self, scores):
+        n = len(self.keys)
+        population = self.grouped()
+        group = np.arange(population.shape[1])
+        selected = self._normalize(population[np.argsort(scores, axis=0)[:self.mu], group])
+        old_mean = self.mean
+        self.mean = np.tensordot(self.weights, selected, axes=1)
+        steps = (selected - old_mean) / self.sigma[:, None]
+        step = np.tensordot(self.weights, steps, axes=1)
+
+        inv_sqrt_c = (self.B / self.D[:, None, :]) @ self.B.transpose(0, 2, 1)
+        self.ps = (1 - self.cs) * self.ps + np.sqrt(self.cs * (2 - self.cs) * self.mueff) * (inv_sqrt_c @ step[..., None])[..., 0]
+        hsig = (np.linalg.norm(self.ps, axis=1) / np.sqrt(1 - (1 - self.cs) ** (2 * (self.generation + 1)))
+                < (1.4 + 2 / (n + 1)) * self.chi_n)
+        self.pc = (1 - self.cc) * self.pc + hsig[:, None] * np.sqrt(self.cc * (2 - self.cc) * self.mueff) * step
+
+        rank_one = (self.pc[:, :, None] * self.pc[:, None, :]
+                    + ((1 - hsig) * self.cc * (2 - self.cc))[:, None, None] * self.C)
+        rank_mu = np.einsum('m,mgi,mgj->gij', self.weights, steps, steps)
+        self.C = (1 - self.c1 - self.cmu) * self.C + self.c1 * rank_one + self.cmu * rank_mu
+        self.sigma = self.sigma * np.exp((self.cs / self.damps) * (np.linalg.norm(self.ps, axis=1) / self.chi_n - 1))
+
+        self.C = (self.C + self.C.transpose(0, 2, 1)) / 2
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        return self._sample()
+
+
+def _json_scores(scores):
+    """Scores as nested lists, with None for unscored (nan) or unbeaten (inf) entries"""
+    return np.where(np.isfinite(scores), scores, None).tolist()
+
+
+OPTIMIZERS = {'ga': GeneticOptimizer, 'pso': ParticleSwarmOptimizer, 'cmaes': CMAESOptimizer}
+
+
+def make_optimizer(name, space, rng, init=None, surrogate=False, groups=None, **options):
+    return OPTIMIZERS[name](space, rng, init, surrogate, groups, **options)
@@ -0,0 +1,25 @@
+# ============================================================================
+# PER-INTERSECTION PARAMETER TABLES
+# ============================================================================
+import numpy as np
+
+
+def param_table(params, keys, n, table=None):
+    """
+    (n, len(keys)) array with one parameter row per intersection. params is a dict
+    (one value, or n values, per key; missing keys keep table's) or an (n, dim) array.
+    """
+    table = np.zeros((n, len(keys))) if table is None else np.array(table, dtype=np.float64)
+    if isinstance(params, dict):
+        for j, key in enumerate(keys):
+            if key in params:
+                table[:, j] = params[key]
+    elif params is not None:
+        table[:] = params
+    return table
+
+
+def table_params(table, keys):
+    """{key: value} of a parameter table; a list of per-intersection values where rows differ"""
+    return {key: float(column[0]) if np.all(column == column[0]) else column.tolist()
+            for key, column in zip(keys, np.asarray(table).T)}
@@ -0,0 +1,22 @@
+# ============================================================================
+# PHASE-HOLD HOOKS (event-driven scheduling / fast-forward support)
+# ============================================================================
+
+
+class PhaseHoldMixin:
+    """
+    decision_holds()/advance() for controllers with per-intersection phase_timers
+    and a min_green hold. A DecisionScheduler skips calls while the phase is held
+    and catches the timers up with advance() before asking again. Controllers whose
+    hold is not min_green override decision_holds(); those with more per-intersection
+    counters than phase_timers extend advance().
+    """
+
+    def decision_holds(self, indices):
+        """Upcoming calls guaranteed to keep the current phase (min green still running)"""
+        return [max(0, self.min_green - 1 - self.phase_timers[i]) for i in indices]
+
+    def advance(self, indices, ticks):
+        """Account for calls the scheduler skipped while the phase was held"""
+        for i, k in zip(indices, ticks):
+            self.phase_timers[i] += int(k)
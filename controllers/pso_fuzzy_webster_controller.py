@@ -1,106 +1,75 @@
 # ============================================================================
 # PSO-OPTIMIZED FUZZY WEBSTER (Particle Swarm Optimization)
 # ============================================================================
-from .fuzzy_webster_controller import FuzzyWebsterController
+from .fuzzy_webster_controller import PARAM_BOUNDS, PARAM_INIT, PARAM_KEYS, FuzzyWebsterController
+from .optimizers import make_optimizer
+from .param_table import param_table, table_params
+from random_streams import component_rng
 import numpy as np
-import random
 
 class PSOFuzzyWebsterController:
     """
     Particle Swarm Optimization for Fuzzy Webster parameters
-    Continuously optimizes membership functions and green times
+    Continuously optimizes membership functions and green times.
+    Each evaluation window runs one particle; positions already evaluated (or, with
+    surrogate=True, predicted to be poor) are scored without a window.
+    per_intersection=True runs one search per intersection (scored on its own queues),
+    all advanced together as one array.
+    optimizer swaps the search backend ('pso', 'ga' or 'cmaes').
+    warm_start: the 'optimizer' part of a stored get_learned_state() to resume from.
     """
     
-    def __init__(self, num_intersections):
+    def __init__(self, num_intersections, rng=None, surrogate=False, optimizer='pso',
+                 per_intersection=False, warm_start=None):
         self.num_intersections = num_intersections
+        self.rng = component_rng(rng)
         self.base_controller = FuzzyWebsterController(num_intersections)
         
-        # PSO parameters
-        self.num_particles = 10
-        self.particles = self._init_particles()
-        self.velocities = [{k: np.random.randn() * 0.1 for k in self.particles[0]} for _ in range(self.num_particles)]
-        self.personal_best = [p.copy() for p in self.particles]
-        self.personal_best_scores = [float('inf')] * self.num_particles
-        self.global_best = self.particles[0].copy()
-        self.global_best_score = float('inf')
-        
-        # PSO hyperparameters - AGGRESSIVE!
-        self.w = 0.5  # Lower inertia = more exploration
-        self.c1 = 2.0  # Higher cognitive = trust personal best
-        self.c2 = 2.0  # Higher social = converge to global best
+        # PSO parameters (10 particles; w=0.5, c1=c2=2.0 by default) - AGGRESSIVE!
+        self.optimizer = make_optimizer(optimizer, PARAM_BOUNDS, self.rng, PARAM_INIT, surrogate,
+                                        num_intersections if per_intersection else None)
+        if warm_start:
+            self.optimizer.restore(warm_start)
         
         self.performance_window = []
         self.optimization_interval = 200
         self.step_count = 0
         
+        self.base_controller.set_params(self.optimizer.ask())
+        
         print("🔥 PSO-Fuzzy-Webster: Particle Swarm Optimizing parameters!")
     
-    def _init_particles(self):
-        """Initialize particle swarm"""
-        particles = []
-        for _ in range(self.num_particles):
-            particle = {
-                'min_green': np.random.uniform(8, 15),
-                'max_green': np.random.uniform(45, 70),
-                'base_green': np.random.uniform(20, 35),
-                'queue_low': np.random.uniform(8, 15),
-                'queue_high': np.random.uniform(12, 20),
-                'ext_high': np.random.uniform(1.5, 2.5),
-                'ext_medium': np.random.uniform(0.8, 1.5),
-                'ext_low': np.random.uniform(0.3, 0.8)
-            }
-            particles.append(particle)
-        return particles
-    
     def update_swarm(self, current_score):
-        """Update PSO swarm based on performance"""
-        # Update personal best
-        for i in range(self.num_particles):
-            if current_score < self.personal_best_scores[i]:
-                self.personal_best_scores[i] = current_score
-                self.personal_best[i] = self.particles[i].copy()
-        
-        # Update global best
-        if current_score < self.global_best_score:
-            self.global_best_score = current_score
-            self.global_best = self.particles[np.argmin(self.personal_best_scores)].copy()
-            print(f"  🌟 PSO found better params! Score: {current_score:.2f}")
-        
-        # Update particles
-        for i in range(self.num_particles):
-            for key in self.particles[i]:
-                r1, r2 = np.random.rand(), np.random.rand()
-                
-                # Update velocity
-                cognitive = self.c1 * r1 * (self.personal_best[i][key] - self.particles[i][key])
-                social = self.c2 * r2 * (self.global_best[key] - self.particles[i][key])
-                self.velocities[i][key] = self.w * self.velocities[i][key] + cognitive + social
-                
-                # Update position
-                self.particles[i][key] += self.velocities[i][key]
-                
-                # Clip to valid range
-                if 'green' in key:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 5, 80)
-                elif 'ext' in key:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 0.2, 3.0)
-                else:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 5, 30)
-        
-        # Use global best for controller
-        self.base_controller.params = self.global_best.copy()
+        """Score the particle that ran this window and deploy the next candidate"""
+        if self.optimizer.tell(current_score):
+            print(f"  🌟 PSO found better params! Score: {np.mean(current_score):.2f}")
+        self.base_controller.set_params(self.optimizer.ask())
     
-    def get_actions(self, states):
+    def get_actions(self, states, indices=None):
         self.step_count += 1
         
         # Update swarm periodically
         if self.step_count % self.optimization_interval == 0 and len(self.performance_window) > 0:
-            avg_queue = np.mean(self.performance_window)
+            if self.optimizer.groups:
+                avg_queue = np.nanmean(self.performance_window, axis=0)
+            else:
+                avg_queue = np.mean(self.performance_window)
             self.update_swarm(avg_queue)
             self.performance_window = []
         
         # Track performance
-        total_queue = np.sum([np.sum(s) for s in states])
+        if self.optimizer.groups:
+            total_queue = np.full(self.num_intersections, np.nan)
+            total_queue[slice(None) if indices is None else indices] = np.sum(states, axis=1)
+        else:
+            total_queue = np.sum(states)
         self.performance_window.append(total_queue)
         
-        return self.base_controller.get_actions(states)
\ No newline at end of file
+        return self.base_controller.get_actions(states, indices)
+    
+    def get_learned_params(self):
+        return table_params(param_table(self.optimizer.best(), PARAM_KEYS, self.num_intersections), PARAM_KEYS)
+    
+    def get_learned_state(self):
+        """Learned parameters plus the search state, for the warm-start store"""
+        return {'params': self.get_learned_params(), 'optimizer': self.optimizer.state()}
\ No newline at end of file
@@ -0,0 +1,78 @@
+# ============================================================================
+# Q-LEARNING CONTROLLER (Tabular Reinforcement Learning)
+# ============================================================================
+import numpy as np
+from pathlib import Path
+
+DEFAULT_WEIGHTS = Path('models') / 'q_learning.npz'
+# Per-phase queue (sum of its 2 lanes, capped at 120) bin edges; 7 bins ^ 4 phases = 2401 states
+QUEUE_BINS = np.array([6, 15, 30, 50, 75, 100], dtype=np.float32)
+
+
+def encode_states(states, bins=QUEUE_BINS):
+    """Discretize (N, 8) lane queues into one table row per intersection"""
+    phase_queues = np.asarray(states, dtype=np.float32).reshape(-1, 4, 2).sum(axis=2)
+    digits = np.digitize(phase_queues, bins)
+    return digits @ ((len(bins) + 1) ** np.arange(4))
+
+
+def num_states(bins=QUEUE_BINS):
+    return (len(bins) + 1) ** 4
+
+
+def save_q_table(path, q_table, bins=QUEUE_BINS, **meta):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, q_table=q_table.astype(np.float32), bins=bins,
+                        **{k: np.asarray(v) for k, v in meta.items()})
+
+
+def load_q_table(path):
+    """(q_table, bins, meta) from a file written by save_q_table"""
+    with np.load(path) as data:
+        meta = {k: data[k].item() for k in data.files if k not in ('q_table', 'bins')}
+        return data['q_table'], data['bins'], meta
+
+
+class QLearningController:
+    """
+    Tabular Q-Learning over discretized per-phase queues:
+    - Q-table (states x 4 phases) trained offline on a batched ensemble of
+      simulated worlds (python train_rl.py), stored as a compact float32 .npz
+    - Deployment is greedy: one table lookup per intersection
+    """
+
+    def __init__(self, num_intersections, weights=DEFAULT_WEIGHTS, min_green=1):
+        self.num_intersections = num_intersections
+        self.min_green = min_green
+        self.current_phases = [0] * num_intersections
+        self.phase_timers = [0] * num_intersections
+
+        if not Path(weights).exists():
+            raise FileNotFoundError(f"No Q-table at {weights}; train one with: python train_rl.py --out {weights}")
+        self.q_table, self.bins, self.meta = load_q_table(weights)
+
+        print(f"🤖 Q-Learning: {self.q_table.shape[0]} states x {self.q_table.shape[1]} phases "
+              f"({self.meta.get('env_steps', 0):,} training steps)")
+
+    @staticmethod
+    def cache_inputs(controller_kwargs):
+        """Data files read at construction (part of the result-cache key)"""
+        return [controller_kwargs.get('weights', DEFAULT_WEIGHTS)]
+
+    def greedy_phases(self, states):
+        return np.argmax(self.q_table[encode_states(states, self.bins)], axis=1)
+
+    def get_actions(self, states, indices=None):
+        """One decision per row of states; indices maps rows to intersections (default: all)"""
+        if indices is None:
+            indices = range(len(states))
+        best = self.greedy_phases(states)
+        actions = []
+        for i, phase in zip(indices, best.tolist()):
+            self.phase_timers[i] += 1
+            if phase != self.current_phases[i] and self.phase_timers[i] >= self.min_green:
+                self.current_phases[i] = phase
+                self.phase_timers[i] = 0
+            actions.append(self.current_phases[i])
+        return actions
@@ -1,9 +1,10 @@
 import numpy as np
+from .phase_hold import PhaseHoldMixin
 # ============================================================================
 # SUPER-MAX-PRESSURE CONTROLLER (Enhanced Max-Pressure!)
 # ============================================================================
 
-class SuperMaxPressureController:
+class SuperMaxPressureController(PhaseHoldMixin):
     """
     ENHANCED Max-Pressure with:
     - Variable min green times based on queue
@@ -11,8 +12,10 @@ class SuperMaxPressureController:
     - Pressure momentum tracking
     """
     
-    def __init__(self, num_intersections):
+    def __init__(self, num_intersections, switch_ratio=1.15, max_green=25):
         self.num_intersections = num_intersections
+        self.switch_ratio = switch_ratio  # Required pressure advantage to switch
+        self.max_green = max_green
         self.current_phases = [0] * num_intersections
         self.phase_timers = [0] * num_intersections
         self.pressure_history = [[] for _ in range(num_intersections)]
@@ -45,9 +48,12 @@ class SuperMaxPressureController:
         else:
             return 8
     
-    def get_actions(self, states):
+    def get_actions(self, states, indices=None):
+        """One decision per row of states; indices maps rows to intersections (default: all)"""
+        if indices is None:
+            indices = range(len(states))
         actions = []
-        for i, state in enumerate(states):
+        for i, state in zip(indices, states):
             self.phase_timers[i] += 1
             
             # Adaptive minimum green time
@@ -73,9 +79,9 @@ class SuperMaxPressureController:
             # Switch criteria: better phase AND (min time met OR pressure dropping)
             should_switch = False
             if best_phase != self.current_phases[i]:
-                if best_pressure > current_pressure * 1.15:  # 15% better
+                if best_pressure > current_pressure * self.switch_ratio:  # 15% better by default
                     should_switch = True
-                elif self.phase_timers[i] >= 25:  # Max green time
+                elif self.phase_timers[i] >= self.max_green:  # Max green time
                     should_switch = True
                 elif len(self.pressure_history[i]) >= 3:
                     # Pressure momentum check
@@ -87,4 +93,8 @@ class SuperMaxPressureController:
                 self.phase_timers[i] = 0
             
             actions.append(self.current_phases[i])
-        return actions
\ No newline at end of file
+        return actions
+
+    def decision_holds(self, indices):
+        """Upcoming calls guaranteed to keep the current phase (adaptive min green is at least 8)"""
+        return [max(0, 8 - 1 - self.phase_timers[i]) for i in indices]
\ No newline at end of file
@@ -1,27 +1,60 @@
 import numpy as np
+from random_streams import component_rng
+from controllers.green_wave import DEFAULT_STORE, load_plan, progression_plan
+from controllers.optimizers import make_optimizer
+from controllers.param_table import param_table, table_params
 # ============================================================================
 # ULTIMATE HYBRID CONTROLLER (THE BEAST!)
 # ============================================================================
 
+# Search bounds for the optimized parameters
+PARAM_BOUNDS = {
+    'min_green': (5, 60), 'max_green': (5, 60), 'base_green': (5, 60),
+    'queue_low': (5, 25), 'queue_high': (5, 25),
+    'ext_high': (0.2, 2.5), 'ext_medium': (0.2, 2.5), 'ext_low': (0.2, 2.5),
+    'webster_mult': (1.0, 2.0), 'webster_const': (2, 10),
+    'pressure_weight': (0.2, 0.9), 'fuzzy_weight': (0.2, 0.9),
+}
+PARAM_KEYS = list(PARAM_BOUNDS)
+P = {key: j for j, key in enumerate(PARAM_KEYS)}  # Column of each parameter in a parameter table
+
+# Lanes served by each phase, and the phase whose two lanes its max-pressure discounts
+PHASE_LANES = np.array([[0, 1], [2, 3], [4, 5], [6, 7]])
+OTHER_PHASE = np.array([1, 0, 0, 0])
+# Phase the green-wave plan coordinates (its offsets are this phase's green start)
+COORDINATED_PHASE = 0
+# Steps after its offset in which an intersection may still start the coordinated green
+COORDINATION_WINDOW = 5
+
 
 class UltimateHybridController:
     """
     THE ULTIMATE CONTROLLER - Combines ALL techniques!
     
     Architecture:
-    1. PSO optimizes Fuzzy-Webster parameters globally
+    1. PSO (or another optimizer backend) tunes Fuzzy-Webster parameters globally
     2. Fuzzy logic determines base green times
     3. Max-pressure influences phase selection
     4. Multi-intersection coordination (green wave)
     5. Adaptive learning from performance
     6. Hybrid decision fusion
+    
+    params holds one row of parameters per intersection (columns: PARAM_KEYS), and
+    phases are scored for all intersections at once. per_intersection=True tunes
+    each row with its own search (scored on that intersection's queues).
+    warm_start (a stored get_learned_state()['optimizer']) resumes an earlier search.
+    Parameters overridden through params= are pinned and left out of the search.
     """
     
-    def __init__(self, num_intersections):
+    def __init__(self, num_intersections, params=None, rng=None, green_wave=None, surrogate=False,
+                 optimizer='pso', per_intersection=False,
+                 warm_start=None):
         self.num_intersections = num_intersections
+        self.rng = component_rng(rng)
+        self.param_overrides = self._check_overrides(params or {})
         
         # Core parameters (optimized by PSO) - TUNED TO DOMINATE!
-        self.params = {
+        self.params = param_table({
             'min_green': 8.0,   # Lower min = more responsive
             'max_green': 50.0,  # Lower max = faster switching
             'base_green': 20.0,  # Shorter base = more adaptive
@@ -34,36 +67,50 @@ class UltimateHybridController:
             'webster_const': 4.0,
             'pressure_weight': 0.6,  # TRUST PRESSURE MORE! (like Max-Pressure)
             'fuzzy_weight': 0.4      # Less fuzzy weight
-        }
+        }, PARAM_KEYS, num_intersections)
+        self.set_params(self.param_overrides)
         
-        # PSO for parameter optimization - AGGRESSIVE SWARM!
-        self.num_particles = 12  # More particles = better exploration
-        self.particles = self._init_particles()
-        self.velocities = [{k: np.random.randn() * 0.1 for k in self.particles[0]} for _ in range(self.num_particles)]
-        self.personal_best = [p.copy() for p in self.particles]
-        self.personal_best_scores = [float('inf')] * self.num_particles
-        self.global_best = self._init_best_guess()  # Start with educated guess!
-        self.global_best_score = float('inf')
+        # PSO for parameter optimization - AGGRESSIVE SWARM! Particles start around the
+        # educated guess, which is evaluated first; known or (surrogate) poor positions are skipped
+        best_guess = self._init_best_guess()
+        self.search_keys = [k for k in PARAM_KEYS if k not in self.param_overrides]
+        if not self.search_keys:
+            raise ValueError("Every parameter is overridden, nothing is left to optimize")
+        space = {k: PARAM_BOUNDS[k] for k in self.search_keys}
+        spread = {k: 5.0 if 'green' in k else 0.15 if 'weight' in k else 0.75 for k in self.search_keys}
+        init = {k: (best_guess[k] - spread[k], best_guess[k] + spread[k]) for k in self.search_keys}
+        # More particles = better exploration; inertia decays 0.99 per swarm move, down to 0.4
+        options = {'size': 12, 'w_decay': 0.99, 'w_min': 0.4} if optimizer == 'pso' else {}
+        self.optimizer = make_optimizer(optimizer, space, self.rng, init, surrogate,
+                                        num_intersections if per_intersection else None, **options)
+        self.optimizer.seed(best_guess)
+        if warm_start:
+            self.optimizer.restore(warm_start)
         
         # State tracking
-        self.current_phases = [0] * num_intersections
-        self.phase_timers = [0] * num_intersections
+        self.current_phases = np.zeros(num_intersections, dtype=int)
+        self.phase_timers = np.zeros(num_intersections, dtype=int)
         self.performance_history = []
         self.step_count = 0
         
-        # PSO hyperparameters
-        self.w = 0.5  # Inertia weight
-        self.c1 = 2.0  # Cognitive
-        self.c2 = 2.0  # Social
+        self.set_params(self.searched(self.optimizer.ask()))
         
-        # Coordination state (for green wave)
-        self.coordination_offset = [0, 5, 10, 15]  # Phase offsets for arterial coordination
+        # Coordination state (for green wave): a GreenWavePlan, else the stored plan for
+        # this corridor (optimize_offsets.py), else a plain outbound progression
+        plan = green_wave or load_plan(f'corridor_{num_intersections}') or progression_plan(num_intersections)
+        self.coordination_offset = plan.offsets  # Coordinated green start per intersection
+        self.coordination_cycle = plan.cycle
         
         print("💎 ULTIMATE HYBRID: PSO + Fuzzy + Webster + Max-Pressure + Coordination!")
     
+    @staticmethod
+    def cache_inputs(controller_kwargs):
+        """Data files read at construction (part of the result-cache key)"""
+        return [] if controller_kwargs.get('green_wave') else [DEFAULT_STORE]
+    
     def _init_best_guess(self):
         """Initialize with educated guess based on Max-Pressure success"""
-        return {
+        best = {
             'min_green': 8.0,
             'max_green': 45.0,
             'base_green': 18.0,  # Shorter like Max-Pressure
@@ -77,220 +124,191 @@ class UltimateHybridController:
             'pressure_weight': 0.65,  # Heavy pressure bias!
             'fuzzy_weight': 0.35
         }
+        best.update(self.param_overrides)
+        return best
     
-    def _init_particles(self):
-        """Initialize PSO particles around best guess"""
-        particles = []
-        best = self._init_best_guess()
-        
-        for _ in range(self.num_particles):
-            particle = {}
-            for key, val in best.items():
-                # Add noise around best guess
-                if 'green' in key:
-                    particle[key] = val + np.random.randn() * 3
-                    particle[key] = np.clip(particle[key], 5, 70)
-                elif 'weight' in key:
-                    particle[key] = val + np.random.randn() * 0.1
-                    particle[key] = np.clip(particle[key], 0.2, 0.8)
-                else:
-                    particle[key] = val + np.random.randn() * 0.5
-                    particle[key] = np.clip(particle[key], 0.2, 3.0)
-            particles.append(particle)
-        return particles
+    @staticmethod
+    def _check_overrides(params):
+        """Parameter overrides, rejected unless every value lies within PARAM_BOUNDS"""
+        for key, value in params.items():
+            if key not in PARAM_BOUNDS:
+                raise ValueError(f"Unknown parameter '{key}' (expected one of {PARAM_KEYS})")
+            low, high = PARAM_BOUNDS[key]
+            if not np.all((low <= np.asarray(value)) & (np.asarray(value) <= high)):
+                raise ValueError(f"{key}={value} outside its bounds [{low}, {high}]")
+        return dict(params)
     
-    def fuzzify_queue(self, q):
-        """Fuzzy membership functions"""
-        low = max(0, 1 - q / self.params['queue_low'])
-        medium = max(0, min((q - self.params['queue_low']/2) / self.params['queue_low'], 
-                           (self.params['queue_high']*1.5 - q) / self.params['queue_low']))
-        high = max(0, (q - self.params['queue_high']) / (self.params['queue_high'] * 1.3))
+    def searched(self, candidate):
+        """Parameter dict of an optimizer candidate (a dict, or a (N, searched dim) array)"""
+        if isinstance(candidate, dict):
+            return candidate
+        return dict(zip(self.search_keys, np.asarray(candidate).T))
+    
+    def set_params(self, params):
+        """Dict (one value, or one per intersection, per key) or (N, dim) array"""
+        self.params = param_table(params, PARAM_KEYS, self.num_intersections, self.params)
+    
+    def fuzzify_queue(self, q, p):
+        """Fuzzy membership functions (p: parameter rows broadcasting against q)"""
+        queue_low, queue_high = p[..., P['queue_low']], p[..., P['queue_high']]
+        low = np.maximum(0, 1 - q / queue_low)
+        medium = np.maximum(0, np.minimum((q - queue_low/2) / queue_low,
+                                          (queue_high*1.5 - q) / queue_low))
+        high = np.maximum(0, (q - queue_high) / (queue_high * 1.3))
         return {'low': low, 'medium': medium, 'high': high}
     
-    def fuzzy_inference(self, queue_fuzzy):
+    def fuzzy_inference(self, queue_fuzzy, p):
         """5-rule fuzzy inference system"""
-        rule1 = queue_fuzzy['high'] * self.params['ext_high']
-        rule2 = queue_fuzzy['medium'] * self.params['ext_medium']
-        rule3 = queue_fuzzy['low'] * self.params['ext_low']
-        return max(rule1, rule2, rule3)
+        rule1 = queue_fuzzy['high'] * p[..., P['ext_high']]
+        rule2 = queue_fuzzy['medium'] * p[..., P['ext_medium']]
+        rule3 = queue_fuzzy['low'] * p[..., P['ext_low']]
+        return np.maximum(np.maximum(rule1, rule2), rule3)
     
-    def webster_cycle(self, flows):
-        """Webster's optimal cycle formula"""
+    def webster_cycle(self, flows, p):
+        """Webster's optimal cycle formula (flows: lane flows on the last axis)"""
         L = 10
         saturation = 2.0
-        Y = min(0.9, sum([min(f / saturation, 0.9) for f in flows]))
-        cycle = (self.params['webster_mult'] * L + self.params['webster_const']) / (1 - Y)
-        return np.clip(cycle, 40, 120)
+        Y = np.minimum(0.9, np.minimum(flows / saturation, 0.9).sum(axis=-1))
+        cycle = (p[..., P['webster_mult']] * L + p[..., P['webster_const']]) / (1 - Y)
+        return np.minimum(np.maximum(cycle, 40), 120)
     
-    def calculate_pressure(self, state, phase):
-        """Max-pressure calculation"""
-        lanes = [phase * 2, phase * 2 + 1]
-        incoming = sum([state[i] if i < len(state) else 0 for i in lanes])
-        other_lanes = [i for i in range(len(state)) if i not in lanes]
-        outgoing = sum([state[i] if i < len(state) else 0 for i in other_lanes[:2]])
-        return incoming - outgoing * 0.5
+    def calculate_pressure(self, phase_queues):
+        """Max-pressure of every phase (columns) from the queues on each phase's lanes"""
+        return phase_queues - phase_queues[:, OTHER_PHASE] * 0.5
     
-    def calculate_fuzzy_green_time(self, state, phase):
-        """Calculate green time using fuzzy logic + Webster"""
-        lanes = [phase * 2, phase * 2 + 1]
-        queues = [state[i] if i < len(state) else 0 for i in lanes]
-        avg_queue = np.mean(queues)
+    def calculate_fuzzy_green_time(self, queues, p):
+        """Green time of every phase using fuzzy logic + Webster (queues: (rows, phase, lane))"""
+        p = p[:, None, :]
+        avg_queue = queues.sum(axis=2) / 2
         
         # Fuzzy inference
-        qf = self.fuzzify_queue(avg_queue)
-        extension = self.fuzzy_inference(qf)
+        qf = self.fuzzify_queue(avg_queue, p)
+        extension = self.fuzzy_inference(qf, p)
         
         # Base green time
-        green = self.params['base_green'] * (1 + extension * 0.8)
+        green = p[..., P['base_green']] * (1 + extension * 0.8)
         
         # Webster adjustment
-        flows = [max(1, q * 0.1) for q in queues]
-        webster_cycle = self.webster_cycle(flows)
+        flows = np.maximum(1, queues * 0.1)
+        webster_cycle = self.webster_cycle(flows, p)
         green = green * (webster_cycle / 80)
         
-        return np.clip(green, self.params['min_green'], self.params['max_green'])
+        return np.minimum(np.maximum(green, p[..., P['min_green']]), p[..., P['max_green']])
+    
+    def phase_scores(self, states, indices):
+        """Hybrid score of every phase (columns) for each row, with its intersection's parameters"""
+        p = self.params[indices]
+        queues = states[:, PHASE_LANES]
+        phase_queue = queues.sum(axis=2)
+        
+        # Fuzzy-Webster score (normalized to 0-1)
+        fuzzy_score = self.calculate_fuzzy_green_time(queues, p) / 50.0  # Normalize
+        
+        # Max-pressure score (can be negative), normalized to 0-1 range
+        pressure_norm = np.minimum(np.maximum((self.calculate_pressure(phase_queue) + 30) / 60.0, 0), 1)  # Shift and scale
+        
+        # Queue urgency boost (exponential for high queues)
+        urgency = (phase_queue / 50.0) ** 1.5  # Exponential urgency
+        
+        # TRIPLE combination with urgency boost
+        return (p[:, None, P['fuzzy_weight']] * fuzzy_score +
+                p[:, None, P['pressure_weight']] * pressure_norm +
+                0.3 * urgency)  # Add urgency component
     
-    def hybrid_phase_selection(self, state, current_phase, timer):
+    def hybrid_phase_selection(self, states, current_phases, timers, indices):
         """
         AGGRESSIVE HYBRID decision: Combines fuzzy, pressure, and urgency
+        (one row per intersection in indices)
         """
-        min_green = max(8, int(self.params['min_green']))
-        
-        if timer < min_green:  # Minimum green
-            return current_phase
+        p = self.params[indices]
+        min_green = np.maximum(8, p[:, P['min_green']].astype(int))
         
-        # Calculate scores for each phase
-        phase_scores = []
-        for phase in range(4):
-            # Fuzzy-Webster score (normalized to 0-1)
-            green_time = self.calculate_fuzzy_green_time(state, phase)
-            fuzzy_score = green_time / 50.0  # Normalize
-            
-            # Max-pressure score (can be negative)
-            pressure_score = self.calculate_pressure(state, phase)
-            # Normalize pressure to 0-1 range
-            pressure_norm = (pressure_score + 30) / 60.0  # Shift and scale
-            pressure_norm = np.clip(pressure_norm, 0, 1)
-            
-            # Queue urgency boost (exponential for high queues)
-            lanes = [phase * 2, phase * 2 + 1]
-            phase_queue = sum([state[i] if i < len(state) else 0 for i in lanes])
-            urgency = (phase_queue / 50.0) ** 1.5  # Exponential urgency
-            
-            # TRIPLE combination with urgency boost
-            combined_score = (
-                self.params['fuzzy_weight'] * fuzzy_score + 
-                self.params['pressure_weight'] * pressure_norm +
-                0.3 * urgency  # Add urgency component
-            )
-            
-            phase_scores.append(combined_score)
+        # Minimum green: only intersections past it are scored
+        due = np.flatnonzero(timers >= min_green)
+        if len(due) == 0:
+            return current_phases
+        indices, current, timers = indices[due], current_phases[due], timers[due]
         
         # Select best phase
-        best_phase = np.argmax(phase_scores)
+        phase_scores = self.phase_scores(states[due], indices)
+        best_phase = np.argmax(phase_scores, axis=1)
+        rows = np.arange(len(due))
         
-        # AGGRESSIVE switching: Switch if better OR if max green exceeded
-        max_green = int(self.params['max_green'])
-        if best_phase != current_phase:
-            # Switch if significantly better OR max time reached
-            if phase_scores[best_phase] > phase_scores[current_phase] * 1.1 or timer >= max_green:
-                return best_phase
-        
-        return current_phase
+        # AGGRESSIVE switching: Switch if significantly better OR if max green exceeded
+        max_green = self.params[indices, P['max_green']].astype(int)
+        switch = (best_phase != current) & ((phase_scores[rows, best_phase] > phase_scores[rows, current] * 1.1) |
+                                           (timers >= max_green))
+        new_phases = current_phases.copy()
+        new_phases[due] = np.where(switch, best_phase, current)
+        return new_phases
     
-    def coordinate_intersections(self, states, actions):
+    def coordinate_intersections(self, states, actions, indices, timers):
         """
-        SMART multi-intersection coordination
+        SMART multi-intersection coordination: the coordinated green starts at each
+        intersection's offset in the common cycle, at its first decision (min green
+        served) within COORDINATION_WINDOW steps of it.
         Only coordinates if it doesn't harm local performance
         """
-        coordinated_actions = actions.copy()
-        
-        # Arterial coordination with pressure check
-        for i in range(1, self.num_intersections):
-            offset_step = (self.step_count + self.coordination_offset[i]) % 90
-            
-            if offset_step < 5 and self.phase_timers[i] > 12:
-                # Consider coordination
-                upstream_phase = actions[i - 1]
-                current_pressure = self.calculate_pressure(states[i], actions[i])
-                upstream_pressure = self.calculate_pressure(states[i], upstream_phase)
-                
-                # Only coordinate if not significantly worse
-                if upstream_pressure >= current_pressure * 0.8:  # Within 20%
-                    coordinated_actions[i] = upstream_phase
+        offset_step = (self.step_count - self.coordination_offset[indices % len(self.coordination_offset)]) \
+            % self.coordination_cycle
+        min_green = np.maximum(8, self.params[indices, P['min_green']].astype(int))
+        rows = np.flatnonzero((offset_step < COORDINATION_WINDOW) & (actions != COORDINATED_PHASE) &
+                              (timers >= min_green))
+        if len(rows) == 0:
+            return actions
         
-        return coordinated_actions
+        # Pressure check: only coordinate if not significantly worse (within 20%)
+        pressure = self.calculate_pressure(states[rows][:, PHASE_LANES].sum(axis=2))
+        current = pressure[np.arange(len(rows)), actions[rows]]
+        coordinated = actions.copy()
+        coordinated[rows[pressure[:, COORDINATED_PHASE] >= current * 0.8]] = COORDINATED_PHASE
+        return coordinated
     
     def pso_update(self, avg_performance):
-        """AGGRESSIVE PSO swarm update"""
-        # Update personal/global best for ALL particles
-        particle_idx = (self.step_count // 100) % self.num_particles
-        
-        if avg_performance < self.personal_best_scores[particle_idx]:
-            self.personal_best_scores[particle_idx] = avg_performance
-            self.personal_best[particle_idx] = self.particles[particle_idx].copy()
-        
-        if avg_performance < self.global_best_score:
-            self.global_best_score = avg_performance
-            self.global_best = self.particles[particle_idx].copy()
-            # IMMEDIATELY apply best params!
-            self.params = self.global_best.copy()
-            print(f"  ⚡ PSO: New best = {avg_performance:.1f} (Queue reduction!)")
-        
-        # Update ALL particles velocities (not just one)
-        w_decay = 0.99  # Inertia decay
-        self.w = max(0.4, self.w * w_decay)
-        
-        for i in range(self.num_particles):
-            for key in self.particles[i]:
-                r1, r2 = np.random.rand(), np.random.rand()
-                cognitive = self.c1 * r1 * (self.personal_best[i][key] - self.particles[i][key])
-                social = self.c2 * r2 * (self.global_best[key] - self.particles[i][key])
-                self.velocities[i][key] = self.w * self.velocities[i][key] + cognitive + social
-                self.particles[i][key] += self.velocities[i][key]
-                
-                # Constrain to valid ranges
-                if 'green' in key:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 5, 60)
-                elif 'weight' in key:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 0.2, 0.9)
-                elif 'ext' in key:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 0.2, 2.5)
-                else:
-                    self.particles[i][key] = np.clip(self.particles[i][key], 5, 25)
+        """Score the particle that ran this window and deploy the next candidate"""
+        if self.optimizer.tell(avg_performance):
+            print(f"  ⚡ PSO: New best = {np.mean(avg_performance):.1f} (Queue reduction!)")
+        self.set_params(self.searched(self.optimizer.ask()))
     
-    def get_actions(self, states):
-        """ULTIMATE hybrid action selection"""
+    def get_actions(self, states, indices=None):
+        """ULTIMATE hybrid action selection (rows of states map to indices, default: all)"""
         self.step_count += 1
         
         # PSO optimization every 100 steps (MORE AGGRESSIVE!)
         if self.step_count % 100 == 0 and len(self.performance_history) > 5:
-            avg_perf = np.mean(self.performance_history[-20:])  # Larger window for stability
+            # Larger window for stability
+            if self.optimizer.groups:
+                avg_perf = np.nanmean(self.performance_history[-20:], axis=0)
+            else:
+                avg_perf = np.mean(self.performance_history[-20:])
             self.pso_update(avg_perf)
         
-        # Track performance
-        total_queue = np.sum([np.sum(s) for s in states])
+        # Track performance (per intersection when each one has its own search)
+        rows = np.arange(len(states)) if indices is None else np.asarray(indices)
+        if self.optimizer.groups:
+            total_queue = np.full(self.num_intersections, np.nan)
+            total_queue[rows] = np.sum(states, axis=1)
+        else:
+            total_queue = np.sum(states)
         self.performance_history.append(total_queue)
         
-        # Hybrid phase selection for each intersection
-        actions = []
-        for i, state in enumerate(states):
-            self.phase_timers[i] += 1
-            
-            # Hybrid decision
-            new_phase = self.hybrid_phase_selection(state, self.current_phases[i], self.phase_timers[i])
-            
-            if new_phase != self.current_phases[i]:
-                self.current_phases[i] = new_phase
-                self.phase_timers[i] = 0
-            
-            actions.append(self.current_phases[i])
+        # Hybrid phase selection for all intersections at once
+        states = np.asarray(states, dtype=np.float64)
+        timers = self.phase_timers[rows] + 1
+        new_phases = self.hybrid_phase_selection(states, self.current_phases[rows], timers, rows)
         
         # Apply network coordination
-        actions = self.coordinate_intersections(states, actions)
-        
-        return actions
+        new_phases = self.coordinate_intersections(states, new_phases, rows, timers)
+        self.phase_timers[rows] = np.where(new_phases != self.current_phases[rows], 0, timers)
+        self.current_phases[rows] = new_phases
+        return new_phases.tolist()
     
     def get_learned_params(self):
         """Return optimized parameters"""
-        return self.global_best.copy()
\ No newline at end of file
+        best = param_table(self.searched(self.optimizer.best()), PARAM_KEYS, self.num_intersections)
+        return table_params(param_table(self.param_overrides, PARAM_KEYS, self.num_intersections, best),
+                            PARAM_KEYS)
+    
+    def get_learned_state(self):
+        """Learned parameters plus the search state, for the warm-start store"""
+        return {'params': self.get_learned_params(), 'optimizer': self.optimizer.state()}
\ No newline at end of file
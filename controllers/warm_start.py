@@ -0,0 +1,30 @@
+# ============================================================================
+# WARM-START STORE (learned parameters + search state per scenario)
+# ============================================================================
+import json
+from pathlib import Path
+
+DEFAULT_STORE = Path('models') / 'warm_start.json'
+
+
+def scenario_key(controller, seed, optimizer=None, per_intersection=False):
+    """Store key: the controller, its traffic seed and the options that shape its search state"""
+    layout = 'per-intersection' if per_intersection else 'global'
+    return f"{controller}/seed{seed}/{optimizer or 'default'}/{layout}"
+
+
+def save_state(key, state, path=DEFAULT_STORE):
+    """Store a controller's learned state (get_learned_state()) under a scenario key"""
+    path = Path(path)
+    store = json.loads(path.read_text()) if path.exists() else {}
+    store[key] = state
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(store, default=float))
+
+
+def load_state(key, path=DEFAULT_STORE):
+    """The stored state for a scenario key, or None"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text()).get(key)
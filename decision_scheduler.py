@@ -0,0 +1,116 @@
+# ============================================================================
+# EVENT-DRIVEN DECISION SCHEDULER (timer wheel)
+# ============================================================================
+import numpy as np
+
+
+class DecisionScheduler:
+    """
+    Asks the controller only about intersections whose decision can change this step.
+
+    Controllers that implement decision_holds(indices) report how many upcoming calls
+    are guaranteed to keep the current phase (e.g. min-green still running). Those
+    intersections sit in a timer wheel; their timers are caught up with
+    advance(indices, ticks) just before they are asked again, so the actions are
+    identical to calling every step. Controllers without decision_holds are asked
+    about every intersection on every step.
+
+    With wake_threshold set, an intersection that was asked and kept its phase is
+    also parked until its total queue moves by more than the threshold (or
+    park_steps pass). This is an approximation and trades exactness for fewer calls.
+    """
+
+    def __init__(self, controller, num_intersections, wheel_size=64, wake_threshold=None, park_steps=10):
+        self.controller = controller
+        self.num_intersections = num_intersections
+        self.enabled = hasattr(controller, 'decision_holds')
+        self.wheel_size = wheel_size
+        self.wake_threshold = wake_threshold
+        self.park_steps = park_steps
+
+        # Wheel slot -> arrays of intersections due then; entries superseded by an early wake are
+        # filtered out against due_at when the slot fires
+        self.slots = [[] for _ in range(wheel_size)]
+        self.slots[0] = [np.arange(num_intersections)]
+        self.due_at = np.zeros(num_intersections, dtype=np.int64)
+        self.last_call = np.full(num_intersections, -1, dtype=np.int64)
+        self.parked = np.zeros(num_intersections, dtype=bool)
+        self.decided_totals = np.zeros(num_intersections)
+        self.actions = np.zeros(num_intersections, dtype=np.int64)
+        self.step = 0
+
+        self.decisions = 0
+        self.skipped = 0
+        self.early_wakes = 0
+
+    def _schedule(self, indices, delays):
+        delays = np.clip(delays, 1, self.wheel_size)
+        self.due_at[indices] = self.step + delays
+        for delay in np.unique(delays).tolist():
+            self.slots[(self.step + delay) % self.wheel_size].append(indices[delays == delay])
+
+    def get_actions(self, states):
+        if not self.enabled:
+            self.decisions += self.num_intersections
+            return self.controller.get_actions(states)
+
+        t = self.step
+        slot = t % self.wheel_size
+        fired = self.slots[slot]
+        self.slots[slot] = []
+        due = np.concatenate(fired) if fired else np.empty(0, dtype=np.int64)
+        due = due[self.due_at[due] == t]
+
+        totals = None
+        if self.wake_threshold is not None:
+            totals = np.sum(states, axis=1)
+            moved = self.parked & (np.abs(totals - self.decided_totals) > self.wake_threshold)
+            woken = np.flatnonzero(moved & (self.due_at > t))
+            self.early_wakes += len(woken)
+            due = np.concatenate([due, woken])
+        due = np.unique(due)
+
+        if len(due):
+            self.controller.advance(due, t - self.last_call[due] - 1)
+            previous = self.actions[due]
+            self.actions[due] = self.controller.get_actions(states[due], due)
+            self.last_call[due] = t
+
+            delays = np.asarray(self.controller.decision_holds(due), dtype=np.int64) + 1
+            if self.wake_threshold is not None:
+                kept = (self.actions[due] == previous) & (delays == 1)
+                self.parked[due] = kept
+                delays[kept] = self.park_steps
+                self.decided_totals[due] = totals[due]
+            self._schedule(due, delays)
+
+        self.decisions += len(due)
+        self.skipped += self.num_intersections - len(due)
+        self.step += 1
+        return self.actions
+
+    def hold_steps(self):
+        """
+        Steps, counted from the one just decided, that the current actions are
+        guaranteed to hold network-wide: a simulator can run them in one step_many()
+        """
+        if not self.enabled or self.wake_threshold is not None:
+            return 1
+        return int(self.due_at.min()) - self.step + 1
+
+    def fast_forward(self, steps):
+        """Account for `steps` get_actions() calls skipped inside a hold (nothing was due)"""
+        self.step += steps
+        self.skipped += self.num_intersections * steps
+
+    def flush(self):
+        """Catch skipped timers up so the controller's state matches the current step"""
+        if self.enabled and self.step:
+            behind = np.flatnonzero(self.last_call < self.step - 1)
+            self.controller.advance(behind, self.step - 1 - self.last_call[behind])
+            self.last_call[behind] = self.step - 1
+
+    def counters(self):
+        total = self.decisions + self.skipped
+        return {'decisions': self.decisions, 'skipped': self.skipped, 'early_wakes': self.early_wakes,
+                'call_reduction': total / self.decisions if self.decisions else float('inf')}
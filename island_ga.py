@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Island-Model Genetic Algorithm
+Evolves Fuzzy-Webster genomes on several islands, one worker process each.
+Every island has its own population, random stream and simulator replicas
+(seeds). Every few generations each island sends its best genomes to the next
+island in a ring through a queue. The islands' champions are re-scored on
+common validation seeds, and the global best is saved for GAFuzzyWebsterController.
+
+Run: python island_ga.py --islands 4 --population 30 --generations 20
+     python ultimate_tsc.py --mode ga --genome models/ga_island.json
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import multiprocessing as mp
+import queue
+import traceback
+import numpy as np
+from controllers.fuzzy_webster_controller import PARAM_BOUNDS, PARAM_INIT, FuzzyWebsterController
+from controllers.ga_fuzzy_webster_controller import DEFAULT_GENOME, save_genome
+from controllers.optimizers import GeneticOptimizer
+from utils import parse_seeds, simulate
+
+# Seconds an island waits for its neighbour's migrants before giving up
+MIGRATION_TIMEOUT = 600
+# Seconds between the parent's checks that islands which have not reported are still alive
+RESULT_POLL = 1.0
+
+
+def genome_fitness(genome, seeds, steps, metric='avg_travel_time'):
+    """Mean metric of Fuzzy-Webster running this genome, over the given traffic seeds"""
+    values = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for seed in seeds:
+            final, _, _ = simulate(FuzzyWebsterController, steps, controller_kwargs={'params': genome},
+                                   seed=seed, fast_forward=True)
+            values.append(final[metric])
+    return float(np.mean(values))
+
+
+def run_island(island, seed_seq, inbox, outbox, results, population, generations, migration_interval,
+               migrants, seeds, steps, metric):
+    """One island: report (island, genome, fitness, evaluations), or (island, None, traceback, 0) on failure"""
+    try:
+        results.put((island, *evolve_island(seed_seq, inbox, outbox, population, generations,
+                                            migration_interval, migrants, seeds, steps, metric)))
+    except BaseException:
+        # Report the failure so the parent stops waiting for this island
+        results.put((island, None, traceback.format_exc(), 0))
+        raise
+
+
+def evolve_island(seed_seq, inbox, outbox, population, generations, migration_interval, migrants,
+                  seeds, steps, metric):
+    """Evolve, exchange champions every migration_interval generations; returns (genome, fitness, evaluations)"""
+    ga = GeneticOptimizer(PARAM_BOUNDS, np.random.default_rng(seed_seq), PARAM_INIT, size=population)
+
+    def score(x):
+        genome = ga.to_params(x)
+        fitness = ga.fitness_cache.get(genome)
+        if fitness is None:
+            fitness = genome_fitness(genome, seeds, steps, metric)
+            ga.record(genome, fitness)
+        return fitness
+
+    for generation in range(generations):
+        scores = np.array([score(x) for x in ga.population])
+
+        if outbox is not None and (generation + 1) % migration_interval == 0:
+            order = np.argsort(scores)
+            for j in order[:migrants]:
+                outbox.put(ga.to_params(ga.population[j]))
+            # Every island sends before it receives, so waiting for the neighbour cannot deadlock;
+            # immigrants replace the worst genomes and are re-scored on this island's replicas
+            for j in order[::-1][:migrants]:
+                ga.population[j] = ga.to_vector(inbox.get(timeout=MIGRATION_TIMEOUT))
+                scores[j] = score(ga.population[j])
+
+        if generation < generations - 1:
+            ga.breed(scores)
+    return ga.best(), ga.best_fitness, ga.fitness_cache.evaluations
+
+
+def run_islands(islands=4, population=30, generations=20, migration_interval=5, migrants=2,
+                seeds=(0,), steps=1000, metric='avg_travel_time', seed=0):
+    """Evolve all islands in parallel; returns the islands' (island, genome, fitness, evaluations)"""
+    seed_seqs = np.random.SeedSequence(seed).spawn(islands)
+    # Island k's replicas: its own traffic seeds, shifted so no two islands share traffic
+    island_seeds = [[s + 1000 * k for s in seeds] for k in range(islands)]
+    inboxes = [mp.Queue() for _ in range(islands)]
+    results = mp.Queue()
+    workers = [mp.Process(target=run_island,
+                          args=(k, seed_seqs[k], inboxes[k], inboxes[(k + 1) % islands] if islands > 1 else None,
+                                results, population, generations, migration_interval, migrants,
+                                island_seeds[k], steps, metric))
+               for k in range(islands)]
+    for w in workers:
+        w.start()
+    # Drain before joining: a worker exits only once its queued items are flushed
+    champions = {}
+    try:
+        while len(champions) < islands:
+            try:
+                island, genome, fitness, evaluations = results.get(timeout=RESULT_POLL)
+            except queue.Empty:
+                # A worker killed outright (e.g. out of memory) never reports
+                dead = [k for k, w in enumerate(workers) if k not in champions and w.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"Island worker(s) {dead} died without reporting")
+                continue
+            if genome is None:
+                raise RuntimeError(f"Island {island} failed:\n{fitness}")
+            champions[island] = (island, genome, fitness, evaluations)
+    except BaseException:
+        # The other islands would wait on the failed one's migrants: stop them all
+        for w in workers:
+            w.terminate()
+        raise
+    finally:
+        for w in workers:
+            w.join()
+    return [champions[k] for k in sorted(champions)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Island-model GA for Fuzzy-Webster parameters')
+    parser.add_argument('--islands', type=int, default=mp.cpu_count(), help='Islands (worker processes)')
+    parser.add_argument('--population', type=int, default=30, help='Genomes per island')
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--migration-interval', type=int, default=5, help='Generations between migrations')
+    parser.add_argument('--migrants', type=int, default=2, help='Best genomes sent per migration')
+    parser.add_argument('--seeds', type=str, default='0', help="Traffic seeds per island, e.g. '0..2'")
+    parser.add_argument('--validation-seeds', type=str, default='100..104',
+                        help='Seeds all champions are re-scored on')
+    parser.add_argument('--steps', type=int, default=1000, help='Simulation steps per evaluation')
+    parser.add_argument('--metric', type=str, default='avg_travel_time')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=str, default=str(DEFAULT_GENOME))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"\n{'='*60}\nISLAND GA - {args.islands} islands x {args.population} genomes, "
+          f"{args.generations} generations\n{'='*60}")
+    start = time.time()
+    champions = run_islands(args.islands, args.population, args.generations, args.migration_interval,
+                            args.migrants, parse_seeds(args.seeds), args.steps, args.metric, args.seed)
+    elapsed = time.time() - start
+
+    validation_seeds = parse_seeds(args.validation_seeds)
+    print(f"\n{'Island':<8} {'Own replicas':>14} {'Validation':>12} {'Evaluations':>12}")
+    print("-"*50)
+    scored = []
+    for island, genome, fitness, evaluations in champions:
+        validation = genome_fitness(genome, validation_seeds, args.steps, args.metric)
+        scored.append((validation, island, genome))
+        print(f"{island:<8} {fitness:>14.2f} {validation:>12.2f} {evaluations:>12}")
+    validation, island, genome = min(scored, key=lambda s: s[0])
+    save_genome(args.out, genome, metric=args.metric, validation=validation, island=island,
+                islands=args.islands, generations=args.generations, population=args.population)
+
+    print(f"\n✓ Evolved in {elapsed:.1f}s ({sum(c[3] for c in champions)} evaluations)")
+    print(f"  Global best: island {island}, {args.metric} {validation:.2f} on validation seeds")
+    print(f"  Base green {genome['base_green']:.1f}s, queue thresholds "
+          f"{genome['queue_low']:.1f} / {genome['queue_high']:.1f}")
+    print(f"  Saved: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Green-Wave Offset Optimization
+Searches the common cycle and per-signal offsets of an arterial corridor against
+a two-way platoon model, and stores the plan per corridor. The ULTIMATE-HYBRID
+controller picks up the plan stored as corridor_<N> for N intersections.
+
+Run: python optimize_offsets.py --signals 4
+     python optimize_offsets.py --signals 300 --travel-time 8,12,10 --corridor main_st
+"""
+
+import argparse
+import time
+import numpy as np
+from controllers.green_wave import (CYCLE_CANDIDATES, DEFAULT_GREEN_SHARE, DEFAULT_STORE, DEFAULT_TRAVEL_TIME,
+                                    optimize_offsets, platoon_delays, save_plan)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Optimize green-wave offsets for a corridor')
+    parser.add_argument('--signals', type=int, default=4, help='Signals along the corridor')
+    parser.add_argument('--travel-time', type=str, default=str(DEFAULT_TRAVEL_TIME),
+                        help='Steps between neighbouring signals; one value, or a comma list repeated along the corridor')
+    parser.add_argument('--green-share', type=float, default=DEFAULT_GREEN_SHARE,
+                        help='Share of the cycle given to the coordinated phase')
+    parser.add_argument('--cycles', type=str, default=','.join(map(str, CYCLE_CANDIDATES)),
+                        help='Candidate common cycles, comma separated')
+    parser.add_argument('--generations', type=int, default=None, help='Mutation generations per refined cycle')
+    parser.add_argument('--corridor', type=str, default=None, help='Plan name (default: corridor_<signals>)')
+    parser.add_argument('--store', type=str, default=str(DEFAULT_STORE))
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    corridor = args.corridor or f'corridor_{args.signals}'
+    pattern = [int(t) for t in args.travel_time.split(',')]
+    travel_times = np.resize(pattern, args.signals - 1)
+    print(f"\n{'='*60}\nGREEN-WAVE OFFSETS - {corridor} ({args.signals} signals)\n{'='*60}")
+
+    start = time.time()
+    plan = optimize_offsets(args.signals, travel_times, args.green_share,
+                            [int(c) for c in args.cycles.split(',')], args.generations, seed=args.seed)
+    elapsed = time.time() - start
+    save_plan(corridor, plan, args.store)
+
+    greens = max(1, round(args.green_share * plan.cycle))
+    uncoordinated, _ = platoon_delays(np.zeros(args.signals, dtype=np.int64), plan.cycle, greens, travel_times)
+    print(f"\n✓ Optimized in {elapsed:.2f}s")
+    print(f"  Common cycle: {plan.cycle} steps")
+    print(f"  Platoon delay: {plan.delay:.1f} steps ({uncoordinated[0]:.1f} with all offsets 0), "
+          f"{plan.stops:.1f} stops per corridor crossing")
+    print(f"  Saved: {args.store} [{corridor}]")
+
+
+if __name__ == '__main__':
+    main()
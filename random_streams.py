@@ -0,0 +1,89 @@
+# ============================================================================
+# RANDOM STREAMS (per-component generators + bulk pre-drawn blocks)
+# ============================================================================
+import numpy as np
+
+# Spawn order is fixed: new components go at the end so existing streams never change
+COMPONENTS = ['initial', 'arrivals', 'service', 'controller', 'transfers']
+# Steps drawn per block by BlockSampler
+BLOCK_STEPS = 1024
+
+
+def legacy_seed():
+    """Seed taken from the global np.random state, so np.random.seed() keeps callers reproducible"""
+    return int(np.random.randint(0, 2**31 - 1))
+
+
+def component_rng(rng=None):
+    """Controllers' generator: the one they were given, else one seeded from the global state"""
+    return rng if rng is not None else np.random.default_rng(legacy_seed())
+
+
+class RandomStreams:
+    """
+    Independent numpy Generators per component, all spawned from one seed (or a
+    SeedSequence, e.g. one shard's child) with SeedSequence.spawn. Extra draws in one
+    component (e.g. a controller's mutations) never shift the traffic another
+    component produces.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = legacy_seed() if seed is None else seed
+        sequence = self.seed if isinstance(self.seed, np.random.SeedSequence) else np.random.SeedSequence(self.seed)
+        children = sequence.spawn(len(COMPONENTS))
+        self.generators = {name: np.random.default_rng(child) for name, child in zip(COMPONENTS, children)}
+
+    def __getitem__(self, name):
+        return self.generators[name]
+
+
+class BlockSampler:
+    """
+    Hands out one draw per step from blocks of `block_steps` steps drawn at once,
+    replacing a scalar RNG call per lane per step with one vectorized call per block
+    """
+
+    def __init__(self, draw, block_steps=BLOCK_STEPS):
+        self.draw = draw  # draw(steps) -> array with `steps` rows
+        self.block_steps = block_steps
+        self.block = None
+        self.pos = 0
+
+    def next(self):
+        if self.block is None or self.pos == len(self.block):
+            self.block = self.draw(self.block_steps)
+            self.pos = 0
+        row = self.block[self.pos]
+        self.pos += 1
+        return row
+
+    def take(self, steps):
+        """The next `steps` draws as one array, exactly what `steps` next() calls return"""
+        parts = []
+        while steps:
+            if self.block is None or self.pos == len(self.block):
+                self.block = self.draw(self.block_steps)
+                self.pos = 0
+            n = min(steps, len(self.block) - self.pos)
+            parts.append(self.block[self.pos:self.pos + n])
+            self.pos += n
+            steps -= n
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+class ReplaySampler:
+    """Same interface as BlockSampler, stepping through pre-recorded rows (e.g. a memmap)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pos = 0
+
+    def next(self):
+        row = self.rows[self.pos]
+        self.pos += 1
+        return row
+
+    def take(self, steps):
+        rows = self.rows[self.pos:self.pos + steps]
+        self.pos += steps
+        return rows
@@ -0,0 +1,139 @@
+# ============================================================================
+# RESULT CACHE (content-addressed, LRU-capped on disk)
+# ============================================================================
+import hashlib
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path('results') / 'cache'
+DEFAULT_MAX_MB = 64
+REPO_ROOT = Path(__file__).resolve().parent
+# Modules every run goes through: the simulated scenario, the run loop and metrics (utils)
+# and the event-driven scheduler. Their source is part of every key
+RUN_PATH_MODULES = ['simulators', 'random_streams', 'utils', 'decision_scheduler']
+
+
+def _repo_module(obj):
+    """The repo-local module an object (module, class or function) comes from, else None"""
+    module = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, '__module__', None) or '')
+    path = getattr(module, '__file__', None)
+    if path and Path(path).resolve().is_relative_to(REPO_ROOT):
+        return module
+    return None
+
+
+def source_fingerprint(*objs):
+    """
+    sha256 over the source of the modules defining objs and every repo-local
+    module they reference (e.g. GA -> fuzzy_webster_controller -> random_streams),
+    so editing any code a controller runs invalidates its cached results
+    """
+    seen = {}
+    pending = [m for m in map(_repo_module, objs) if m is not None]
+    while pending:
+        module = pending.pop()
+        if module.__name__ in seen:
+            continue
+        seen[module.__name__] = Path(module.__file__).read_bytes()
+        for value in vars(module).values():
+            dep = _repo_module(value)
+            if dep is not None and dep.__name__ not in seen:
+                pending.append(dep)
+    digest = hashlib.sha256()
+    for name in sorted(seen):
+        digest.update(name.encode() + b'\0' + seen[name] + b'\0')
+    return digest.hexdigest()
+
+
+def run_path_fingerprint(names=RUN_PATH_MODULES):
+    """
+    sha256 over the source files of the run-path modules themselves. Their references
+    are not followed: utils reaches every imported controller through the registry,
+    which would make one controller's key depend on which others were loaded
+    """
+    digest = hashlib.sha256()
+    for name in sorted(names):
+        digest.update(name.encode() + b'\0' + (REPO_ROOT / f'{name}.py').read_bytes() + b'\0')
+    return digest.hexdigest()
+
+
+def input_fingerprint(paths):
+    """sha256 over the contents of a controller's data files (a missing file hashes as missing)"""
+    digest = hashlib.sha256()
+    for path in sorted(map(str, paths)):
+        try:
+            content = Path(path).read_bytes()
+        except OSError:
+            content = b'<missing>'
+        digest.update(path.encode() + b'\0' + content + b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Final metrics of finished runs as small JSON files named by their key.
+    Hits refresh the file's mtime; the least recently used entries are evicted
+    once the directory grows past max_mb. Controllers that read data files (trained
+    weights, stored plans) list them in cache_inputs(controller_kwargs), and their
+    contents are part of the key.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, controller_class, timeout, seed, controller_kwargs=None, scenario=None):
+        inputs = getattr(controller_class, 'cache_inputs', None)
+        payload = {
+            'controller': f'{controller_class.__module__}.{controller_class.__qualname__}',
+            'source': source_fingerprint(controller_class),
+            'run_path': run_path_fingerprint(),
+            'inputs': input_fingerprint(inputs(controller_kwargs or {}) if inputs else []),
+            'params': controller_kwargs or {},
+            'scenario': scenario or {},
+            'seed': seed,
+            'timeout': timeout,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key):
+        path = self.cache_dir / f'{key}.json'
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        path = self.cache_dir / f'{key}.json'
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(entry, f, default=float)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Append-only Results Store
+One SQLite database indexed by run id, method, seed, parameters and git revision
+
+Run: python results_store.py list
+     python results_store.py import results/20251115_104743
+     python results_store.py compare --metric avg_travel_time
+"""
+
+import argparse
+import json
+import sqlite3
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_DB = Path('results') / 'results.db'
+
+# Metrics stored as real columns so they can be filtered/aggregated in SQL;
+# anything else a simulator reports ends up in the `extra` JSON column
+METRIC_COLUMNS = ['avg_travel_time', 'avg_queue_length', 'avg_waiting_time',
+                  'avg_speed', 'throughput', 'total_delay']
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id   TEXT PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    created  TEXT NOT NULL,
+    git_rev  TEXT,
+    mode     TEXT,
+    timeout  INTEGER,
+    args     TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id   TEXT NOT NULL REFERENCES runs(run_id),
+    method   TEXT NOT NULL,
+    seed     INTEGER,
+    params   TEXT NOT NULL DEFAULT '{{}}',
+    git_rev  TEXT,
+    elapsed  REAL,
+    {', '.join(f'{m} REAL' for m in METRIC_COLUMNS)},
+    extra    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_method_seed ON results(method, seed);
+CREATE INDEX IF NOT EXISTS idx_results_params ON results(method, params);
+CREATE INDEX IF NOT EXISTS idx_results_rev ON results(git_rev, method);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(kind, created);
+"""
+
+
+def git_revision():
+    """Current commit (with -dirty suffix), or 'unknown' outside a git checkout"""
+    try:
+        out = subprocess.run(['git', 'describe', '--always', '--dirty'],
+                             capture_output=True, text=True, timeout=5,
+                             cwd=Path(__file__).resolve().parent)
+        return out.stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def _params_key(params):
+    """Canonical JSON so identical parameter sets compare equal in SQL"""
+    return json.dumps(params or {}, sort_keys=True, default=float)
+
+
+class ResultsStore:
+    """Append-only SQLite store; rows are only ever inserted"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self._git_rev = None
+
+    @property
+    def git_rev(self):
+        if self._git_rev is None:
+            self._git_rev = git_revision()
+        return self._git_rev
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------ writes
+
+    def unique_run_id(self, base):
+        """`base`, or `base_N` if a run with that id already exists"""
+        run_id, n = base, 1
+        while self.conn.execute('SELECT 1 FROM runs WHERE run_id = ?', (run_id,)).fetchone():
+            run_id, n = f'{base}_{n}', n + 1
+        return run_id
+
+    def add_run(self, run_id, kind='experiment', mode=None, timeout=None, args=None, created=None):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO runs (run_id, kind, created, git_rev, mode, timeout, args) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (run_id, kind, created or datetime.now().isoformat(timespec='seconds'),
+                 self.git_rev, mode, timeout, json.dumps(args or {}, default=str)))
+
+    def add_results(self, run_id, rows):
+        """Insert many results in one transaction.
+        rows: iterable of dicts with method, metrics and optional seed, params, elapsed"""
+        records = []
+        for row in rows:
+            metrics = {k: float(v) for k, v in row['metrics'].items()}
+            extra = {k: v for k, v in metrics.items() if k not in METRIC_COLUMNS}
+            records.append((run_id, row['method'], row.get('seed'), _params_key(row.get('params')),
+                            self.git_rev, row.get('elapsed'),
+                            *[metrics.get(m) for m in METRIC_COLUMNS],
+                            json.dumps(extra) if extra else None))
+        columns = ['run_id', 'method', 'seed', 'params', 'git_rev', 'elapsed'] + METRIC_COLUMNS + ['extra']
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO results ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                records)
+        return len(records)
+
+    def add_result(self, run_id, method, metrics, elapsed=None, seed=None, params=None):
+        self.add_results(run_id, [{'method': method, 'metrics': metrics, 'elapsed': elapsed,
+                                   'seed': seed, 'params': params}])
+
+    def import_json_dir(self, results_dir):
+        """Import a legacy per-method JSON results directory as one run"""
+        results_dir = Path(results_dir)
+        rows = []
+        for json_file in sorted(results_dir.glob('*.json')):
+            with open(json_file) as f:
+                result = json.load(f)
+            rows.append({'method': result['method'], 'metrics': result['metrics'],
+                         'elapsed': result.get('time')})
+        try:
+            created = datetime.strptime(results_dir.name, '%Y%m%d_%H%M%S').isoformat()
+        except ValueError:
+            created = None
+        self.add_run(results_dir.name, kind='experiment', mode='imported', created=created)
+        return self.add_results(results_dir.name, rows)
+
+    # ------------------------------------------------------------------- reads
+
+    def latest_run_id(self, kinds=('experiment', 'sweep')):
+        """Newest run holding at least one result; interrupted runs are recorded empty"""
+        row = self.conn.execute(
+            f"SELECT run_id FROM runs r WHERE kind IN ({', '.join('?' * len(kinds))}) "
+            f"AND EXISTS (SELECT 1 FROM results x WHERE x.run_id = r.run_id) "
+            f"ORDER BY created DESC, run_id DESC LIMIT 1", tuple(kinds)).fetchone()
+        return row['run_id'] if row else None
+
+    def runs(self, limit=20):
+        return [dict(r) for r in self.conn.execute(
+            'SELECT r.*, COUNT(x.id) AS results FROM runs r LEFT JOIN results x USING (run_id) '
+            'GROUP BY r.run_id ORDER BY r.created DESC LIMIT ?', (limit,))]
+
+    def load_run(self, run_id):
+        """{method: metrics} for one run; seeds of a sweep are averaged"""
+        rows = self.conn.execute(
+            f"SELECT method, {', '.join(f'AVG({m}) AS {m}' for m in METRIC_COLUMNS)} "
+            f"FROM results WHERE run_id = ? GROUP BY method ORDER BY MIN(id)", (run_id,))
+        return {r['method']: {m: r[m] for m in METRIC_COLUMNS if r[m] is not None} for r in rows}
+
+    def compare(self, metric='avg_travel_time', methods=None, run_ids=None, git_rev=None, params=None):
+        """Per-method count/mean/std/min/max of one metric over any slice of the store"""
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {METRIC_COLUMNS}")
+        where, values = [], []
+        for column, wanted in (('method', methods), ('run_id', run_ids)):
+            if wanted:
+                where.append(f"{column} IN ({', '.join('?' * len(wanted))})")
+                values.extend(wanted)
+        if git_rev:
+            where.append('git_rev = ?')
+            values.append(git_rev)
+        if params is not None:
+            where.append('params = ?')
+            values.append(_params_key(params))
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        rows = self.conn.execute(
+            f"SELECT method, COUNT({metric}) AS n, AVG({metric}) AS mean, "
+            f"AVG({metric} * {metric}) - AVG({metric}) * AVG({metric}) AS var, "
+            f"MIN({metric}) AS min, MAX({metric}) AS max "
+            f"FROM results {clause} GROUP BY method ORDER BY mean", values)
+        return [{'method': r['method'], 'n': r['n'], 'mean': r['mean'],
+                 'std': max(r['var'] or 0.0, 0.0) ** 0.5, 'min': r['min'], 'max': r['max']}
+                for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query and maintain the results store')
+    parser.add_argument('--db', type=str, default=str(DEFAULT_DB), help='Database path')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='Show recent runs')
+    imp = sub.add_parser('import', help='Import legacy per-method JSON directories')
+    imp.add_argument('dirs', nargs='+')
+    cmp_ = sub.add_parser('compare', help='Aggregate one metric per method')
+    cmp_.add_argument('--metric', default='avg_travel_time')
+    cmp_.add_argument('--method', action='append', dest='methods')
+    cmp_.add_argument('--run-id', action='append', dest='run_ids')
+    cmp_.add_argument('--git-rev', default=None)
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.command == 'list':
+        print(f"{'Run ID':<32} {'Kind':<12} {'Created':<20} {'Git Rev':<14} {'Mode':<12} {'Results':>8}")
+        print("-"*104)
+        for run in store.runs():
+            print(f"{run['run_id']:<32} {run['kind']:<12} {run['created']:<20} {run['git_rev'] or '':<14} "
+                  f"{run['mode'] or '':<12} {run['results']:>8}")
+    elif args.command == 'import':
+        for d in args.dirs:
+            print(f"✓ {d}: {store.import_json_dir(d)} results imported")
+    elif args.command == 'compare':
+        print(f"{'Method':<22} {'N':>6} {'Mean':>14} {'Std':>12} {'Min':>14} {'Max':>14}")
+        print("-"*86)
+        for row in store.compare(args.metric, args.methods, args.run_ids, args.git_rev):
+            print(f"{row['method']:<22} {row['n']:>6} {row['mean']:>14.2f} {row['std']:>12.2f} "
+                  f"{row['min']:>14.2f} {row['max']:>14.2f}")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Sharded Multi-Process Simulation
+Partitions a large corridor network into contiguous shards, one worker process
+each. Every worker steps its shard and runs its own controller on it. Only the
+boundary-lane flows between neighbouring shards are exchanged, through shared
+memory, with one barrier per step. Each shard's observations are its rows of one
+network-wide float32 buffer in shared memory, which any process can attach to by name.
+
+Run: python sharded_simulation.py --intersections 20000 --shards 4 --steps 200
+     python sharded_simulation.py --intersections 20000 --scaling 1,2,4
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from random_streams import RandomStreams
+from simulators import DTYPE_POLICIES, VectorizedSimulator, network_metrics, observation_buffer
+from utils import MODE_MAP, make_controller
+from decision_scheduler import DecisionScheduler
+
+LANES = 8
+# Share of discharged vehicles that join the same lane at the downstream intersection
+TRANSFER_FRACTION = 0.3
+# Per-shard totals written at the end: summed per-step queue and waiting, vehicles passed, timings
+STAT_FIELDS = ['queue_sum', 'wait_sum', 'passed', 'decisions', 'active', 'control_time', 'step_time',
+               'barrier_time']
+
+
+def shard_bounds(num_intersections, shards):
+    """Contiguous [lo, hi) ranges of near-equal size"""
+    edges = np.linspace(0, num_intersections, shards + 1).astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _run_shard(k, lo, hi, controller_class, steps, seed, shards, boundary, stats, barrier, event_driven=False,
+               sim_kwargs=None, observation=None):
+    """
+    Step one shard. boundary is double-buffered by step parity: at step t a shard
+    reads its predecessor's outflow from slot (t-1)%2 and writes its own to slot t%2,
+    so the single barrier at the end of each step is enough to avoid races.
+    observation: the shard's rows of the network-wide observation buffer.
+
+    With an active-set simulator only active intersections are asked; an idle one
+    keeps its phase (it has no vehicles, so the phase changes nothing) and its
+    controller timers are caught up with advance() when it becomes active again.
+
+    Each shard gets its own child of the run's SeedSequence, spawned into the
+    simulator's streams and the controller's stream.
+    """
+    streams = RandomStreams(np.random.SeedSequence(seed).spawn(shards)[k])
+    shard = VectorizedSimulator(hi - lo, streams, TRANSFER_FRACTION, observation=observation, **(sim_kwargs or {}))
+    with contextlib.redirect_stdout(io.StringIO()):
+        controller = make_controller(controller_class, hi - lo, rng=streams['controller'])
+    scheduler = DecisionScheduler(controller, hi - lo) if event_driven else None
+    decide = scheduler.get_actions if scheduler else controller.get_actions
+    catch_up = shard.active_set and hasattr(controller, 'advance')
+    actions = np.zeros(hi - lo, dtype=np.int64)
+    last_asked = np.full(hi - lo, -1, dtype=np.int64)
+
+    totals = dict.fromkeys(STAT_FIELDS, 0.0)
+    states = shard.get_states()
+    upstream = (k - 1) % shards
+    for t in range(steps):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if shard.active_set:
+                rows = shard.active
+                if catch_up:
+                    controller.advance(rows, t - last_asked[rows] - 1)
+                actions[rows] = controller.get_actions(states[rows], rows)
+                last_asked[rows] = t
+                totals['decisions'] += len(rows)
+            else:
+                actions = decide(states)
+        t1 = time.perf_counter()
+        inflow = boundary[(t - 1) % 2, upstream] if t else 0
+        boundary[t % 2, k] = shard.step(actions, inflow)
+        t2 = time.perf_counter()
+        if barrier is not None:
+            barrier.wait()
+        t3 = time.perf_counter()
+        states = shard.get_states()
+        queue_sum, wait_sum = shard.totals()
+        totals['queue_sum'] += queue_sum
+        totals['wait_sum'] += wait_sum
+        totals['control_time'] += t1 - t0
+        totals['step_time'] += t2 - t1
+        totals['barrier_time'] += t3 - t2
+
+    totals['passed'] = shard.total_vehicles_passed
+    totals['active'] = shard.active_steps
+    if not shard.active_set:
+        totals['decisions'] = scheduler.decisions if scheduler else steps * (hi - lo)
+    stats[k] = [totals[f] for f in STAT_FIELDS]
+
+
+def _shard_worker(k, lo, hi, controller_class, steps, seed, shards, names, barrier, event_driven, sim_kwargs):
+    boundary_shm, boundary = _attach(names[0], (2, shards, LANES), np.int64)
+    stats_shm, stats = _attach(names[1], (shards, len(STAT_FIELDS)), np.float64)
+    observation_shm = shared_memory.SharedMemory(name=names[2])
+    observation = observation_buffer(hi - lo, observation_shm.buf, lo)
+    try:
+        _run_shard(k, lo, hi, controller_class, steps, seed, shards, boundary, stats, barrier, event_driven,
+                   sim_kwargs, observation)
+    except BaseException:
+        barrier.abort()  # release the other shards instead of leaving them at the barrier
+        raise
+    finally:
+        del boundary, stats, observation
+        boundary_shm.close()
+        stats_shm.close()
+        observation_shm.close()
+
+
+def run_sharded(controller_class, num_intersections, shards, steps, seed=0, event_driven=False, dtypes='compact',
+                demand=1.0, active_set=False):
+    """
+    Run the network across `shards` processes; returns (metrics, elapsed, per-shard stats,
+    final (N, 8) observations read back from the shards' shared buffer)
+    """
+    sim_kwargs = {'dtypes': dtypes, 'demand': demand, 'active_set': active_set}
+    bounds = shard_bounds(num_intersections, shards)
+    boundary_shm = shared_memory.SharedMemory(create=True, size=2 * shards * LANES * 8)
+    stats_shm = shared_memory.SharedMemory(create=True, size=shards * len(STAT_FIELDS) * 8)
+    observation_shm = shared_memory.SharedMemory(create=True, size=num_intersections * LANES * 4)
+    try:
+        boundary = np.ndarray((2, shards, LANES), dtype=np.int64, buffer=boundary_shm.buf)
+        stats = np.ndarray((shards, len(STAT_FIELDS)), dtype=np.float64, buffer=stats_shm.buf)
+        observation = observation_buffer(num_intersections, observation_shm.buf)
+        boundary[:] = 0
+        stats[:] = 0
+
+        start = time.time()
+        if shards == 1:
+            # Same code path in-process: the single-core reference for scaling
+            _run_shard(0, 0, num_intersections, controller_class, steps, seed, 1, boundary, stats, None,
+                       event_driven, sim_kwargs, observation)
+        else:
+            barrier = mp.Barrier(shards)
+            names = (boundary_shm.name, stats_shm.name, observation_shm.name)
+            workers = [mp.Process(target=_shard_worker,
+                                  args=(k, lo, hi, controller_class, steps, seed, shards,
+                                        names, barrier, event_driven, sim_kwargs))
+                       for k, (lo, hi) in enumerate(bounds)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            failed = [k for k, w in enumerate(workers) if w.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"Shard worker(s) {failed} failed")
+        elapsed = time.time() - start
+
+        per_shard = [dict(zip(STAT_FIELDS, row)) for row in stats.tolist()]
+        states = observation.copy()
+        del boundary, stats, observation
+    finally:
+        boundary_shm.close()
+        boundary_shm.unlink()
+        stats_shm.close()
+        stats_shm.unlink()
+        observation_shm.close()
+        observation_shm.unlink()
+
+    cells = num_intersections * LANES
+    total = {f: sum(s[f] for s in per_shard) for f in STAT_FIELDS}
+    # Every metric is averaged over steps, like MetricsCalculator
+    metrics = network_metrics(total['queue_sum'] / (steps * cells), total['wait_sum'] / (steps * cells),
+                              int(total['passed']), total['queue_sum'] / steps, total['wait_sum'] / steps)
+    return metrics, elapsed, per_shard, states
+
+
+def print_run(name, num_intersections, shards, steps, metrics, elapsed, per_shard, states):
+    rate = num_intersections * steps / elapsed
+    control = max(s['control_time'] for s in per_shard)
+    step = max(s['step_time'] for s in per_shard)
+    wait = max(s['barrier_time'] for s in per_shard)
+    print(f"✓ {name} | {shards} shard(s) | {elapsed:.2f}s | {rate:,.0f} intersection-steps/s | "
+          f"control {control:.2f}s, step {step:.2f}s, barrier {wait:.2f}s | "
+          f"travel time {metrics['avg_travel_time']:.2f}")
+    active = sum(s['active'] for s in per_shard)
+    if active < num_intersections * steps:
+        print(f"  💤 {active / (num_intersections * steps):.1%} of intersection-steps active "
+              f"(idle intersections skipped)")
+    decisions = sum(s['decisions'] for s in per_shard)
+    if decisions < num_intersections * steps:
+        print(f"  ⏱  {decisions:,.0f} controller decisions "
+              f"({num_intersections * steps / decisions:.1f}x fewer than per-step polling)")
+    queues = states.sum(axis=1)
+    print(f"  🚦 Final queues (shared observations): {queues.sum():,.0f} vehicles, "
+          f"busiest intersection {int(queues.argmax())} with {queues.max():.0f}")
+    return rate
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Sharded multi-process TSC simulation')
+    parser.add_argument('--mode', '-m', choices=sorted(MODE_MAP), default='maxpressure')
+    parser.add_argument('--intersections', type=int, default=20000)
+    parser.add_argument('--shards', type=int, default=mp.cpu_count(), help='Worker processes')
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--event-driven', action='store_true',
+                        help='Only ask controllers about intersections whose decision can change')
+    parser.add_argument('--scaling', type=str, default=None,
+                        help='Comma-separated shard counts to benchmark, e.g. 1,2,4')
+    parser.add_argument('--dtypes', choices=list(DTYPE_POLICIES), default='compact',
+                        help='Storage dtypes of the simulator state (results are identical)')
+    parser.add_argument('--demand', type=float, default=1.0,
+                        help='Scale of every flow rate, e.g. 0.005 for an overnight network')
+    parser.add_argument('--active-set', action='store_true',
+                        help='Only step and control intersections with vehicles or waiting time')
+    args = parser.parse_args()
+    if args.active_set and args.event_driven:
+        parser.error('--active-set and --event-driven cannot be combined')
+    return args
+
+
+def main():
+    args = parse_args()
+    name, controller_class = MODE_MAP[args.mode]
+    counts = [int(s) for s in args.scaling.split(',')] if args.scaling else [args.shards]
+
+    print(f"\n{'='*60}\nSHARDED SIMULATION - {name}, {args.intersections} intersections, "
+          f"{args.steps} steps ({mp.cpu_count()} CPUs)\n{'='*60}")
+    rates = {}
+    for shards in counts:
+        metrics, elapsed, per_shard, states = run_sharded(controller_class, args.intersections, shards,
+                                                          args.steps, args.seed, args.event_driven, args.dtypes,
+                                                          args.demand, args.active_set)
+        rates[shards] = print_run(name, args.intersections, shards, args.steps,
+                                  metrics, elapsed, per_shard, states)
+
+    if len(rates) > 1:
+        base_shards = min(rates)
+        print(f"\n{'Shards':>8} {'Speedup':>10} {'Efficiency':>12}")
+        print("-"*32)
+        for shards, rate in rates.items():
+            speedup = rate / rates[base_shards]
+            print(f"{shards:>8} {speedup:>9.2f}x {speedup * base_shards / shards:>11.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,77 +2,434 @@
 # SYNTHETIC SIMULATOR
 # ============================================================================
 import numpy as np
+from pathlib import Path
+from random_streams import RandomStreams, BlockSampler, ReplaySampler
+
+# Queues saturate at QUEUE_CAP vehicles per lane. Arrivals are clipped to the cap before
+# they are added, so queue + arrivals <= 2 * QUEUE_CAP fits even a uint8 queue
+QUEUE_CAP = 60
+# Per-step state dtypes per policy; observations are always float32. Waiting times only
+# change by whole steps, so float32 holds them exactly. Flow rates stay float64 under every
+# policy: they parameterize the Poisson draws, and rounding them would change the traffic
+DTYPE_POLICIES = {
+    'wide': {'queue': np.int64, 'wait': np.float64},
+    'int16': {'queue': np.int16, 'wait': np.float32},
+    'compact': {'queue': np.uint8, 'wait': np.float32}
+}
+
+
+# Active-set stepping falls back to whole-array updates above this share of active
+# intersections, and draws arrivals per lane above this many expected vehicles per lane
+DENSE_ACTIVE_FRACTION = 0.5
+SPARSE_ARRIVALS_RATE = 0.1
+
+
+def dtype_policy(name):
+    if name not in DTYPE_POLICIES:
+        raise ValueError(f"Unknown dtype policy {name!r}; choose from {sorted(DTYPE_POLICIES)}")
+    return DTYPE_POLICIES[name]
+
+
+def add_arrivals(queue_lengths, arrivals):
+    """queue_lengths += arrivals in place, saturating at QUEUE_CAP; arrivals must be <= QUEUE_CAP"""
+    np.add(queue_lengths, arrivals, out=queue_lengths, casting='unsafe')
+    np.minimum(queue_lengths, QUEUE_CAP, out=queue_lengths)
+
+
+def queue_rewards(queue_lengths, waiting_times):
+    """Per-intersection reward, accumulated in float64 whatever the storage dtypes"""
+    q = queue_lengths.sum(axis=1, dtype=np.float64)
+    w = waiting_times.sum(axis=1, dtype=np.float64)
+    return -(q ** 1.5 + w) / 100.0 + np.maximum(0, 20 - q) * 0.2
+
+
+# Reward of an intersection with no queue and no waiting time
+IDLE_REWARD = float(queue_rewards(np.zeros((1, 8)), np.zeros((1, 8)))[0])
+
+
+def block_metrics(queues, waits, passed):
+    """network_metrics per step from (k, lanes) queue and waiting rows and cumulative vehicles passed"""
+    return network_metrics(queues.mean(axis=1, dtype=np.float64), waits.mean(axis=1, dtype=np.float64), passed,
+                           queues.sum(axis=1, dtype=np.float64), waits.sum(axis=1, dtype=np.float64))
+
+
+def simulator_metrics(queue_lengths, waiting_times, total_vehicles_passed):
+    return network_metrics(np.mean(queue_lengths, dtype=np.float64), np.mean(waiting_times, dtype=np.float64),
+                           total_vehicles_passed,
+                           np.sum(queue_lengths, dtype=np.float64), np.sum(waiting_times, dtype=np.float64))
+
+
+def observation_buffer(num_intersections, buffer=None, first=0):
+    """
+    (N, 8) float32 observation array, optionally backed by an existing buffer
+    (e.g. multiprocessing.shared_memory.SharedMemory(...).buf) so a controller
+    in another process can attach to the same memory by name. first: the
+    buffer's row where this array starts (a shard of a network-wide buffer)
+    """
+    return np.ndarray((num_intersections, 8), dtype=np.float32, buffer=buffer,
+                      offset=first * 8 * np.dtype(np.float32).itemsize)
+
+
+def readonly_view(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
 
 class SyntheticSimulator:
     """Realistic traffic simulator"""
     
-    def __init__(self, num_intersections=4):
+    def __init__(self, num_intersections=4, observation=None, streams=None, tape=None, dtypes='wide'):
         self.num_intersections = num_intersections
         self.intersections = [f'intersection_{i}' for i in range(num_intersections)]
         self.action_space = 4
-        self.queue_lengths = np.random.randint(5, 15, size=(num_intersections, 8))
-        self.waiting_times = np.zeros((num_intersections, 8))
-        self.flow_rates = np.random.rand(num_intersections, 8) * 1.5 + 0.5
+        # Draws are identical under every policy, so results are too; only storage narrows
+        self.dtypes = dtype_policy(dtypes)
+        # Initial queues, arrivals and service each draw from their own stream, and every
+        # lane gets a service draw whether green or not: the traffic does not depend on
+        # the controller, so all methods run with the same seed see identical traffic
+        self.streams = streams if streams is not None else RandomStreams()
+        queue = self.dtypes['queue']
+        self.queue_lengths = self.streams['initial'].integers(5, 15, size=(num_intersections, 8)).astype(queue)
+        self.waiting_times = np.zeros((num_intersections, 8), dtype=self.dtypes['wait'])
+        self.flow_rates = self.streams['initial'].random((num_intersections, 8)) * 1.5 + 0.5
+        self.arrivals = BlockSampler(lambda steps: np.minimum(self.streams['arrivals'].poisson(
+            self.flow_rates, size=(steps, num_intersections, 8)), QUEUE_CAP).astype(queue))
+        self.service = BlockSampler(lambda steps: self.streams['service'].integers(
+            4, 9, size=(steps, num_intersections, 8)).astype(queue))
+        # A recorded TrafficTape replaces all of the above with pre-generated draws
+        self.tape = tape
+        if tape is not None:
+            self.queue_lengths = tape.initial.astype(queue)
+            self.flow_rates = np.array(tape.flow_rates)
+            self.arrivals = ReplaySampler(tape.arrivals)
+            self.service = ReplaySampler(tape.service)
+        self.lane_phase = np.arange(8) // 2
         self.total_vehicles_passed = 0
+        # Persistent float32 observations, refreshed in place each step; controllers get a read-only view
+        self.observation = observation_buffer(num_intersections) if observation is None else observation
+        self.observation_view = readonly_view(self.observation)
         
     def reset(self):
-        self.queue_lengths = np.random.randint(5, 15, size=(self.num_intersections, 8))
-        self.waiting_times = np.zeros((self.num_intersections, 8))
+        if self.tape is not None:
+            self.queue_lengths = self.tape.initial.astype(self.dtypes['queue'])
+        else:
+            self.queue_lengths = self.streams['initial'].integers(
+                5, 15, size=(self.num_intersections, 8)).astype(self.dtypes['queue'])
+        self.waiting_times = np.zeros((self.num_intersections, 8), dtype=self.dtypes['wait'])
         self.total_vehicles_passed = 0
         return self.get_states()
     
     def step(self, actions):
-        for i, action in enumerate(actions):
-            green_lanes = [action * 2, action * 2 + 1]
-            
-            for lane in range(8):
-                if lane in green_lanes:
-                    # Green: clear vehicles (4-8 per step)
-                    cleared = min(self.queue_lengths[i, lane], np.random.randint(4, 9))
-                    self.queue_lengths[i, lane] -= cleared
-                    self.total_vehicles_passed += cleared
-                    self.waiting_times[i, lane] = max(0, self.waiting_times[i, lane] - 2)
-                else:
-                    # Red: accumulate
-                    if self.queue_lengths[i, lane] > 0:
-                        self.waiting_times[i, lane] += 1
-            
-            # New arrivals
-            arrivals = np.random.poisson(self.flow_rates[i])
-            self.queue_lengths[i] += arrivals
-            self.queue_lengths[i] = np.minimum(self.queue_lengths[i], 60)
-        
+        green = self.lane_phase[None, :] == np.asarray(actions)[:, None]
+        self._advance(green, self.service.next(), self.arrivals.next())
         return self.get_states(), self.get_rewards(), False
     
+    def _advance(self, green, service, arrivals):
+        # Green: clear vehicles (4-8 per step); red: waiting accumulates on non-empty lanes
+        cleared = np.where(green, np.minimum(self.queue_lengths, service), 0)
+        np.subtract(self.queue_lengths, cleared, out=self.queue_lengths, casting='unsafe')
+        self.total_vehicles_passed += int(cleared.sum())
+        self.waiting_times = np.where(green, np.maximum(0, self.waiting_times - 2),
+                                      self.waiting_times + (self.queue_lengths > 0))
+        
+        # New arrivals
+        add_arrivals(self.queue_lengths, arrivals)
+    
+    def step_many(self, actions, k):
+        """
+        Advance k steps holding the same actions, identical to k step() calls, in one
+        pass over the k-step block of draws. Returns get_metrics() after each step as
+        a dict of length-k arrays.
+
+        Red lanes only gain vehicles, so their queues are the capped running sum of
+        arrivals. On green lanes the queue left after clearing follows the Lindley
+        recursion p_t = max(p_{t-1} + a_{t-1} - s_t, 0), i.e. the running sum minus
+        its running minimum. If the 60-vehicle cap would bind on a green lane inside
+        the block, the block is replayed step by step instead.
+        """
+        green = self.lane_phase[None, :] == np.asarray(actions)[:, None]
+        service = self.service.take(k).astype(np.int64)
+        arrivals = self.arrivals.take(k).astype(np.int64)
+        queue0 = self.queue_lengths.astype(np.int64)
+        wait0 = self.waiting_times.astype(np.float64)
+        
+        remaining = np.maximum(queue0 - service[0], 0)
+        sums = np.cumsum(arrivals[:-1] - service[1:], axis=0)
+        lows = np.minimum.accumulate(np.concatenate([-remaining[None], sums]), axis=0)
+        remaining = np.concatenate([np.zeros_like(remaining)[None], sums]) - lows
+        green_queues = remaining + arrivals
+        if (green & (green_queues > QUEUE_CAP).any(axis=0)).any():
+            return self._step_block(green, service, arrivals)
+        
+        red_queues = np.minimum(queue0 + np.cumsum(arrivals, axis=0), QUEUE_CAP)
+        queues = np.where(green, green_queues, red_queues)  # after each step
+        before = np.concatenate([queue0[None], queues[:-1]])
+        cleared = np.where(green, before - remaining, 0)
+        passed = self.total_vehicles_passed + np.cumsum(cleared.reshape(k, -1).sum(axis=1))
+        elapsed = np.arange(1, k + 1)[:, None, None]
+        waits = np.where(green, np.maximum(0, wait0 - 2 * elapsed), wait0 + np.cumsum(before > 0, axis=0))
+        
+        self.queue_lengths[...] = queues[-1]
+        self.waiting_times[...] = waits[-1]
+        self.total_vehicles_passed = int(passed[-1])
+        return block_metrics(queues.reshape(k, -1), waits.reshape(k, -1), passed)
+    
+    def _step_block(self, green, service, arrivals):
+        """step_many() one step at a time over already drawn service and arrivals"""
+        k = len(service)
+        queues = np.empty((k, self.queue_lengths.size))
+        waits = np.empty((k, self.waiting_times.size))
+        passed = np.empty(k, dtype=np.int64)
+        for t in range(k):
+            self._advance(green, service[t], arrivals[t])
+            queues[t] = self.queue_lengths.ravel()
+            waits[t] = self.waiting_times.ravel()
+            passed[t] = self.total_vehicles_passed
+        return block_metrics(queues, waits, passed)
+    
     def get_states(self):
-        return self.queue_lengths.astype(np.float32)
+        """Read-only view of the observation buffer (valid until the next step)"""
+        self.observation[...] = self.queue_lengths
+        return self.observation_view
     
     def get_rewards(self):
-        rewards = []
-        for i in range(self.num_intersections):
-            q = np.sum(self.queue_lengths[i])
-            w = np.sum(self.waiting_times[i])
-            reward = -(q ** 1.5 + w) / 100.0 + (max(0, 20 - q) * 0.2)
-            rewards.append(reward)
-        return rewards
+        return queue_rewards(self.queue_lengths, self.waiting_times)
     
     def get_metrics(self):
-        avg_queue = np.mean(self.queue_lengths)
-        avg_wait = np.mean(self.waiting_times)
-        return {
-            'avg_travel_time': 80 + avg_queue * 2 + avg_wait * 1.5,
-            'avg_queue_length': avg_queue,
-            'avg_waiting_time': 15 + avg_wait,
-            'avg_speed': max(0, 8 - avg_queue * 0.15),
-            'throughput': self.total_vehicles_passed,
-            'total_delay': np.sum(self.queue_lengths) * 10 + np.sum(self.waiting_times) * 5
-        }
+        return simulator_metrics(self.queue_lengths, self.waiting_times, self.total_vehicles_passed)
+
+
+class TrafficTape:
+    """
+    One seed's traffic, generated once: initial queues, flow rates and every step's
+    arrival and service draws. Replaying it gives each controller exactly the
+    traffic a live SyntheticSimulator with that seed would produce.
+    """
+
+    FILES = ['initial', 'flow_rates', 'arrivals', 'service']
+
+    def __init__(self, initial, flow_rates, arrivals, service, seed=None):
+        self.initial = initial
+        self.flow_rates = flow_rates
+        self.arrivals = arrivals
+        self.service = service
+        self.seed = seed
+
+    @classmethod
+    def record(cls, seed, steps, num_intersections=4, out_dir=None):
+        """Draw the traffic for `steps` steps; in memory, or as .npy memmaps under out_dir"""
+        sim = SyntheticSimulator(num_intersections, streams=RandomStreams(seed))
+        sim.reset()  # runs start from the reset queues, as in simulate()
+        shape = (steps, num_intersections, 8)
+        if out_dir is not None:
+            out_dir = Path(out_dir)
+            out_dir.mkdir(parents=True, exist_ok=True)
+            arrivals = np.lib.format.open_memmap(out_dir / 'arrivals.npy', mode='w+', dtype=np.int16, shape=shape)
+            service = np.lib.format.open_memmap(out_dir / 'service.npy', mode='w+', dtype=np.int8, shape=shape)
+        else:
+            arrivals = np.empty(shape, dtype=np.int16)
+            service = np.empty(shape, dtype=np.int8)
+        for t in range(steps):
+            arrivals[t] = sim.arrivals.next()
+            service[t] = sim.service.next()
+        tape = cls(sim.queue_lengths.astype(np.int16), sim.flow_rates, arrivals, service, seed)
+        if out_dir is not None:
+            np.save(out_dir / 'initial.npy', tape.initial)
+            np.save(out_dir / 'flow_rates.npy', tape.flow_rates)
+            arrivals.flush()
+            service.flush()
+        return tape
+
+    @classmethod
+    def load(cls, tape_dir):
+        """Memory-mapped tape written by record(..., out_dir=tape_dir)"""
+        tape_dir = Path(tape_dir)
+        return cls(*[np.load(tape_dir / f'{name}.npy', mmap_mode='r') for name in cls.FILES])
+
+
+class VectorizedSimulator:
+    """
+    SyntheticSimulator dynamics as whole-array operations, for large networks and
+    batched training. With transfer > 0, intersections form a corridor: intersection
+    i passes that share of its discharged vehicles to the same lane of i+1, and the
+    last one's outflow is returned by step() for the next block. With transfer = 0
+    the intersections are independent, like SyntheticSimulator.
+
+    demand scales every flow rate (e.g. 0.01 for an overnight network). With
+    active_set, step() only touches intersections with a queue or a waiting time
+    (self.active, sorted indices) plus those that receive vehicles. At low demand
+    arrivals are drawn sparsely, as one network-wide Poisson total spread over lanes
+    by rate, so work per step scales with traffic instead of network size. The
+    draws differ from the dense path, so results match it statistically, not bit
+    for bit. observation is the observation_buffer() refreshed by get_states(),
+    e.g. a shard's rows of a network-wide buffer in shared memory.
+
+    Initial queues, arrivals, service and transfers each draw from their own
+    RandomStreams stream, so a controller's actions (which set how many vehicles
+    are cleared and transferred) never shift the arrivals and service of the dense
+    path. Active-set stepping draws service for active rows only.
+    """
+
+    def __init__(self, num_intersections, streams=None, transfer=0.0, dtypes='wide', demand=1.0, active_set=False,
+                 observation=None):
+        self.num_intersections = num_intersections
+        self.streams = streams if streams is not None else RandomStreams()
+        self.transfer = transfer
+        self.action_space = 4
+        self.dtypes = dtype_policy(dtypes)
+        self.flow_rates = (self.streams['initial'].random((num_intersections, 8)) * 1.5 + 0.5) * demand
+        self.lane_phase = np.arange(8) // 2
+        self.active_set = active_set
+        self.sparse_arrivals = active_set and self.flow_rates.mean() < SPARSE_ARRIVALS_RATE
+        if self.sparse_arrivals:
+            self.rate_cdf = np.cumsum(self.flow_rates.ravel())
+            self.total_rate = self.rate_cdf[-1]
+        self.observation = observation_buffer(num_intersections) if observation is None else observation
+        self.observation_view = readonly_view(self.observation)
+        self.rewards = np.full(num_intersections, IDLE_REWARD)
+        self.rewards_view = readonly_view(self.rewards)
+        self.reset()
+
+    def reset(self):
+        self.queue_lengths = self.streams['initial'].integers(
+            5, 15, size=(self.num_intersections, 8)).astype(self.dtypes['queue'])
+        self.waiting_times = np.zeros((self.num_intersections, 8), dtype=self.dtypes['wait'])
+        self.total_vehicles_passed = 0
+        self.active = np.arange(self.num_intersections)
+        self.dirty = self.active  # rows whose observation is stale
+        self.reward_rows = self.active  # rows whose reward may differ from IDLE_REWARD
+        self.active_steps = 0  # sum of len(active) over steps
+        self.steps = 0
+        return self.get_states()
+
+    def step(self, actions, boundary_inflow=0):
+        """Advance one step; returns the vehicles leaving the last intersection"""
+        self.steps += 1
+        if self.active_set and len(self.active) <= DENSE_ACTIVE_FRACTION * self.num_intersections:
+            return self._step_active(actions, boundary_inflow)
+        self.active_steps += self.num_intersections
+        green = self.lane_phase[None, :] == np.asarray(actions)[:, None]
+        service = self.streams['service'].integers(4, 9, size=self.queue_lengths.shape)
+        cleared = np.where(green, np.minimum(self.queue_lengths, service), 0)
+        np.subtract(self.queue_lengths, cleared, out=self.queue_lengths, casting='unsafe')
+        self.total_vehicles_passed += int(cleared.sum())
+        self.waiting_times = np.where(green, np.maximum(0, self.waiting_times - 2),
+                                      self.waiting_times + (self.queue_lengths > 0))
+
+        arrivals = self.streams['arrivals'].poisson(self.flow_rates)
+        outflow = 0
+        if self.transfer:
+            moved = self.streams['transfers'].binomial(cleared, self.transfer)
+            arrivals[0] += boundary_inflow
+            arrivals[1:] += moved[:-1]
+            outflow = moved[-1]
+        add_arrivals(self.queue_lengths, np.minimum(arrivals, QUEUE_CAP, out=arrivals))
+        if self.active_set:
+            self.active = np.flatnonzero(self.queue_lengths.any(axis=1) | self.waiting_times.any(axis=1))
+            self.dirty = slice(None)
+        return outflow
+
+    def _draw_arrivals(self):
+        """(flat lane indices, vehicles) arriving this step"""
+        if not self.sparse_arrivals:
+            arrivals = self.streams['arrivals'].poisson(self.flow_rates).ravel()
+            lanes = np.flatnonzero(arrivals)
+            return lanes, arrivals[lanes]
+        # Sparse: one network-wide Poisson total, each vehicle placed on a lane with probability ~ rate
+        total = self.streams['arrivals'].poisson(self.total_rate)
+        lanes = np.searchsorted(self.rate_cdf, self.streams['arrivals'].random(total) * self.total_rate, side='right')
+        return lanes, np.ones(total, dtype=np.int64)
+
+    def _step_active(self, actions, boundary_inflow):
+        """step() on the active rows only: gather, update, scatter, then add sparse arrivals"""
+        rows = self.active
+        self.active_steps += len(rows)
+        queues = self.queue_lengths[rows]
+        waits = self.waiting_times[rows]
+        green = self.lane_phase[None, :] == np.asarray(actions)[rows, None]
+        service = self.streams['service'].integers(4, 9, size=queues.shape)
+        cleared = np.where(green, np.minimum(queues, service), 0)
+        np.subtract(queues, cleared, out=queues, casting='unsafe')
+        self.total_vehicles_passed += int(cleared.sum())
+        waits = np.where(green, np.maximum(0, waits - 2), waits + (queues > 0))
+        self.queue_lengths[rows] = queues
+        self.waiting_times[rows] = waits
+        busy = rows[(queues > 0).any(axis=1) | (waits > 0).any(axis=1)]
+
+        # Arrivals as (flat lane index, vehicles) pairs: new vehicles, transfers, boundary inflow
+        new_lanes, new_vehicles = self._draw_arrivals()
+        lanes, counts = [new_lanes], [new_vehicles]
+        outflow = np.zeros(8, dtype=np.int64)
+        if self.transfer:
+            moved = self.streams['transfers'].binomial(cleared, self.transfer)
+            if len(rows) and rows[-1] == self.num_intersections - 1:
+                outflow = moved[-1]
+                moved = moved[:-1]
+            hit_rows, hit_lanes = np.nonzero(moved)
+            lanes.append((rows[hit_rows] + 1) * 8 + hit_lanes)
+            counts.append(moved[hit_rows, hit_lanes])
+            inflow = np.broadcast_to(boundary_inflow, (8,))
+            lanes.append(np.flatnonzero(inflow))
+            counts.append(inflow[inflow > 0])
+        lanes, inverse = np.unique(np.concatenate(lanes), return_inverse=True)
+        vehicles = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+        flat = self.queue_lengths.reshape(-1)
+        flat[lanes] = np.minimum(flat[lanes] + np.minimum(vehicles, QUEUE_CAP), QUEUE_CAP)
+
+        arrived = np.unique(lanes // 8)
+        self.active = np.union1d(busy, arrived)
+        self.dirty = np.union1d(rows, arrived)
+        return outflow
+
+    def get_states(self):
+        if self.active_set:
+            self.observation[self.dirty] = self.queue_lengths[self.dirty]
+        else:
+            self.observation[...] = self.queue_lengths
+        return self.observation_view
+
+    def get_rewards(self):
+        """
+        Per-intersection rewards. With active_set (and at most DENSE_ACTIVE_FRACTION
+        active) only active rows are computed and idle ones read IDLE_REWARD, from a
+        read-only buffer valid until the next call
+        """
+        if not self.active_set or len(self.active) > DENSE_ACTIVE_FRACTION * self.num_intersections:
+            return queue_rewards(self.queue_lengths, self.waiting_times)
+        self.rewards[self.reward_rows] = IDLE_REWARD
+        rows = self.reward_rows = self.active
+        self.rewards[rows] = queue_rewards(self.queue_lengths[rows], self.waiting_times[rows])
+        return self.rewards_view
+
+    def totals(self):
+        """(total queue, total waiting); with active_set only active rows are summed, the rest are zero"""
+        rows = self.active if self.active_set else slice(None)
+        return (self.queue_lengths[rows].sum(dtype=np.float64), self.waiting_times[rows].sum(dtype=np.float64))
+
+    def active_fraction(self):
+        return self.active_steps / (self.steps * self.num_intersections) if self.steps else 1.0
+
+    def get_metrics(self):
+        return simulator_metrics(self.queue_lengths, self.waiting_times, self.total_vehicles_passed)
+
+
+def network_metrics(avg_queue, avg_wait, throughput, total_queue, total_wait):
+    """Metric formulas shared by every simulator (scalars, or per-step arrays)"""
+    return {
+        'avg_travel_time': 80 + avg_queue * 2 + avg_wait * 1.5,
+        'avg_queue_length': avg_queue,
+        'avg_waiting_time': 15 + avg_wait,
+        'avg_speed': np.maximum(0, 8 - avg_queue * 0.15),
+        'throughput': throughput,
+        'total_delay': total_queue * 10 + total_wait * 5
+    }
 
 
 class TrafficSimulator:
     """Simulator wrapper"""
-    def __init__(self, timeout):
-        self.engine = SyntheticSimulator(4)
+    def __init__(self, timeout, observation=None, streams=None, tape=None):
+        self.engine = SyntheticSimulator(4, observation, streams, tape)
         self.timeout = timeout
         self.step_count = 0
         print(f"Simulator: 4 intersections, {self.engine.action_space} phases")
@@ -86,6 +443,13 @@ class TrafficSimulator:
         states, rewards, _ = self.engine.step(actions)
         return states, rewards, self.step_count >= self.timeout
     
+    def step_many(self, actions, k):
+        """Up to k steps (never past the timeout) with the same actions; returns (states, per-step metrics, done)"""
+        k = min(k, self.timeout - self.step_count)
+        self.step_count += k
+        block = self.engine.step_many(actions, k)
+        return self.engine.get_states(), block, self.step_count >= self.timeout
+    
     def get_states(self):
         return self.engine.get_states()
     
@@ -0,0 +1,90 @@
+# ============================================================================
+# REPRODUCIBILITY TESTS (dtype policies, taped vs live traffic)
+# ============================================================================
+import numpy as np
+import pytest
+from random_streams import RandomStreams
+from simulators import DTYPE_POLICIES, SyntheticSimulator, TrafficTape, VectorizedSimulator, queue_rewards
+from utils import MODE_MAP, simulate
+
+NARROW_POLICIES = [name for name in DTYPE_POLICIES if name != 'wide']
+
+
+def run_synthetic(dtypes, steps=300, seed=5):
+    """Per-step states and metrics under random actions, mixing step() and step_many() blocks"""
+    sim = SyntheticSimulator(4, streams=RandomStreams(seed), dtypes=dtypes)
+    actions_rng = np.random.default_rng(0)
+    states, metrics = [sim.reset().copy()], []
+    t = 0
+    while t < steps:
+        actions = actions_rng.integers(0, 4, size=4)
+        k = int(actions_rng.integers(1, 20))
+        metrics.append(sim.step_many(actions, k))
+        for _ in range(k):
+            sim.step(actions)
+            metrics.append(sim.get_metrics())
+        states.append(sim.get_states().copy())
+        metrics.append(sim.get_rewards())
+        t += 2 * k
+    return states, metrics
+
+
+@pytest.mark.parametrize('dtypes', NARROW_POLICIES)
+def test_synthetic_dtype_policies_are_bit_identical(dtypes):
+    wide_states, wide_metrics = run_synthetic('wide')
+    states, metrics = run_synthetic(dtypes)
+    np.testing.assert_array_equal(np.array(states), np.array(wide_states))
+    for narrow, wide in zip(metrics, wide_metrics):
+        if isinstance(wide, dict):
+            for key in wide:
+                np.testing.assert_array_equal(narrow[key], wide[key], err_msg=key)
+        else:
+            np.testing.assert_array_equal(narrow, wide)
+
+
+@pytest.mark.parametrize('dtypes', NARROW_POLICIES)
+@pytest.mark.parametrize('options', [{}, {'transfer': 0.3}, {'demand': 0.02, 'active_set': True}])
+def test_vectorized_dtype_policies_are_bit_identical(dtypes, options):
+    runs = {}
+    for policy in ('wide', dtypes):
+        sim = VectorizedSimulator(64, RandomStreams(9), dtypes=policy, **options)
+        actions_rng = np.random.default_rng(1)
+        trace = []
+        for _ in range(200):
+            sim.step(actions_rng.integers(0, 4, size=64))
+            trace.append((sim.get_states().copy(), sim.get_rewards(), sim.get_metrics()))
+        runs[policy] = trace
+    for (states, rewards, metrics), (wide_states, wide_rewards, wide_metrics) in zip(runs[dtypes], runs['wide']):
+        np.testing.assert_array_equal(states, wide_states)
+        np.testing.assert_array_equal(rewards, wide_rewards)
+        assert metrics == wide_metrics
+
+
+def test_active_set_rewards_match_every_row():
+    sim = VectorizedSimulator(500, RandomStreams(4), transfer=0.3, demand=0.01, active_set=True)
+    actions_rng = np.random.default_rng(2)
+    for _ in range(100):
+        sim.step(actions_rng.integers(0, 4, size=500))
+        np.testing.assert_array_equal(sim.get_rewards(), queue_rewards(sim.queue_lengths, sim.waiting_times))
+    assert len(sim.active) < 500
+
+
+def test_vectorized_traffic_ignores_actions():
+    streams = {}
+    for phase in range(2):
+        sim = VectorizedSimulator(64, RandomStreams(5), transfer=0.3)
+        for _ in range(50):
+            sim.step(np.full(64, phase))
+        streams[phase] = {name: sim.streams[name].bit_generator.state for name in ('arrivals', 'service')}
+    assert streams[0] == streams[1]
+
+
+@pytest.mark.parametrize('mode', ['fixed', 'maxpressure', 'fuzzy', 'pso'])
+def test_taped_traffic_matches_live(mode, tmp_path):
+    _, controller_class = MODE_MAP[mode]
+    live, _, _ = simulate(controller_class, 300, seed=21)
+    taped, _, _ = simulate(controller_class, 300, tape=TrafficTape.record(21, 300))
+    TrafficTape.record(21, 300, out_dir=tmp_path)
+    mapped, _, _ = simulate(controller_class, 300, seed=21, tape=TrafficTape.load(tmp_path))
+    assert taped == live
+    assert mapped == live
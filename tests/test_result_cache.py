@@ -0,0 +1,32 @@
+# ============================================================================
+# RESULT CACHE KEY TESTS
+# ============================================================================
+import shutil
+import pytest
+import result_cache
+from result_cache import RUN_PATH_MODULES, ResultCache
+from utils import MODE_MAP
+
+
+@pytest.mark.parametrize('module', RUN_PATH_MODULES)
+def test_editing_a_run_path_module_changes_the_key(module, tmp_path, monkeypatch):
+    for name in RUN_PATH_MODULES:
+        shutil.copy(result_cache.REPO_ROOT / f'{name}.py', tmp_path)
+    monkeypatch.setattr(result_cache, 'REPO_ROOT', tmp_path)
+    cache = ResultCache(tmp_path / 'cache')
+    _, controller_class = MODE_MAP['fixed']
+    before = cache.key(controller_class, 100, 0)
+    assert cache.key(controller_class, 100, 0) == before
+
+    with open(tmp_path / f'{module}.py', 'a') as f:
+        f.write('\n# edited\n')
+    assert cache.key(controller_class, 100, 0) != before
+
+
+def test_key_does_not_depend_on_other_loaded_controllers(tmp_path):
+    cache = ResultCache(tmp_path)
+    _, controller_class = MODE_MAP['fixed']
+    before = cache.key(controller_class, 100, 0)
+    for mode in MODE_MAP:
+        MODE_MAP[mode]
+    assert cache.key(controller_class, 100, 0) == before
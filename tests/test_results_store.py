@@ -0,0 +1,13 @@
+# ============================================================================
+# RESULTS STORE TESTS
+# ============================================================================
+from results_store import ResultsStore
+
+
+def test_latest_run_skips_empty_runs(tmp_path):
+    store = ResultsStore(tmp_path / 'results.db')
+    store.add_run('20260101_000000', created='2026-01-01T00:00:00')
+    store.add_result('20260101_000000', 'Fixed-Time', {'avg_travel_time': 700.0})
+    store.add_run('20260102_000000', created='2026-01-02T00:00:00')  # interrupted before any result
+    assert store.latest_run_id() == '20260101_000000'
+    store.close()
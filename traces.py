@@ -0,0 +1,117 @@
+# ============================================================================
+# PER-STEP TRACES (recording + bounded-memory reduction for plotting)
+# ============================================================================
+import json
+import numpy as np
+from pathlib import Path
+
+# Rows reduced per chunk when summarizing; bounds memory regardless of trace length
+CHUNK_ROWS = 1 << 18
+# Longest green period tracked individually in the histogram; longer ones land in the last bin
+MAX_GREEN_BIN = 200
+
+
+class TraceRecorder:
+    """
+    Streams per-step queue and phase traces to .npy memmaps on disk.
+    queue.npy:  (steps, N) float32 total queue per intersection after the step
+    phases.npy: (steps, N) int8 phase served at each intersection
+    """
+
+    def __init__(self, out_dir, steps, num_intersections):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.queue = np.lib.format.open_memmap(self.out_dir / 'queue.npy', mode='w+',
+                                               dtype=np.float32, shape=(steps, num_intersections))
+        self.phases = np.lib.format.open_memmap(self.out_dir / 'phases.npy', mode='w+',
+                                                dtype=np.int8, shape=(steps, num_intersections))
+        self.steps = 0
+
+    def record(self, states, actions):
+        self.queue[self.steps] = np.sum(states, axis=1)
+        self.phases[self.steps] = actions
+        self.steps += 1
+
+    def close(self, **meta):
+        self.queue.flush()
+        self.phases.flush()
+        with open(self.out_dir / 'meta.json', 'w') as f:
+            json.dump({'steps': self.steps, 'num_intersections': int(self.queue.shape[1]), **meta}, f, indent=2)
+        del self.queue, self.phases
+
+
+def load_trace(trace_dir):
+    """Memory-mapped (queue, phases, meta) for a recorded trace"""
+    trace_dir = Path(trace_dir)
+    with open(trace_dir / 'meta.json') as f:
+        meta = json.load(f)
+    steps = meta['steps']  # runs that ended early leave unused rows at the end
+    queue = np.load(trace_dir / 'queue.npy', mmap_mode='r')[:steps]
+    phases = np.load(trace_dir / 'phases.npy', mmap_mode='r')[:steps]
+    return queue, phases, meta
+
+
+def summarize_trace(queue, phases, buckets=2000, chunk_rows=CHUNK_ROWS):
+    """
+    One chunked pass over a (steps, N) trace, reduced to at most `buckets` time bins:
+    - min/max/mean of the network-average queue per bin (min/max decimation keeps spikes)
+    - mean queue per intersection per bin (heatmap)
+    - phase switches per step per bin, and total switches per intersection
+    - histogram of green-period durations
+    """
+    steps, n = queue.shape
+    bucket = max(1, -(-steps // buckets))
+    n_buckets = -(-steps // bucket)
+    chunk_rows = max(bucket, chunk_rows // bucket * bucket)  # chunks hold whole bins
+
+    q_min = np.empty(n_buckets)
+    q_max = np.empty(n_buckets)
+    q_mean = np.empty(n_buckets)
+    heat = np.empty((n_buckets, n), dtype=np.float32)
+    switch_rate = np.zeros(n_buckets)
+    switches = np.zeros(n, dtype=np.int64)
+    green_hist = np.zeros(MAX_GREEN_BIN + 1, dtype=np.int64)
+
+    prev_phase = None
+    last_switch = np.zeros(n, dtype=np.int64)  # step at which the current green started
+
+    for start in range(0, steps, chunk_rows):
+        stop = min(start + chunk_rows, steps)
+        q = np.asarray(queue[start:stop], dtype=np.float64)
+        p = np.asarray(phases[start:stop])
+        edges = np.arange(0, stop - start, bucket)
+        b0 = start // bucket
+        b1 = b0 + len(edges)
+
+        net = q.mean(axis=1)
+        q_min[b0:b1] = np.minimum.reduceat(net, edges)
+        q_max[b0:b1] = np.maximum.reduceat(net, edges)
+        counts = np.diff(np.append(edges, stop - start))
+        q_mean[b0:b1] = np.add.reduceat(net, edges) / counts
+        heat[b0:b1] = np.add.reduceat(q, edges, axis=0) / counts[:, None]
+
+        # Phase switches, carrying the previous row across chunk boundaries
+        prev = p[:1] if prev_phase is None else prev_phase[None, :]
+        changed = np.vstack([prev, p[:-1]]) != p
+        switch_rate[b0:b1] = np.add.reduceat(changed.sum(axis=1), edges) / (counts * n)
+        switches += changed.sum(axis=0)
+
+        # Green durations: gaps between consecutive switches of the same intersection
+        cols, rows = np.nonzero(changed.T)  # grouped by intersection, steps ascending
+        if len(cols):
+            at = start + rows
+            first = np.r_[True, cols[1:] != cols[:-1]]
+            last = np.r_[cols[1:] != cols[:-1], True]
+            prev_at = np.r_[0, at[:-1]]
+            prev_at[first] = last_switch[cols[first]]
+            green_hist += np.bincount(np.minimum(at - prev_at, MAX_GREEN_BIN), minlength=MAX_GREEN_BIN + 1)
+            last_switch[cols[last]] = at[last]
+        prev_phase = p[-1].copy()
+
+    return {
+        'steps': steps, 'bucket': bucket,
+        't': np.arange(n_buckets) * bucket + bucket / 2,
+        'queue_min': q_min, 'queue_max': q_max, 'queue_mean': q_mean,
+        'heat': heat, 'switch_rate': switch_rate, 'switches': switches,
+        'green_hist': green_hist
+    }
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter Sweep Engine for Traffic Signal Controllers
+Grid / random search over controller constants with successive halving
+
+Run: python tuning.py --mode maxpressure --budget 27 --seeds 0..8
+     python tuning.py --mode ultimate --space my_space.json --strategy grid
+"""
+
+import argparse
+import csv
+import inspect
+import itertools
+import json
+import math
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from results_store import ResultsStore
+from utils import MODE_MAP, parse_seeds, _run_seed_job
+
+# ============================================================================
+# SEARCH SPACES
+# ============================================================================
+# A space maps parameter name -> either a list of choices (grid axis) or a
+# range dict {"low", "high", "type": "int"|"float", "log": bool}. A range may also
+# name another parameter under "at_least"; candidates below it are not generated.
+
+DEFAULT_SPACES = {
+    'maxpressure': {
+        'min_green': {'low': 4, 'high': 20, 'type': 'int'},
+        'max_green': {'low': 25, 'high': 90, 'type': 'int'}
+    },
+    'supermaxpressure': {
+        'switch_ratio': {'low': 1.0, 'high': 1.5, 'type': 'float'},
+        'max_green': {'low': 10, 'high': 60, 'type': 'int'}
+    },
+    # Within the controller's PARAM_BOUNDS (out-of-range overrides are rejected)
+    'ultimate': {
+        'pressure_weight': {'low': 0.2, 'high': 0.9, 'type': 'float'},
+        'fuzzy_weight': {'low': 0.2, 'high': 0.8, 'type': 'float'},
+        'min_green': {'low': 5, 'high': 15, 'type': 'float'},
+        'max_green': {'low': 30, 'high': 60, 'type': 'float'}
+    },
+    'fuzzy': {
+        'base_green': {'low': 10, 'high': 40, 'type': 'float'},
+        'queue_low': {'low': 5, 'high': 15, 'type': 'float'},
+        'queue_high': {'low': 10, 'high': 25, 'type': 'float', 'at_least': 'queue_low'}
+    }
+}
+
+# Metrics where larger is better; everything else is minimized
+MAXIMIZE = {'throughput', 'avg_speed'}
+
+
+def _grid_axis(spec, points):
+    """Discretize one parameter for grid search"""
+    if isinstance(spec, list):
+        return spec
+    if spec.get('type') == 'int':
+        return sorted(set(np.linspace(spec['low'], spec['high'], points).round().astype(int).tolist()))
+    if spec.get('log'):
+        return np.geomspace(spec['low'], spec['high'], points).tolist()
+    return np.linspace(spec['low'], spec['high'], points).tolist()
+
+
+def _sample(spec, rng):
+    """Draw one value for random search"""
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    if spec.get('log'):
+        value = float(np.exp(rng.uniform(np.log(spec['low']), np.log(spec['high']))))
+    else:
+        value = float(rng.uniform(spec['low'], spec['high']))
+    return int(round(value)) if spec.get('type') == 'int' else value
+
+
+def _feasible(cand, space):
+    """False if the candidate inverts an ordered pair (a parameter below its "at_least")"""
+    return all(cand[name] >= cand[spec['at_least']] for name, spec in space.items()
+               if isinstance(spec, dict) and 'at_least' in spec)
+
+
+def generate_candidates(space, budget, strategy='random', seed=0, grid_points=5):
+    """Build at most `budget` parameter dicts from a search space"""
+    rng = np.random.default_rng(seed)
+    names = sorted(space)
+    if strategy == 'grid':
+        axes = [_grid_axis(space[n], grid_points) for n in names]
+        grid = [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+        grid = [cand for cand in grid if _feasible(cand, space)]
+        if len(grid) > budget:
+            # Budget smaller than the grid: evaluate a random subset of it
+            grid = [grid[i] for i in sorted(rng.choice(len(grid), budget, replace=False))]
+        return grid
+
+    candidates, seen = [], set()
+    for _ in range(budget * 20):
+        if len(candidates) >= budget:
+            break
+        cand = {n: _sample(space[n], rng) for n in names}
+        key = tuple(cand[n] for n in names)
+        if key not in seen and _feasible(cand, space):
+            seen.add(key)
+            candidates.append(cand)
+    return candidates
+
+
+def controller_kwargs(controller_class, params):
+    """Map flat parameters onto the controller constructor"""
+    accepted = inspect.signature(controller_class).parameters
+    if all(name in accepted for name in params):
+        return dict(params)
+    if 'params' in accepted:
+        # Fuzzy-style controllers take their tunables as one params dict
+        return {'params': dict(params)}
+    unknown = [name for name in params if name not in accepted]
+    raise ValueError(f"{controller_class.__name__} does not accept parameters: {unknown}")
+
+
+# ============================================================================
+# SUCCESSIVE HALVING SWEEP
+# ============================================================================
+
+class HyperparameterSweep:
+    """
+    Evaluates candidates on a growing ensemble of seeds.
+    Each rung runs the survivors on eta x more seeds and keeps the best 1/eta,
+    so losers are cut after only a few cheap runs.
+    """
+
+    def __init__(self, mode, space, seeds, timeout, metric='avg_travel_time',
+                 eta=3, min_seeds=None, halving=True, workers=None):
+        self.mode = mode
+        self.name, self.controller_class = MODE_MAP[mode]
+        self.space = space
+        self.seeds = list(seeds)
+        self.timeout = timeout
+        self.metric = metric
+        self.eta = eta
+        self.halving = halving
+        self.min_seeds = min_seeds or max(1, len(self.seeds) // eta ** 2)
+        self.workers = workers or os.cpu_count() or 1
+        self.scores = {}  # (candidate id, seed) -> metrics
+
+    def _score(self, cid, seeds):
+        """Mean objective over seeds, signed so that lower is always better"""
+        values = [self.scores[(cid, s)][self.metric] for s in seeds]
+        mean = float(np.mean(values))
+        return -mean if self.metric in MAXIMIZE else mean
+
+    def _evaluate(self, pool, candidates, cids, seeds):
+        """Run every (candidate, seed) pair not evaluated yet"""
+        jobs = {}
+        for cid in cids:
+            kwargs = controller_kwargs(self.controller_class, candidates[cid])
+            for seed in seeds:
+                if (cid, seed) not in self.scores:
+                    job = (cid, self.controller_class, seed, self.timeout, kwargs, None)
+                    jobs[pool.submit(_run_seed_job, job)] = (cid, seed)
+        for future in as_completed(jobs):
+            cid, seed, final, _ = future.result()
+            self.scores[(cid, seed)] = {k: float(v) for k, v in final.items()}
+        return len(jobs)
+
+    def rung_schedule(self):
+        """Number of seeds used at each rung, ending with the full ensemble"""
+        if not self.halving:
+            return [len(self.seeds)]
+        schedule, n = [], self.min_seeds
+        while n < len(self.seeds):
+            schedule.append(n)
+            n *= self.eta
+        return schedule + [len(self.seeds)]
+
+    def run(self, candidates):
+        print(f"\n{'='*60}\nSWEEP {self.name.upper()} - {len(candidates)} candidates, "
+              f"{len(self.seeds)} seeds, {self.workers} workers\n{'='*60}")
+        start = time.time()
+        alive = list(range(len(candidates)))
+        reached = {cid: 0 for cid in alive}
+        total_runs = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            schedule = self.rung_schedule()
+            for rung, n_seeds in enumerate(schedule):
+                seeds = self.seeds[:n_seeds]
+                total_runs += self._evaluate(pool, candidates, alive, seeds)
+                for cid in alive:
+                    reached[cid] = rung
+                alive.sort(key=lambda cid: self._score(cid, seeds))
+                best = self._score(alive[0], seeds)
+                print(f"Rung {rung}: {len(alive):>4} candidates x {n_seeds:>3} seeds | "
+                      f"best {self.metric} = {abs(best):.2f} | {time.time() - start:.1f}s")
+                if rung < len(schedule) - 1:
+                    alive = alive[:max(1, math.ceil(len(alive) / self.eta))]
+
+        leaderboard = []
+        for cid, params in enumerate(candidates):
+            seeds = [s for s in self.seeds if (cid, s) in self.scores]
+            values = [self.scores[(cid, s)][self.metric] for s in seeds]
+            leaderboard.append({
+                'candidate': cid, 'rung': reached[cid], 'seeds': len(seeds),
+                self.metric: float(np.mean(values)),
+                'std': float(np.std(values)),
+                'params': params
+            })
+        # Survivors of later rungs rank above anything cut earlier
+        sign = -1 if self.metric in MAXIMIZE else 1
+        leaderboard.sort(key=lambda r: (-r['rung'], sign * r[self.metric]))
+
+        full_runs = len(candidates) * len(self.seeds)
+        print(f"\nSweep finished in {time.time() - start:.1f}s: {total_runs} runs "
+              f"({total_runs / full_runs * 100:.0f}% of exhaustive {full_runs})")
+        return leaderboard
+
+    def record(self, store, run_id, candidates):
+        """Append every evaluated (candidate, seed) run to the results store"""
+        store.add_run(run_id, kind='tuning', mode=self.mode, timeout=self.timeout,
+                      args={'metric': self.metric, 'eta': self.eta, 'space': self.space})
+        rows = [{'method': self.name, 'seed': seed, 'params': candidates[cid], 'metrics': metrics}
+                for (cid, seed), metrics in sorted(self.scores.items())]
+        return store.add_results(run_id, rows)
+
+    def save(self, leaderboard, out_dir):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / 'leaderboard.json', 'w') as f:
+            json.dump({'mode': self.mode, 'method': self.name, 'metric': self.metric,
+                       'timeout': self.timeout, 'seeds': self.seeds, 'space': self.space,
+                       'leaderboard': leaderboard}, f, indent=2)
+        param_names = sorted(self.space)
+        with open(out_dir / 'leaderboard.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['rank', 'candidate', 'rung', 'seeds', self.metric, 'std'] + param_names)
+            for rank, row in enumerate(leaderboard, 1):
+                writer.writerow([rank, row['candidate'], row['rung'], row['seeds'],
+                                 f"{row[self.metric]:.4f}", f"{row['std']:.4f}"] +
+                                [row['params'].get(n) for n in param_names])
+
+
+def print_leaderboard(leaderboard, metric, top=10):
+    param_names = sorted(leaderboard[0]['params']) if leaderboard else []
+    print(f"\n{'='*100}\nLEADERBOARD (top {min(top, len(leaderboard))} by {metric})\n{'='*100}")
+    print(f"{'Rank':<6}{'Rung':<6}{'Seeds':<7}{metric:<18}{'Std':<10}Params")
+    print("-"*100)
+    for rank, row in enumerate(leaderboard[:top], 1):
+        params = ', '.join(f"{n}={row['params'][n]:.3g}" if isinstance(row['params'][n], float)
+                           else f"{n}={row['params'][n]}" for n in param_names)
+        symbol = "🏆" if rank == 1 else ""
+        print(f"{rank:<6}{row['rung']:<6}{row['seeds']:<7}{row[metric]:<18.2f}{row['std']:<10.2f}{params} {symbol}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hyperparameter sweep for TSC controllers')
+    parser.add_argument('--mode', '-m', choices=sorted(MODE_MAP), required=True, help='Controller to tune')
+    parser.add_argument('--space', type=str, default=None,
+                       help='JSON search space file (default: built-in space for the mode)')
+    parser.add_argument('--strategy', choices=['random', 'grid'], default='random')
+    parser.add_argument('--budget', type=int, default=27, help='Number of candidates')
+    parser.add_argument('--grid-points', type=int, default=5, help='Points per axis for ranged grid params')
+    parser.add_argument('--seeds', type=str, default='0..8', help="Seed ensemble, e.g. '0..8'")
+    parser.add_argument('--timeout', '-t', type=int, default=1000, help='Simulation steps per run')
+    parser.add_argument('--metric', type=str, default='avg_travel_time', help='Objective metric')
+    parser.add_argument('--eta', type=int, default=3, help='Halving rate (keep 1/eta per rung)')
+    parser.add_argument('--min-seeds', type=int, default=None, help='Seeds used at the first rung')
+    parser.add_argument('--no-halving', action='store_true', help='Evaluate every candidate on all seeds')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--search-seed', type=int, default=0, help='Seed for candidate sampling')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    elif args.mode in DEFAULT_SPACES:
+        space = DEFAULT_SPACES[args.mode]
+    else:
+        print(f"❌ Error: no built-in search space for '{args.mode}', pass --space")
+        return
+
+    candidates = generate_candidates(space, args.budget, args.strategy, args.search_seed, args.grid_points)
+    sweep = HyperparameterSweep(args.mode, space, parse_seeds(args.seeds), args.timeout,
+                                metric=args.metric, eta=args.eta, min_seeds=args.min_seeds,
+                                halving=not args.no_halving, workers=args.workers)
+    leaderboard = sweep.run(candidates)
+    print_leaderboard(leaderboard, args.metric)
+
+    run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{args.mode}"
+    out_dir = Path('tuning') / run_id
+    sweep.save(leaderboard, out_dir)
+    store = ResultsStore()
+    stored = sweep.record(store, store.unique_run_id(f'tune_{run_id}'), candidates)
+    store.close()
+    print(f"\n📁 Leaderboard saved to: {out_dir} ({stored} runs stored in {store.path})")
+
+
+if __name__ == '__main__':
+    main()
@@ -25,23 +25,8 @@ Run: python ultimate_tsc.py --mode comparison --timeout 5000
 """
 
 import argparse
-import json
-import time
-import random
-import numpy as np
-from datetime import datetime
-from pathlib import Path
-from collections import defaultdict
-from controllers.fixed_time_controller import FixedTimeController
-from controllers.max_pressure_controller import MaxPressureController
-from controllers.super_max_pressure_controller import SuperMaxPressureController
-from controllers.longest_queue_first_controller import LongestQueueFirstController
-from controllers.fuzzy_webster_controller import FuzzyWebsterController
-from controllers.ga_fuzzy_webster_controller import GAFuzzyWebsterController
-from controllers.pso_fuzzy_webster_controller import PSOFuzzyWebsterController
-from controllers.ultimate_hybrid_controller import UltimateHybridController
-from simulators import SyntheticSimulator, TrafficSimulator
-from utils import ExperimentRunner, MetricsCalculator
+from controllers import BASELINE_MODE
+from utils import ExperimentRunner, MODE_MAP, comparison_methods, parse_seeds
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -53,43 +38,79 @@ def parse_args():
 Examples:
   python ultimate_tsc.py --mode comparison --timeout 5000
   python ultimate_tsc.py --mode ultimate --timeout 3000
+  python ultimate_tsc.py --mode comparison --timeout 2000 --seeds 0..99
         """
     )
-    parser.add_argument('--mode', '-m', choices=['fixed', 'maxpressure', 'supermaxpressure', 'longestqueue', 
-                                                  'fuzzy', 'ga', 'pso', 'ultimate', 'comparison'],
+    parser.add_argument('--mode', '-m', choices=list(MODE_MAP) + ['comparison'],
                        default='comparison', help='Method to run')
     parser.add_argument('--timeout', '-t', type=int, default=5000, help='Simulation steps')
     parser.add_argument('--log-interval', type=int, default=250, help='Log interval')
     parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--seeds', type=str, default=None,
+                       help="Seed sweep, e.g. '0..99' or '1,2,3' (runs every method x seed)")
+    parser.add_argument('--trace', action='store_true',
+                       help='Record per-step queue/phase traces under results/<run>/traces/')
+    parser.add_argument('--event-driven', action='store_true',
+                       help='Only ask controllers about intersections whose decision can change')
+    parser.add_argument('--wake-threshold', type=float, default=None,
+                       help='With --event-driven: also park held intersections until their queue '
+                            'moves by more than this (approximate)')
+    parser.add_argument('--fast-forward', action='store_true',
+                       help='Simulate stretches where no decision can change in one vectorized block '
+                            '(implies --event-driven; results are identical)')
+    parser.add_argument('--surrogate', action='store_true',
+                       help='GA/PSO/ULTIMATE: skip evaluation windows for parameter sets a regression '
+                            'surrogate predicts to be poor')
+    parser.add_argument('--genome', type=str, default=None,
+                       help='GA: deploy a genome saved by island_ga.py (e.g. models/ga_island.json)')
+    parser.add_argument('--optimizer', choices=['ga', 'pso', 'cmaes'], default=None,
+                       help='GA/PSO/ULTIMATE: parameter search backend (default: each method\'s own)')
+    parser.add_argument('--per-intersection', action='store_true',
+                       help='GA/PSO/ULTIMATE: tune a separate parameter set for every intersection, '
+                            'each scored on its own queues')
+    parser.add_argument('--warm-start', nargs='?', const='state', choices=['state', 'params'], default=None,
+                       help='GA/PSO/ULTIMATE: resume from the learned state stored for this scenario '
+                            '(seed + options) and store the new one after the run; \'params\' '
+                            'restarts the search around the stored best only')
+    parser.add_argument('--param-store', type=str, default=None,
+                       help='Warm-start store (default: models/warm_start.json)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Rerun every method instead of reusing cached results for identical '
+                            '(code, parameters, seed, timeout)')
+    parser.add_argument('--cache-mb', type=float, default=64,
+                       help='Size cap of the result cache in results/cache/ (least recently used evicted)')
+    parser.add_argument('--traffic-cache', choices=['memory', 'disk'], default='memory',
+                       help='Where each seed\'s pre-generated traffic is kept; disk memory-maps it '
+                            'under results/<run>/traffic/ so sweep workers share one copy')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for --seeds (default: all CPUs)')
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    np.random.seed(args.seed)
-    random.seed(args.seed)
     
     print("="*80)
     print("ULTIMATE TRAFFIC SIGNAL CONTROL SYSTEM")
     print("ALL State-of-the-Art Methods - Head-to-Head Comparison!")
     print("="*80)
-    print(f"Mode: {args.mode.upper()} | Timeout: {args.timeout} | Seed: {args.seed}\n")
+    seeds = parse_seeds(args.seeds) if args.seeds else None
+    seed_info = f"Seeds: {args.seeds} ({len(seeds)})" if seeds else f"Seed: {args.seed}"
+    print(f"Mode: {args.mode.upper()} | Timeout: {args.timeout} | {seed_info}\n")
     
     runner = ExperimentRunner(args)
     
-    mode_map = {
-        'fixed': ('Fixed-Time', FixedTimeController),
-        'maxpressure': ('Max-Pressure', MaxPressureController),
-        'supermaxpressure': ('Super-Max-Pressure', SuperMaxPressureController),
-        'longestqueue': ('Longest-Queue', LongestQueueFirstController),
-        'fuzzy': ('Fuzzy-Webster', FuzzyWebsterController),
-        'ga': ('GA-Fuzzy-Webster', GAFuzzyWebsterController),
-        'pso': ('PSO-Fuzzy-Webster', PSOFuzzyWebsterController),
-        'ultimate': ('ULTIMATE-HYBRID', UltimateHybridController)
-    }
-    
-    if args.mode in mode_map:
-        runner.run_method(*mode_map[args.mode])
+    if seeds:
+        if args.mode == 'comparison':
+            methods = comparison_methods()
+        else:
+            # Always sweep the baseline too so the paired tests have a reference
+            methods = [MODE_MAP[BASELINE_MODE]]
+            if args.mode != BASELINE_MODE:
+                methods.append(MODE_MAP[args.mode])
+        runner.run_seed_sweep(methods, seeds, args.workers)
+    elif args.mode in MODE_MAP:
+        runner.run_method(*MODE_MAP[args.mode])
     elif args.mode == 'comparison':
         runner.run_comparison()
     
@@ -1,18 +1,31 @@
 import numpy as np
-import json
+import contextlib
+import inspect
+import io
+import os
 import time
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
-from controllers.fixed_time_controller import FixedTimeController
-from controllers.max_pressure_controller import MaxPressureController
-from controllers.super_max_pressure_controller import SuperMaxPressureController
-from controllers.longest_queue_first_controller import LongestQueueFirstController
-from controllers.fuzzy_webster_controller import FuzzyWebsterController
-from controllers.ga_fuzzy_webster_controller import GAFuzzyWebsterController
-from controllers.pso_fuzzy_webster_controller import PSOFuzzyWebsterController
-from controllers.ultimate_hybrid_controller import UltimateHybridController
-from simulators import TrafficSimulator
+from controllers import BASELINE_MODE, COMPARISON_MODES, ControllerRegistry, display_name
+from simulators import TrafficSimulator, TrafficTape
+from results_store import ResultsStore
+from traces import TraceRecorder
+from decision_scheduler import DecisionScheduler
+from random_streams import RandomStreams
+from result_cache import ResultCache
+
+# --mode name -> (display name, controller class); controller modules are imported on lookup
+MODE_MAP = ControllerRegistry()
+BASELINE_METHOD = display_name(BASELINE_MODE)
+
+
+def comparison_methods():
+    """(display name, controller class) of every method in --mode comparison, baseline first"""
+    return [MODE_MAP[mode] for mode in COMPARISON_MODES]
+
+
+REPORT_METRICS = ['avg_travel_time', 'avg_queue_length', 'throughput', 'total_delay']
 
 # ============================================================================
 # METRICS & EXPERIMENT RUNNER
@@ -33,55 +46,304 @@ class MetricsCalculator:
             else:
                 self.totals[k] = v
     
+    def update_many(self, block):
+        """update() for every step of a step_many() block (metric -> per-step array)"""
+        for k, values in block.items():
+            values = values.tolist()
+            self.metrics[k].extend(values)
+            if k != 'throughput':
+                total = self.totals[k]
+                for v in values:
+                    total += v
+                self.totals[k] = total
+            else:
+                self.totals[k] = values[-1]
+        self.count += len(values)
+    
     def get_final(self):
         return {k: (v / self.count if k != 'throughput' else v) 
                 for k, v in self.totals.items()}
 
 
+def make_controller(controller_class, num_intersections, controller_kwargs=None, rng=None, flows=None):
+    """Instantiate a controller, handing it its own random stream and the lane flows if it takes them"""
+    kwargs = dict(controller_kwargs or {})
+    accepted = inspect.signature(controller_class).parameters
+    if rng is not None and 'rng' in accepted:
+        kwargs.setdefault('rng', rng)
+    if flows is not None and 'flows' in accepted:
+        kwargs.setdefault('flows', flows)
+    return controller_class(num_intersections, **kwargs)
+
+
+def simulate(controller_class, timeout, log_interval=None, controller_kwargs=None, trace_dir=None,
+             scheduler_kwargs=None, seed=None, tape=None, fast_forward=False):
+    """
+    Run one controller on a fresh simulator; returns (final metrics, elapsed, controller).
+    The same seed gives the same traffic for every controller; a TrafficTape replays
+    pre-generated traffic instead of drawing it.
+    scheduler_kwargs routes decisions through a DecisionScheduler (event-driven mode).
+    fast_forward runs every stretch in which no decision can change as one
+    step_many() call (implies event-driven mode; results are identical).
+    """
+    if seed is None and tape is not None:
+        seed = tape.seed
+    streams = RandomStreams(seed)
+    sim = TrafficSimulator(timeout, streams=streams, tape=tape)
+    controller = make_controller(controller_class, sim.engine.num_intersections, controller_kwargs,
+                                 streams['controller'], sim.engine.flow_rates)
+    scheduler = None
+    if fast_forward and scheduler_kwargs is None:
+        scheduler_kwargs = {}
+    if scheduler_kwargs is not None:
+        scheduler = DecisionScheduler(controller, sim.engine.num_intersections, **scheduler_kwargs)
+    decide = scheduler.get_actions if scheduler else controller.get_actions
+    metrics = MetricsCalculator()
+    trace = TraceRecorder(trace_dir, timeout, sim.engine.num_intersections) if trace_dir else None
+    start = time.time()
+    
+    states = sim.reset()
+    step = 0
+    
+    while step < timeout:
+        actions = decide(states)
+        hold = scheduler.hold_steps() if fast_forward and not trace else 1
+        if hold > 1:
+            states, block, done = sim.step_many(actions, hold)
+            steps = len(block['throughput'])
+            scheduler.fast_forward(steps - 1)
+            metrics.update_many(block)
+            if log_interval:
+                for t in range(-step % log_interval, steps, log_interval):
+                    _log_step(step + t, timeout, {k: v[t] for k, v in block.items()})
+            step += steps
+            if done:
+                break
+            continue
+        
+        states, _, done = sim.step(actions)
+        m = sim.get_metrics()
+        metrics.update(m)
+        if trace:
+            trace.record(states, actions)
+        
+        if log_interval and step % log_interval == 0:
+            _log_step(step, timeout, m)
+        
+        step += 1
+        if done:
+            break
+    
+    if trace:
+        trace.close(controller=controller_class.__name__)
+    if scheduler:
+        scheduler.flush()
+        c = scheduler.counters()
+        print(f"⏱  Decisions: {c['decisions']} asked, {c['skipped']} skipped, {c['early_wakes']} early wakes "
+              f"({c['call_reduction']:.1f}x fewer controller calls)")
+    return metrics.get_final(), time.time() - start, controller
+
+
+def _log_step(step, timeout, m):
+    print(f"Step {step}/{timeout} | Queue: {m['avg_queue_length']:.1f} | "
+          f"Travel: {m['avg_travel_time']:.0f}s")
+
+
+def format_param(value):
+    """A learned parameter: one value, or one per intersection"""
+    if isinstance(value, list):
+        return '[' + ', '.join(f"{v:.1f}" for v in value) + ']'
+    return f"{value:.1f}"
+
+
+def _run_seed_job(job):
+    """
+    Process-pool worker: one (method, seed) run; simulate() seeds every random stream from seed.
+    tape_dir, if set, is that seed's traffic recorded on disk (memory-mapped, shared by all jobs)
+    """
+    name, controller_class, seed, timeout, controller_kwargs, tape_dir = job
+    tape = TrafficTape.load(tape_dir) if tape_dir else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        final, elapsed, _ = simulate(controller_class, timeout, controller_kwargs=controller_kwargs, seed=seed,
+                                     tape=tape)
+    return name, seed, final, elapsed
+
+
+def parse_seeds(text):
+    """Parse '0..99' (inclusive range), '1,2,5' or '7' into a list of seeds"""
+    seeds = []
+    for part in text.split(','):
+        part = part.strip()
+        if '..' in part:
+            lo, hi = part.split('..')
+            seeds.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            seeds.append(int(part))
+    if not seeds:
+        raise ValueError(f"No seeds in {text!r}")
+    return seeds
+
+
+class SeedSweepResults:
+    """Collects per-seed final metrics and computes sweep statistics"""
+    
+    def __init__(self, methods, baseline=BASELINE_METHOD, confidence=0.95, resamples=10000):
+        self.methods = list(methods)
+        self.baseline = baseline
+        self.confidence = confidence
+        self.resamples = resamples
+        self.runs = defaultdict(dict)  # method -> seed -> metrics
+        self.times = defaultdict(dict)
+    
+    def add(self, name, seed, metrics, elapsed):
+        self.runs[name][seed] = {k: float(v) for k, v in metrics.items()}
+        self.times[name][seed] = float(elapsed)
+    
+    def bootstrap_ci(self, values, rng):
+        """Percentile bootstrap confidence interval of the mean"""
+        if len(values) < 2:
+            return float(values[0]), float(values[0])
+        idx = rng.integers(0, len(values), size=(self.resamples, len(values)))
+        means = values[idx].mean(axis=1)
+        alpha = (1 - self.confidence) / 2
+        return float(np.quantile(means, alpha)), float(np.quantile(means, 1 - alpha))
+    
+    def paired_test(self, diffs, rng):
+        """Two-sided paired sign-flip permutation test of mean(diffs) == 0"""
+        n = len(diffs)
+        if n < 2 or np.all(diffs == 0):
+            return 1.0
+        observed = abs(diffs.mean())
+        if n <= 16:
+            # Exact: enumerate all 2^n sign assignments
+            signs = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1) * 2 - 1
+        else:
+            signs = rng.choice([-1, 1], size=(self.resamples, n))
+        flipped = np.abs((signs * diffs).mean(axis=1))
+        return float(np.mean(flipped >= observed - 1e-12))
+    
+    def summarize(self):
+        """Mean, CI and paired test against the baseline for every method/metric"""
+        rng = np.random.default_rng(0)  # fixed so reports are reproducible
+        summary = {}
+        base = self.runs.get(self.baseline, {})
+        for name in self.methods:
+            seeds = sorted(self.runs[name])
+            entry = {'n': len(seeds), 'mean': {}, 'ci': {}, 'p_value': {}, 'improvement': {},
+                     'time': float(np.mean([self.times[name][s] for s in seeds]))}
+            paired = [s for s in seeds if s in base]
+            for metric in self.runs[name][seeds[0]]:
+                values = np.array([self.runs[name][s][metric] for s in seeds])
+                entry['mean'][metric] = float(values.mean())
+                entry['ci'][metric] = self.bootstrap_ci(values, rng)
+                if name == self.baseline or not paired:
+                    continue
+                ours = np.array([self.runs[name][s][metric] for s in paired])
+                theirs = np.array([base[s][metric] for s in paired])
+                entry['p_value'][metric] = self.paired_test(ours - theirs, rng)
+                if theirs.mean() > 0:
+                    sign = 1 if metric == 'throughput' else -1
+                    entry['improvement'][metric] = float(sign * (ours.mean() - theirs.mean()) / theirs.mean() * 100)
+            summary[name] = entry
+        return summary
+    
+    def rows(self):
+        """Per-seed results in ResultsStore.add_results format"""
+        for name in self.methods:
+            for seed, metrics in sorted(self.runs[name].items()):
+                yield {'method': name, 'seed': seed, 'metrics': metrics,
+                       'elapsed': self.times[name][seed]}
+
+
 class ExperimentRunner:
-    def __init__(self, args):
+    def __init__(self, args, store=None, cache=None):
         self.args = args
-        self.results_dir = Path('results') / datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.store = store or ResultsStore()
+        if cache is None and not getattr(args, 'no_cache', True):
+            cache = ResultCache(max_mb=getattr(args, 'cache_mb', None) or 64)
+        self.cache = cache
+        self.run_id = self.store.unique_run_id(datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.results_dir = Path('results') / self.run_id  # plots for this run go here
+        kind = 'sweep' if getattr(args, 'seeds', None) else 'experiment'
+        self.store.add_run(self.run_id, kind=kind, mode=args.mode, timeout=args.timeout, args=vars(args))
+    
+    def controller_kwargs(self, controller_class, seed=None):
+        """Constructor options set on the command line that this controller accepts"""
+        accepted = inspect.signature(controller_class).parameters
+        kwargs = {}
+        if getattr(self.args, 'surrogate', False) and 'surrogate' in accepted:
+            kwargs['surrogate'] = True
+        if getattr(self.args, 'genome', None) and 'genome' in accepted:
+            from controllers.ga_fuzzy_webster_controller import load_genome
+            kwargs['genome'] = load_genome(self.args.genome)
+        if getattr(self.args, 'optimizer', None) and 'optimizer' in accepted:
+            kwargs['optimizer'] = self.args.optimizer
+        if getattr(self.args, 'per_intersection', False) and 'per_intersection' in accepted:
+            kwargs['per_intersection'] = True
+        if getattr(self.args, 'warm_start', None) and 'warm_start' in accepted:
+            from controllers.warm_start import load_state
+            state = load_state(self.warm_start_key(controller_class, seed), self.param_store())
+            if state:
+                # 'params' resumes from the learned parameters only, 'state' also from the population
+                search = state['optimizer']
+                if self.args.warm_start == 'params':
+                    search = {'keys': search['keys'], 'best': search['best']}
+                kwargs['warm_start'] = search
+        return kwargs or None
+    
+    def param_store(self):
+        from controllers.warm_start import DEFAULT_STORE
+        return getattr(self.args, 'param_store', None) or DEFAULT_STORE
+    
+    def warm_start_key(self, controller_class, seed=None):
+        from controllers.warm_start import scenario_key
+        return scenario_key(controller_class.__name__, self.args.seed if seed is None else seed,
+                            getattr(self.args, 'optimizer', None), getattr(self.args, 'per_intersection', False))
     
-    def run_method(self, name, controller_class):
+    def run_method(self, name, controller_class, tape=None):
         """Generic method runner"""
         print(f"\n{'='*60}\nRUNNING {name.upper()}\n{'='*60}")
         
-        sim = TrafficSimulator(self.args.timeout)
-        controller = controller_class(sim.engine.num_intersections)
-        metrics = MetricsCalculator()
-        start = time.time()
-        
-        states = sim.reset()
-        step = 0
-        
-        while step < self.args.timeout:
-            actions = controller.get_actions(states)
-            states, _, done = sim.step(actions)
-            m = sim.get_metrics()
-            metrics.update(m)
-            
-            if step % self.args.log_interval == 0:
-                print(f"Step {step}/{self.args.timeout} | Queue: {m['avg_queue_length']:.1f} | "
-                      f"Travel: {m['avg_travel_time']:.0f}s")
-            
-            step += 1
-            if done:
-                break
+        controller_kwargs = self.controller_kwargs(controller_class)
+        trace_dir = self.results_dir / 'traces' / name if getattr(self.args, 'trace', False) else None
+        scheduler_kwargs = None
+        fast_forward = getattr(self.args, 'fast_forward', False)
+        if getattr(self.args, 'event_driven', False) or fast_forward:
+            scheduler_kwargs = {'wake_threshold': getattr(self.args, 'wake_threshold', None)}
         
-        final = metrics.get_final()
-        elapsed = time.time() - start
+        # Traced and warm-start runs always execute: their output is the trace files / the stored state
+        use_cache = self.cache is not None and not trace_dir and not getattr(self.args, 'warm_start', None)
+        cached = None
+        if use_cache:
+            cache_key = self.cache.key(controller_class, self.args.timeout, self.args.seed,
+                                       scenario={'scheduler': scheduler_kwargs, 'controller': controller_kwargs})
+            cached = self.cache.get(cache_key)
+        if cached:
+            print(f"♻️  Cached result {cache_key[:12]} (use --no-cache to rerun)")
+            final, elapsed, params = cached['metrics'], cached['elapsed'], cached['learned_params']
+        else:
+            final, elapsed, controller = simulate(controller_class, self.args.timeout, self.args.log_interval,
+                                                  controller_kwargs=controller_kwargs, trace_dir=trace_dir, scheduler_kwargs=scheduler_kwargs,
+                                                  seed=self.args.seed, tape=tape, fast_forward=fast_forward)
+            params = controller.get_learned_params() if hasattr(controller, 'get_learned_params') else None
+            if getattr(self.args, 'warm_start', None) and hasattr(controller, 'get_learned_state'):
+                from controllers.warm_start import save_state
+                key = self.warm_start_key(controller_class)
+                save_state(key, controller.get_learned_state(), self.param_store())
+                print(f"💾 Learned state saved for warm starts: {key}")
+            if use_cache:
+                self.cache.put(cache_key, {'method': name, 'metrics': final, 'elapsed': elapsed,
+                                           'learned_params': params})
         
         print(f"\n{'-'*60}\n{name.upper()} RESULTS\n{'-'*60}")
         self._print_metrics(final, elapsed)
         
         # Show learned params if available
-        if hasattr(controller, 'get_learned_params'):
-            params = controller.get_learned_params()
+        if params:
             print(f"\n📚 Optimized Parameters:")
-            print(f"  Base Green: {params.get('base_green', 0):.1f}s")
-            print(f"  Queue Thresholds: {params.get('queue_low', 0):.1f} / {params.get('queue_high', 0):.1f}")
+            print(f"  Base Green: {format_param(params.get('base_green', 0))}s")
+            print(f"  Queue Thresholds: {format_param(params.get('queue_low', 0))} / "
+                  f"{format_param(params.get('queue_high', 0))}")
         
         self._save_results(name, final, elapsed)
         return final
@@ -90,19 +352,60 @@ class ExperimentRunner:
         """Run ALL methods and compare"""
         print(f"\n{'='*60}\nCOMPARATIVE EVALUATION - ALL METHODS\n{'='*60}")
         
+        # Generate the seed's traffic once and replay it to every method
+        tape = self.traffic_tape(self.args.seed)
         results = {}
-        results['Fixed-Time'] = self.run_method('Fixed-Time', FixedTimeController)
-        results['Max-Pressure'] = self.run_method('Max-Pressure', MaxPressureController)
-        results['Super-Max-Pressure'] = self.run_method('Super-Max-Pressure', SuperMaxPressureController)
-        results['Longest-Queue'] = self.run_method('Longest-Queue-First', LongestQueueFirstController)
-        results['Fuzzy-Webster'] = self.run_method('Fuzzy-Webster', FuzzyWebsterController)
-        results['GA-Fuzzy-Webster'] = self.run_method('GA-Fuzzy-Webster', GAFuzzyWebsterController)
-        results['PSO-Fuzzy-Webster'] = self.run_method('PSO-Fuzzy-Webster', PSOFuzzyWebsterController)
-        results['ULTIMATE-HYBRID'] = self.run_method('ULTIMATE-HYBRID', UltimateHybridController)
+        for name, controller_class in comparison_methods():
+            results[name] = self.run_method(name, controller_class, tape)
         
         print(f"\n{'='*80}\nFINAL COMPARISON - ALL METHODS\n{'='*80}")
         self._print_all_comparison(results)
     
+    def traffic_tape(self, seed):
+        """Record one seed's traffic; with --traffic-cache disk it is memory-mapped under results/<run>/traffic/"""
+        tape_dir = self._tape_dir(seed) if getattr(self.args, 'traffic_cache', 'memory') == 'disk' else None
+        return TrafficTape.record(seed, self.args.timeout, out_dir=tape_dir)
+    
+    def _tape_dir(self, seed):
+        return self.results_dir / 'traffic' / f'seed_{seed}'
+    
+    def run_seed_sweep(self, methods, seeds, workers=None):
+        """Run every method x seed combination in parallel and report statistics"""
+        # Without a disk cache each job regenerates its seed's traffic, which is identical anyway
+        tape_dirs = dict.fromkeys(seeds)
+        if getattr(self.args, 'traffic_cache', 'memory') == 'disk':
+            for seed in seeds:
+                self.traffic_tape(seed)
+                tape_dirs[seed] = self._tape_dir(seed)
+        jobs = [(name, controller_class, seed, self.args.timeout, self.controller_kwargs(controller_class, seed),
+                 tape_dirs[seed])
+                for name, controller_class in methods for seed in seeds]
+        # Imported here: only sweeps need worker processes, and the import is slow
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        workers = workers or os.cpu_count() or 1
+        print(f"\n{'='*60}\nSEED SWEEP - {len(methods)} methods x {len(seeds)} seeds "
+              f"({len(jobs)} runs, {workers} workers)\n{'='*60}")
+        
+        sweep = SeedSweepResults([name for name, _ in methods])
+        start = time.time()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_seed_job, job) for job in jobs]
+            for done, future in enumerate(as_completed(futures), 1):
+                name, seed, final, elapsed = future.result()
+                sweep.add(name, seed, final, elapsed)
+                print(f"[{done:>{len(str(len(jobs)))}}/{len(jobs)}] {name:<20} seed={seed:<6} "
+                      f"Travel: {final['avg_travel_time']:.0f}s | Queue: {final['avg_queue_length']:.1f} | "
+                      f"{elapsed:.2f}s")
+        
+        print(f"\nSweep finished in {time.time() - start:.2f}s")
+        summary = sweep.summarize()
+        self._print_sweep_summary(summary, seeds, sweep.confidence)
+        
+        # Every (method, seed) run is stored; plots and queries average over seeds
+        stored = self.store.add_results(self.run_id, sweep.rows())
+        print(f"📁 {stored} results stored in {self.store.path} (run {self.run_id})")
+        return summary
+    
     def _print_metrics(self, m, t):
         print(f"Avg Travel Time:  {m['avg_travel_time']:.2f}s")
         print(f"Avg Queue Length: {m['avg_queue_length']:.2f} vehicles")
@@ -161,18 +464,46 @@ class ExperimentRunner:
                 symbol = "✅" if imp > 0 else "❌"
                 print(f"  {metric:<20}: {imp:+7.2f}% {symbol}")
     
+    def _print_sweep_summary(self, summary, seeds, confidence):
+        """Print means with confidence intervals and paired tests vs Fixed-Time"""
+        conf = int(confidence * 100)
+        labels = {'avg_travel_time': 'Travel Time', 'avg_queue_length': 'Queue Len',
+                  'throughput': 'Throughput', 'total_delay': 'Delay'}
+        
+        print(f"\n{'='*120}\nSEED SWEEP SUMMARY - {len(seeds)} seeds, mean [{conf}% CI]\n{'='*120}")
+        print(f"{'Method':<20}" + ''.join(f" {labels[m]:<24}" for m in REPORT_METRICS))
+        print("-"*120)
+        
+        # Rank on seed-averaged values, same rank-sum scheme as the single run table
+        rankings = defaultdict(int)
+        for metric in REPORT_METRICS:
+            ordered = sorted(summary, key=lambda n: summary[n]['mean'][metric],
+                             reverse=(metric == 'throughput'))
+            for rank, name in enumerate(ordered):
+                rankings[name] += rank
+        
+        for name, _ in sorted(rankings.items(), key=lambda x: x[1]):
+            cells = []
+            for metric in REPORT_METRICS:
+                lo, hi = summary[name]['ci'][metric]
+                cells.append(f"{summary[name]['mean'][metric]:.1f} [{lo:.0f}, {hi:.0f}]")
+            print(f"{name:<20}" + ''.join(f" {c:<24}" for c in cells))
+        
+        if not any(summary[n]['p_value'] for n in summary):
+            return
+        print(f"\n{'Method':<20} vs {BASELINE_METHOD} (paired by seed, improvement % / p-value):")
+        print("-"*120)
+        for name, entry in summary.items():
+            if not entry['p_value']:
+                continue
+            cells = []
+            for metric in REPORT_METRICS:
+                p = entry['p_value'][metric]
+                mark = "✅" if p < 0.05 and entry['improvement'].get(metric, 0) > 0 else \
+                       "❌" if p < 0.05 else "~"
+                cells.append(f"{entry['improvement'].get(metric, 0):+7.2f}% p={p:.3f} {mark}")
+            print(f"{name:<20}" + ''.join(f" {c:<24}" for c in cells))
+        print(f"\n✅/❌ = significantly better/worse at p<0.05, ~ = not significant")
+    
     def _save_results(self, name, metrics, elapsed):
-        def convert(obj):
-            if isinstance(obj, (np.integer, np.int64, np.int32)):
-                return int(obj)
-            elif isinstance(obj, (np.floating, np.float64, np.float32)):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, dict):
-                return {k: convert(v) for k, v in obj.items()}
-            return obj
-        
-        output = self.results_dir / f'{name.replace(" ", "_")}.json'
-        with open(output, 'w') as f:
-            json.dump({'method': name, 'metrics': convert(metrics), 'time': float(elapsed)}, f, indent=2)
+        self.store.add_result(self.run_id, name, metrics, elapsed, seed=self.args.seed)
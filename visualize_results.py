@@ -1,14 +1,22 @@
 """
 Professional Visualization Suite for Traffic Signal Control Results
 Generates publication-quality plots for comparative analysis
+
+Headless (Agg) and incremental: a plot is only redrawn when the metrics it is
+drawn from, its code or the DPI changed. Independent figures render in
+parallel worker processes. matplotlib and the process pool are imported on
+first use.
 """
 
+import argparse
+import hashlib
+import inspect
 import json
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 from pathlib import Path
-from matplotlib.gridspec import GridSpec
+from results_store import DEFAULT_DB, ResultsStore
+from traces import load_trace, summarize_trace
 
 # Professional color scheme
 COLORS = {
@@ -19,27 +27,71 @@ COLORS = {
     'Max-Pressure': '#2ECC71',  # Green
     'GA-Fuzzy-Webster': '#E67E22',  # Orange
     'PSO-Fuzzy-Webster': '#E74C3C',  # Red
+    'Webster-Fixed-Time': '#5D6D7E',  # Slate (realistic fixed-time baseline)
     'Fixed-Time': '#95A5A6'  # Gray (baseline)
 }
 
-# Professional styling
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.linewidth'] = 1.5
-plt.rcParams['grid.alpha'] = 0.3
-plt.rcParams['figure.dpi'] = 300
+FULL_DPI = 300     # publication quality
+PREVIEW_DPI = 72   # --preview: fast drafts for CI
+
+# Output file -> ResultsVisualizer method; each entry is independent
+PLOTS = {
+    '1_metrics_comparison.png': 'plot_metrics_comparison',
+    '2_radar_comparison.png': 'plot_radar_chart',
+    '3_improvement_baseline.png': 'plot_improvement_bars',
+    # '4_dashboard.png': 'plot_dashboard',
+    '5_ranking_analysis.png': 'plot_ranking'
+}
+MANIFEST = '.manifest.json'
+
+_plt = None
+
+
+def _pyplot():
+    """Import pyplot on first use, forcing the non-interactive Agg backend"""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        
+        # Professional styling
+        plt.rcParams['font.family'] = 'sans-serif'
+        plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
+        plt.rcParams['font.size'] = 10
+        plt.rcParams['axes.linewidth'] = 1.5
+        plt.rcParams['grid.alpha'] = 0.3
+        plt.rcParams['figure.dpi'] = FULL_DPI
+        _plt = plt
+    return _plt
+
+
+def _render_plot(results_dir, data, method, dpi):
+    """Process-pool worker: draw one figure"""
+    visualizer = ResultsVisualizer(results_dir, data=data, dpi=dpi)
+    getattr(visualizer, method)()
+
+
+def _render_trace(trace_dir, output_dir, dpi, buckets):
+    """Process-pool worker: summarize one trace and draw its figures"""
+    TraceVisualizer(trace_dir, output_dir, dpi=dpi, buckets=buckets).plot_all()
 
 
 class ResultsVisualizer:
-    def __init__(self, results_dir):
+    def __init__(self, results_dir, data=None, dpi=FULL_DPI):
         self.results_dir = Path(results_dir)
         self.output_dir = self.results_dir / 'plots'
-        self.output_dir.mkdir(exist_ok=True)
-        self.data = self.load_all_results()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.data = data if data is not None else self.load_all_results()
+        self.dpi = dpi
+    
+    @classmethod
+    def from_store(cls, store, run_id, dpi=FULL_DPI):
+        """Plot one run of the results store (sweep seeds are averaged)"""
+        return cls(Path('results') / run_id, data=store.load_run(run_id), dpi=dpi)
         
     def load_all_results(self):
-        """Load all JSON result files"""
+        """Load all JSON result files (legacy per-method layout)"""
         data = {}
         for json_file in self.results_dir.glob('*.json'):
             with open(json_file, 'r') as f:
@@ -48,30 +100,54 @@ class ResultsVisualizer:
                 data[method_name] = result['metrics']
         return data
     
-    def generate_all_plots(self):
-        """Generate complete suite of professional plots"""
+    def plot_hash(self, method):
+        """Content hash of everything a plot depends on: metrics, plot code and DPI"""
+        payload = json.dumps({'data': self.data, 'dpi': self.dpi,
+                              'code': inspect.getsource(getattr(type(self), method)),
+                              'colors': COLORS}, sort_keys=True, default=float)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _load_manifest(self):
+        try:
+            with open(self.output_dir / MANIFEST) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def generate_all_plots(self, force=False, workers=None):
+        """Generate complete suite of professional plots (only those that are stale)"""
         print("🎨 Generating professional visualizations...")
         
-        # 1. Comprehensive metrics comparison
-        self.plot_metrics_comparison()
-        
-        # 2. Radar chart for multi-dimensional analysis
-        self.plot_radar_chart()
-        
-        # 3. Improvement over baseline
-        self.plot_improvement_bars()
-        
-        # 4. Key metrics dashboard
-        # self.plot_dashboard()
-        
-        # 5. Performance ranking
-        self.plot_ranking()
+        manifest = self._load_manifest()
+        hashes = {name: self.plot_hash(method) for name, method in PLOTS.items()}
+        stale = [name for name in PLOTS
+                 if force or manifest.get(name) != hashes[name] or not (self.output_dir / name).exists()]
+        for name in PLOTS:
+            if name not in stale:
+                print(f"✓ {name} up to date (skipped)")
+        
+        workers = min(len(stale), workers or os.cpu_count() or 1)
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_plot, self.results_dir, self.data, PLOTS[name], self.dpi)
+                           for name in stale]
+                for future in futures:
+                    future.result()
+        else:
+            for name in stale:
+                getattr(self, PLOTS[name])()
+        
+        manifest.update({name: hashes[name] for name in stale})
+        with open(self.output_dir / MANIFEST, 'w') as f:
+            json.dump(manifest, f, indent=2)
         
         print(f"\n✅ All plots saved to: {self.output_dir}")
-        print(f"   📁 {len(list(self.output_dir.glob('*.png')))} PNG files generated")
+        print(f"   📁 {len(stale)} of {len(PLOTS)} PNG files generated at {self.dpi} DPI")
         
     def plot_metrics_comparison(self):
         """Bar charts for all key metrics"""
+        plt = _pyplot()
         fig, axes = plt.subplots(2, 3, figsize=(18, 10))
         fig.suptitle('Comprehensive Performance Metrics Comparison', 
                      fontsize=16, fontweight='bold', y=0.995)
@@ -128,12 +204,13 @@ class ResultsVisualizer:
         
         plt.tight_layout()
         plt.savefig(self.output_dir / '1_metrics_comparison.png', 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight')
         print("✓ Metrics comparison chart saved")
         plt.close()
     
     def plot_radar_chart(self):
         """Multi-dimensional radar chart for key methods"""
+        plt = _pyplot()
         fig, ax = plt.subplots(figsize=(12, 10), subplot_kw=dict(projection='polar'))
         
         # Select key methods to compare
@@ -189,12 +266,13 @@ class ResultsVisualizer:
         
         plt.tight_layout()
         plt.savefig(self.output_dir / '2_radar_comparison.png', 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight')
         print("✓ Radar chart saved")
         plt.close()
     
     def plot_improvement_bars(self):
         """Show improvement percentage over baseline (Fixed-Time)"""
+        plt = _pyplot()
         fig, ax = plt.subplots(figsize=(14, 8))
         
         baseline = self.data['Fixed-Time']
@@ -253,12 +331,14 @@ class ResultsVisualizer:
         
         plt.tight_layout()
         plt.savefig(self.output_dir / '3_improvement_baseline.png', 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight')
         print("✓ Improvement chart saved")
         plt.close()
     
     def plot_dashboard(self):
         """Executive dashboard with key metrics"""
+        plt = _pyplot()
+        from matplotlib.gridspec import GridSpec
         fig = plt.figure(figsize=(16, 10))
         gs = GridSpec(3, 3, figure=fig, hspace=0.4, wspace=0.3)
         
@@ -385,12 +465,13 @@ class ResultsVisualizer:
                          fontsize=13, fontweight='bold', pad=15)
         
         plt.savefig(self.output_dir / '4_dashboard.png', 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight')
         print("✓ Dashboard saved")
         plt.close()
     
     def plot_ranking(self):
         """Comprehensive ranking visualization"""
+        plt = _pyplot()
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
         
         methods = list(self.data.keys())
@@ -458,38 +539,268 @@ class ResultsVisualizer:
         
         plt.tight_layout()
         plt.savefig(self.output_dir / '5_ranking_analysis.png', 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight')
         print("✓ Ranking analysis saved")
         plt.close()
 
 
+class TraceVisualizer:
+    """
+    Time-series and distribution plots from one per-step trace.
+    The trace is reduced in a single chunked pass to `buckets` time bins
+    (min/max decimation), so a 10^7-step trace plots as ~2000 points.
+    """
+    
+    MAX_HEATMAP_ROWS = 400  # intersections beyond this are averaged into row groups
+    
+    def __init__(self, trace_dir, output_dir, dpi=FULL_DPI, buckets=2000):
+        self.trace_dir = Path(trace_dir)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.dpi = dpi
+        self.buckets = buckets
+        self.method = self.trace_dir.name
+        self.color = COLORS.get(self.method, '#34495e')
+    
+    def trace_hash(self):
+        """Traces can be huge, so key on their metadata and file stamps rather than contents"""
+        stamps = {f.name: [f.stat().st_size, f.stat().st_mtime_ns] for f in sorted(self.trace_dir.iterdir())}
+        payload = json.dumps({'files': stamps, 'dpi': self.dpi, 'buckets': self.buckets,
+                              'code': inspect.getsource(TraceVisualizer)}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def filenames(self):
+        slug = self.method.replace(' ', '_')
+        return [f'6_queue_timeseries_{slug}.png', f'7_green_distribution_{slug}.png',
+                f'8_phase_switches_{slug}.png', f'9_queue_heatmap_{slug}.png']
+    
+    def plot_all(self):
+        queue, phases, meta = load_trace(self.trace_dir)
+        summary = summarize_trace(queue, phases, self.buckets)
+        files = self.filenames()
+        self.plot_queue_timeseries(summary, files[0])
+        self.plot_green_distribution(summary, files[1])
+        self.plot_phase_switches(summary, files[2])
+        self.plot_heatmap(summary, files[3])
+    
+    def _save(self, fig, filename):
+        plt = _pyplot()
+        plt.tight_layout()
+        plt.savefig(self.output_dir / filename, dpi=self.dpi, bbox_inches='tight')
+        plt.close(fig)
+        print(f"✓ {filename} saved")
+    
+    def plot_queue_timeseries(self, summary, filename):
+        """Network-average queue over time: min/max envelope per bin plus bin mean"""
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(14, 5))
+        t = summary['t']
+        ax.fill_between(t, summary['queue_min'], summary['queue_max'], color=self.color,
+                        alpha=0.3, linewidth=0, label='min/max per bin')
+        ax.plot(t, summary['queue_mean'], color=self.color, linewidth=1.2, label='mean')
+        ax.set_xlabel('Simulation Step', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Avg Queue per Intersection (vehicles)', fontsize=12, fontweight='bold')
+        ax.set_title(f'{self.method}: Queue Length Over Time\n'
+                     f'({summary["steps"]:,} steps, {summary["bucket"]} steps per bin)',
+                     fontsize=14, fontweight='bold', pad=15)
+        ax.grid(alpha=0.3, linestyle='--')
+        ax.legend(loc='upper right', fontsize=10)
+        self._save(fig, filename)
+    
+    def plot_green_distribution(self, summary, filename):
+        """Histogram of green-period durations over all intersections"""
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(12, 6))
+        hist = summary['green_hist']
+        nonzero = np.nonzero(hist)[0]
+        upper = nonzero[-1] + 1 if len(nonzero) else 2
+        ax.bar(np.arange(1, upper), hist[1:upper], width=1.0, color=self.color,
+               edgecolor='black', linewidth=0.5, alpha=0.85)
+        total = hist.sum()
+        if total:
+            mean = (np.arange(len(hist)) * hist).sum() / total
+            ax.axvline(mean, color='black', linestyle='--', linewidth=1.5, label=f'mean = {mean:.1f} steps')
+            ax.legend(fontsize=10)
+        ax.set_xlabel('Green Duration (steps, last bin = longer)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Green Periods', fontsize=12, fontweight='bold')
+        ax.set_title(f'{self.method}: Green-Time Distribution ({total:,} periods)',
+                     fontsize=14, fontweight='bold', pad=15)
+        ax.grid(axis='y', alpha=0.3, linestyle='--')
+        ax.set_axisbelow(True)
+        self._save(fig, filename)
+    
+    def plot_phase_switches(self, summary, filename):
+        """Switch frequency over time and total switches per intersection"""
+        plt = _pyplot()
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 5), gridspec_kw={'width_ratios': [2, 1]})
+        ax1.plot(summary['t'], summary['switch_rate'] * 100, color=self.color, linewidth=1.2)
+        ax1.set_xlabel('Simulation Step', fontsize=12, fontweight='bold')
+        ax1.set_ylabel('Switches per 100 Intersection-Steps', fontsize=12, fontweight='bold')
+        ax1.set_title('Phase-Switch Frequency Over Time', fontsize=13, fontweight='bold', pad=10)
+        ax1.grid(alpha=0.3, linestyle='--')
+        
+        switches = summary['switches']
+        if len(switches) <= 50:
+            ax2.bar(range(len(switches)), switches, color=self.color, edgecolor='black', alpha=0.85)
+            ax2.set_xlabel('Intersection', fontsize=12, fontweight='bold')
+            ax2.set_ylabel('Total Switches', fontsize=12, fontweight='bold')
+        else:
+            ax2.hist(switches, bins=50, color=self.color, edgecolor='black', alpha=0.85)
+            ax2.set_xlabel('Total Switches', fontsize=12, fontweight='bold')
+            ax2.set_ylabel('Intersections', fontsize=12, fontweight='bold')
+        ax2.set_title('Switches per Intersection', fontsize=13, fontweight='bold', pad=10)
+        ax2.grid(axis='y', alpha=0.3, linestyle='--')
+        ax2.set_axisbelow(True)
+        fig.suptitle(self.method, fontsize=15, fontweight='bold')
+        self._save(fig, filename)
+    
+    def plot_heatmap(self, summary, filename):
+        """Mean queue per intersection per time bin"""
+        plt = _pyplot()
+        heat = summary['heat'].T
+        group = -(-heat.shape[0] // self.MAX_HEATMAP_ROWS)
+        if group > 1:
+            pad = -heat.shape[0] % group
+            heat = np.pad(heat, ((0, pad), (0, 0)), constant_values=np.nan)
+            heat = np.nanmean(heat.reshape(-1, group, heat.shape[1]), axis=1)
+        
+        fig, ax = plt.subplots(figsize=(14, max(3, min(10, heat.shape[0] * 0.4))))
+        im = ax.imshow(heat, aspect='auto', cmap='RdYlGn_r', interpolation='nearest',
+                       extent=[0, summary['steps'], heat.shape[0] * group, 0])
+        cbar = plt.colorbar(im, ax=ax)
+        cbar.set_label('Mean Queue (vehicles)', fontsize=11, fontweight='bold')
+        ax.set_xlabel('Simulation Step', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Intersection' + (f' (groups of {group})' if group > 1 else ''),
+                      fontsize=12, fontweight='bold')
+        ax.set_title(f'{self.method}: Per-Intersection Queue Heatmap', fontsize=14, fontweight='bold', pad=15)
+        self._save(fig, filename)
+
+
+def generate_trace_plots(results_dir, dpi=FULL_DPI, force=False, workers=None, buckets=2000):
+    """Plot every trace under results_dir/traces, skipping those whose inputs are unchanged"""
+    trace_dirs = sorted(d for d in (Path(results_dir) / 'traces').glob('*') if (d / 'meta.json').exists())
+    output_dir = Path(results_dir) / 'plots'
+    if not trace_dirs:
+        print(f"❌ No traces in {Path(results_dir) / 'traces'} (run ultimate_tsc.py with --trace)")
+        return 0
+    
+    manifest_path = output_dir / MANIFEST
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    
+    stale = []
+    for trace_dir in trace_dirs:
+        tv = TraceVisualizer(trace_dir, output_dir, dpi=dpi, buckets=buckets)
+        key = f'traces/{tv.method}'
+        digest = tv.trace_hash()
+        if force or manifest.get(key) != digest or not all((output_dir / f).exists() for f in tv.filenames()):
+            stale.append((trace_dir, key, digest))
+        else:
+            print(f"✓ trace {tv.method} up to date (skipped)")
+    
+    workers = min(len(stale), workers or os.cpu_count() or 1)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_trace, d, output_dir, dpi, buckets) for d, _, _ in stale]
+            for future in futures:
+                future.result()
+    else:
+        for trace_dir, _, _ in stale:
+            _render_trace(trace_dir, output_dir, dpi, buckets)
+    
+    manifest.update({key: digest for _, key, digest in stale})
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return len(stale)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate comparison plots')
+    parser.add_argument('--run-id', type=str, default=None,
+                       help='Run in the results store to plot (default: most recent run)')
+    parser.add_argument('--results-dir', type=str, default=None,
+                       help='Legacy directory of per-method JSON files to plot instead')
+    parser.add_argument('--db', type=str, default=str(DEFAULT_DB), help='Results store path')
+    parser.add_argument('--dpi', type=int, default=FULL_DPI, help='Output resolution')
+    parser.add_argument('--preview', action='store_true',
+                       help=f'Fast low-resolution drafts ({PREVIEW_DPI} DPI)')
+    parser.add_argument('--force', action='store_true', help='Redraw plots even if up to date')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Parallel render processes (default: one per plot, 1 = in-process)')
+    parser.add_argument('--traces', action='store_true',
+                       help='Plot the per-step traces of the run (recorded with --trace) instead')
+    parser.add_argument('--buckets', type=int, default=2000, help='Time bins for trace plots')
+    return parser.parse_args()
+
+
+def find_latest_run(db_path):
+    """Most recent run: the results store or a legacy JSON directory, whichever is newer"""
+    candidates = []
+    if Path(db_path).exists():
+        store = ResultsStore(db_path)
+        run_id = store.latest_run_id()
+        if run_id:
+            candidates.append((run_id, 'store'))
+        store.close()
+    
+    results_base = Path('results')
+    if results_base.exists():
+        # Find subdirectories that don't contain 'plots' and still hold JSON files
+        candidates.extend((d.name, 'legacy') for d in results_base.iterdir()
+                          if d.is_dir() and 'plots' not in d.name.lower() and any(d.glob('*.json')))
+    
+    # Run ids and legacy directory names are both timestamps, so names sort by age
+    return max(candidates) if candidates else (None, None)
+
+
 def main():
     """Main execution"""
+    args = parse_args()
     print("="*70)
     print("PROFESSIONAL VISUALIZATION SUITE")
     print("Traffic Signal Control Performance Analysis")
     print("="*70)
     
-    # Automatically find the most recent results directory
-    results_base = Path('results')
-    if not results_base.exists():
-        print(f"❌ Error: Results directory not found: {results_base}")
-        return
+    if args.results_dir:
+        run_id, source = Path(args.results_dir).name, 'legacy'
+        results_dir = Path(args.results_dir)
+    elif args.run_id:
+        run_id, source = args.run_id, 'store'
+    else:
+        # Automatically find the most recent results
+        run_id, source = find_latest_run(args.db)
+        results_dir = Path('results') / run_id if run_id else None
     
-    # Find subdirectories that don't contain 'plots'
-    subdirs = [d for d in results_base.iterdir() 
-               if d.is_dir() and 'plots' not in d.name.lower()]
+    if run_id is None:
+        print(f"❌ Error: No results found in {args.db} or results/")
+        return
+    dpi = PREVIEW_DPI if args.preview else args.dpi
     
-    if not subdirs:
-        print(f"❌ Error: No results subdirectories found in {results_base}")
+    if args.traces:
+        results_dir = Path('results') / run_id if source == 'store' else results_dir
+        print(f"📂 Using traces from: {results_dir}")
+        generate_trace_plots(results_dir, dpi=dpi, force=args.force, workers=args.workers,
+                             buckets=args.buckets)
+        print(f"\n🎉 Trace plots are ready in: {results_dir / 'plots'}")
         return
     
-    # Use the most recent one (sorted by name, which includes timestamp)
-    results_dir = sorted(subdirs)[-1]
-    print(f"📂 Using results from: {results_dir.name}")
+    if source == 'store':
+        store = ResultsStore(args.db)
+        visualizer = ResultsVisualizer.from_store(store, run_id, dpi=dpi)
+        store.close()
+        if not visualizer.data:
+            print(f"❌ Error: Run {run_id} has no results in {args.db}")
+            return
+        print(f"📂 Using results store run: {run_id}")
+    else:
+        visualizer = ResultsVisualizer(results_dir, dpi=dpi)
+        print(f"📂 Using results from: {results_dir.name}")
     
-    visualizer = ResultsVisualizer(results_dir)
-    visualizer.generate_all_plots()
+    visualizer.generate_all_plots(force=args.force, workers=args.workers)
     
     print("\n" + "="*70)
     print("🎉 VISUALIZATION COMPLETE!")